@@ -0,0 +1,32 @@
+"""add external ids for bulk import
+
+Revision ID: 003_add_external_ids
+Revises: 002_add_missing_asset_columns
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_add_external_ids'
+down_revision: Union[str, None] = '002_add_missing_asset_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['gtm_plays', 'assets', 'opportunities', 'people']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('external_id', sa.String(), nullable=True))
+        op.create_unique_constraint(f'uq_{table}_external_id', table, ['external_id'])
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_constraint(f'uq_{table}_external_id', table, type_='unique')
+        op.drop_column(table, 'external_id')
@@ -0,0 +1,26 @@
+"""add stage instance version
+
+Revision ID: 004_add_stage_instance_version
+Revises: 003_add_external_ids
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_add_stage_instance_version'
+down_revision: Union[str, None] = '003_add_external_ids'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('opportunity_stage_instances', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('opportunity_stage_instances', 'version')
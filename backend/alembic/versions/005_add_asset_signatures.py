@@ -0,0 +1,32 @@
+"""add asset signatures
+
+Revision ID: 005_add_asset_signatures
+Revises: 004_add_stage_instance_version
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_add_asset_signatures'
+down_revision: Union[str, None] = '004_add_stage_instance_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('asset_signatures',
+        sa.Column('asset_id', sa.String(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('asset_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('asset_signatures')
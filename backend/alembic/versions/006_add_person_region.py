@@ -0,0 +1,26 @@
+"""add person region
+
+Revision ID: 006_add_person_region
+Revises: 005_add_asset_signatures
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_add_person_region'
+down_revision: Union[str, None] = '005_add_asset_signatures'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('people', sa.Column('region', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('people', 'region')
@@ -0,0 +1,58 @@
+"""add opportunity members and workload indexes
+
+Revision ID: 007_add_opportunity_members
+Revises: 006_add_person_region
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_add_opportunity_members'
+down_revision: Union[str, None] = '006_add_person_region'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    members = op.create_table('opportunity_members',
+        sa.Column('opportunity_id', sa.String(), nullable=False),
+        sa.Column('person_id', sa.String(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['opportunity_id'], ['opportunities.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('opportunity_id', 'person_id', 'role')
+    )
+    op.create_index('ix_opportunity_members_person_id', 'opportunity_members', ['person_id'])
+    op.create_index('ix_opportunities_status', 'opportunities', ['status'])
+    op.create_index('ix_opportunity_plays_opportunity_id', 'opportunity_plays', ['opportunity_id'])
+    op.create_index('ix_opportunity_stage_instances_opportunity_play_id', 'opportunity_stage_instances', ['opportunity_play_id'])
+
+    # Backfill from the existing owner/lead/team columns
+    opportunities = sa.table('opportunities',
+        sa.column('id', sa.String()),
+        sa.column('sales_owner_user_id', sa.String()),
+        sa.column('technical_lead_user_id', sa.String()),
+        sa.column('team_member_user_ids', sa.JSON()),
+    )
+    rows = {}
+    for opp_id, owner, lead, team in op.get_bind().execute(sa.select(
+        opportunities.c.id, opportunities.c.sales_owner_user_id,
+        opportunities.c.technical_lead_user_id, opportunities.c.team_member_user_ids
+    )):
+        for person_id, role in [(owner, 'sales_owner'), (lead, 'technical_lead')] + [(p, 'team_member') for p in team or []]:
+            if person_id:
+                rows[(opp_id, person_id, role)] = {'opportunity_id': opp_id, 'person_id': person_id, 'role': role}
+    if rows:
+        op.bulk_insert(members, list(rows.values()))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_opportunity_stage_instances_opportunity_play_id', table_name='opportunity_stage_instances')
+    op.drop_index('ix_opportunity_plays_opportunity_id', table_name='opportunity_plays')
+    op.drop_index('ix_opportunities_status', table_name='opportunities')
+    op.drop_index('ix_opportunity_members_person_id', table_name='opportunity_members')
+    op.drop_table('opportunity_members')
@@ -0,0 +1,33 @@
+"""content-addressed asset storage
+
+Revision ID: 008_add_asset_content_hash
+Revises: 007_add_opportunity_members
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_add_asset_content_hash'
+down_revision: Union[str, None] = '007_add_opportunity_members'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('assets', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_assets_content_hash', 'assets', ['content_hash'])
+    # Assets with identical content now share one blob key
+    op.drop_constraint('assets_file_path_key', 'assets', type_='unique')
+    op.create_index('ix_assets_file_path', 'assets', ['file_path'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assets_file_path', table_name='assets')
+    op.create_unique_constraint('assets_file_path_key', 'assets', ['file_path'])
+    op.drop_index('ix_assets_content_hash', table_name='assets')
+    op.drop_column('assets', 'content_hash')
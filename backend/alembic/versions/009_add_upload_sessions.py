@@ -0,0 +1,42 @@
+"""add resumable upload sessions
+
+Revision ID: 009_add_upload_sessions
+Revises: 008_add_asset_content_hash
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_add_upload_sessions'
+down_revision: Union[str, None] = '008_add_asset_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_sessions',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('offset', sa.Integer(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('s3_upload_id', sa.String(), nullable=True),
+        sa.Column('parts', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_upload_sessions_expires_at', 'upload_sessions', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_upload_sessions_expires_at', table_name='upload_sessions')
+    op.drop_table('upload_sessions')
@@ -0,0 +1,37 @@
+"""record the storage provider per asset
+
+Revision ID: 010_add_asset_storage_provider
+Revises: 009_add_upload_sessions
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_add_asset_storage_provider'
+down_revision: Union[str, None] = '009_add_upload_sessions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('assets', sa.Column('storage_provider', sa.String(), nullable=True))
+    # Until now files went wherever the active provider pointed. Unless that is
+    # already S3, everything on record is on local disk; otherwise leave it
+    # unknown and let the storage migration job sort it out.
+    # (system_settings comes from create_all, so it may not exist yet.)
+    if 'system_settings' in sa.inspect(op.get_bind()).get_table_names():
+        op.execute(
+            "UPDATE assets SET storage_provider = 'local' WHERE NOT EXISTS ("
+            "SELECT 1 FROM system_settings WHERE key = 'storage_provider' AND value = 's3')"
+        )
+    else:
+        op.execute("UPDATE assets SET storage_provider = 'local'")
+
+
+def downgrade() -> None:
+    op.drop_column('assets', 'storage_provider')
@@ -0,0 +1,37 @@
+"""add extracted texts
+
+Revision ID: 011_add_extracted_texts
+Revises: 010_add_asset_storage_provider
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_add_extracted_texts'
+down_revision: Union[str, None] = '010_add_asset_storage_provider'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('extracted_texts',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('format', sa.String(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('word_count', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('extracted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('extracted_texts')
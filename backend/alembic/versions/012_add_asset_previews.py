@@ -0,0 +1,42 @@
+"""add asset previews
+
+Revision ID: 012_add_asset_previews
+Revises: 011_add_extracted_texts
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_add_asset_previews'
+down_revision: Union[str, None] = '011_add_extracted_texts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('asset_previews',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=True),
+        sa.Column('thumbnail_key', sa.String(), nullable=True),
+        sa.Column('storage_provider', sa.String(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('snippet', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.create_index(op.f('ix_asset_previews_next_attempt_at'), 'asset_previews', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_asset_previews_next_attempt_at'), table_name='asset_previews')
+    op.drop_table('asset_previews')
@@ -1,22 +1,27 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, joinedload
-from typing import List
+from typing import List, Optional
 import json
 from ...database import get_db
 from ...models_db import AssetModel
-from ...models import AssetMetadata
+from ...models import AssetMetadata, BatchUploadResult
 from ...services import asset_manager
+from ...services.asset_processing import asset_processing
+from ...services.preview_worker import preview_worker
 from ...services.storage import storage
-from fastapi.responses import FileResponse
+from fastapi.responses import RedirectResponse
+from ..responses import AssetFileResponse, open_file
 
 router = APIRouter()
 
 @router.post("/", response_model=AssetMetadata)
 async def create_asset(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     metadata_json: str = Form(...),
+    upload_id: Optional[str] = Form(None),
     db: AsyncSession = Depends(get_db)
 ):
     try:
@@ -27,7 +32,10 @@ async def create_asset(
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
 
-    db_asset = await asset_manager.create_asset_entry(db, file, metadata)
+    db_asset = await asset_manager.create_asset_entry(db, file, metadata, upload_id)
+    # Text extraction and previews run after the response is sent
+    background_tasks.add_task(asset_processing.process, db.bind, [db_asset.id])
+    background_tasks.add_task(preview_worker.process, db.bind, [db_asset.id])
     
     # Convert back to Pydantic model for response
     # Note: This is a simplified conversion. You might want a proper helper.
@@ -40,10 +48,67 @@ async def create_asset(
         author=db_asset.metadata_entry.author,
         confidentiality=db_asset.metadata_entry.confidentiality,
         tags=[tag.name for tag in db_asset.tags],
-        url=storage.get_url(db_asset.file_path),
+        url=await storage.get_url(db_asset.file_path, provider=db_asset.storage_provider),
         mime_type=db_asset.mime_type
     )
 
+# Most files one batch request may carry
+BATCH_UPLOAD_MAX_FILES = 100
+
+@router.post("/batch", response_model=List[BatchUploadResult])
+async def create_assets_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    metadata_json: str = Form(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a folder's worth of files in one request. metadata_json is a JSON
+    array with one metadata object per file, in the same order. Each file
+    gets its own result, so one bad file doesn't fail the rest.
+    """
+    if len(files) > BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_UPLOAD_MAX_FILES} files per batch")
+    try:
+        metadata_list = json.loads(metadata_json)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON in metadata_json")
+    if not isinstance(metadata_list, list) or len(metadata_list) != len(files):
+        raise HTTPException(status_code=400, detail="metadata_json must be a list with one entry per file")
+
+    results = [BatchUploadResult(index=i, filename=file.filename, status="failed") for i, file in enumerate(files)]
+    entries = []
+    for i, (file, metadata_dict) in enumerate(zip(files, metadata_list)):
+        try:
+            entries.append((i, file, AssetMetadata(**metadata_dict)))
+        except Exception as e:
+            results[i].error = f"Validation error: {str(e)}"
+
+    created = await asset_manager.create_asset_batch(db, [(file, metadata) for _, file, metadata in entries])
+    assets = [asset for asset in created if isinstance(asset, AssetModel)]
+    if assets:
+        background_tasks.add_task(asset_processing.process, db.bind, [a.id for a in assets])
+        background_tasks.add_task(preview_worker.process, db.bind, [a.id for a in assets])
+    urls = dict(zip((a.id for a in assets), await storage.get_urls([a.file_path for a in assets], [a.storage_provider for a in assets])))
+    for (i, _, _), outcome in zip(entries, created):
+        if isinstance(outcome, str):
+            results[i].error = outcome
+            continue
+        results[i].status = "created"
+        results[i].asset = AssetMetadata(
+            id=outcome.id,
+            title=outcome.metadata_entry.title,
+            type=outcome.metadata_entry.type,
+            category=outcome.metadata_entry.category,
+            summary=outcome.metadata_entry.summary,
+            author=outcome.metadata_entry.author,
+            confidentiality=outcome.metadata_entry.confidentiality,
+            tags=[tag.name for tag in outcome.tags],
+            url=urls[outcome.id],
+            mime_type=outcome.mime_type
+        )
+    return results
+
 @router.get("/", response_model=List[AssetMetadata])
 async def list_assets(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
@@ -56,33 +121,64 @@ async def list_assets(skip: int = 0, limit: int = 100, db: AsyncSession = Depend
     
     # This N+1 query pattern is inefficient but fine for MVP. 
     # In production, use joinedload options in the select query.
+    assets = [asset for asset in assets if asset.metadata_entry]
+    # One batch: cached presigned URLs are reused, the rest signed together
+    urls = await storage.get_urls([asset.file_path for asset in assets], [asset.storage_provider for asset in assets])
     response = []
-    for asset in assets:
-        if asset.metadata_entry:
-            response.append(AssetMetadata(
-                id=asset.id,
-                title=asset.metadata_entry.title,
-                type=asset.metadata_entry.type,
-                category=asset.metadata_entry.category,
-                summary=asset.metadata_entry.summary,
-                author=asset.metadata_entry.author,
-                confidentiality=asset.metadata_entry.confidentiality,
-                tags=[tag.name for tag in asset.tags],
-                url=storage.get_url(asset.file_path),
-                mime_type=asset.mime_type
-            ))
+    for asset, url in zip(assets, urls):
+        response.append(AssetMetadata(
+            id=asset.id,
+            title=asset.metadata_entry.title,
+            type=asset.metadata_entry.type,
+            category=asset.metadata_entry.category,
+            summary=asset.metadata_entry.summary,
+            author=asset.metadata_entry.author,
+            confidentiality=asset.metadata_entry.confidentiality,
+            tags=[tag.name for tag in asset.tags],
+            url=url,
+            mime_type=asset.mime_type
+        ))
     return response
 
-@router.get("/{asset_id}/file")
-async def get_asset_file(asset_id: str, db: AsyncSession = Depends(get_db)):
-    file_path = await asset_manager.get_asset_path(asset_id, db)
-    return FileResponse(file_path)
+@router.api_route("/{asset_id}/file", methods=["GET", "HEAD"])
+async def get_asset_file(asset_id: str, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    asset = await asset_manager.get_asset_file(asset_id, db)
+
+    # Local storage, or S3 files already in the disk cache when that's on.
+    # Opened here so the response can't lose the file to cache eviction.
+    local_path = await storage.local_file(asset.file_path, asset.content_hash, asset.storage_provider, fill=False)
+    remote = (asset.storage_provider or storage.active_provider) == "s3"
+    opened = None
+    if local_path is not None:
+        try:
+            opened = await open_file(local_path)
+        except FileNotFoundError:
+            if not remote:
+                raise HTTPException(status_code=404, detail="Asset file not found on disk")
+            # Evicted from the disk cache since the lookup: redirect like a miss
+    if opened is None:
+        # Remote storage: send the client to a presigned URL rather than proxying the bytes
+        url = await storage.get_url(asset.file_path, filename=asset.original_filename, provider=asset.storage_provider)
+        if not url:
+            raise HTTPException(status_code=502, detail="Could not sign a download URL")
+        # A cache miss is filled after the redirect goes out, for the next download
+        background_tasks.add_task(storage.warm, asset.file_path, asset.content_hash, asset.storage_provider)
+        return RedirectResponse(url, status_code=302)
+
+    fd, stat_result = opened
+    # Content digest where we have one; legacy uploads fall back to mtime/size
+    etag = f'"{asset.content_hash}"' if asset.content_hash else f'"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+    # Stored under its digest, so hand the original name back to the browser
+    return AssetFileResponse(fd, stat_result, etag, media_type=asset.mime_type,
+                             filename=asset.original_filename)
 
 @router.put("/{asset_id}", response_model=AssetMetadata)
 async def update_asset(
     asset_id: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(None),
     metadata_json: str = Form(...),
+    upload_id: Optional[str] = Form(None),
     db: AsyncSession = Depends(get_db)
 ):
     try:
@@ -96,7 +192,10 @@ async def update_asset(
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
 
     # Call the manager to update
-    db_asset = await asset_manager.update_asset_entry(db, asset_id, metadata, file)
+    db_asset = await asset_manager.update_asset_entry(db, asset_id, metadata, file, upload_id)
+    if file:
+        background_tasks.add_task(asset_processing.process, db.bind, [asset_id])
+        background_tasks.add_task(preview_worker.process, db.bind, [asset_id])
     
     return AssetMetadata(
         id=db_asset.id,
@@ -107,7 +206,7 @@ async def update_asset(
         author=db_asset.metadata_entry.author,
         confidentiality=db_asset.metadata_entry.confidentiality,
         tags=[tag.name for tag in db_asset.tags],
-        url=storage.get_url(db_asset.file_path),
+        url=await storage.get_url(db_asset.file_path, provider=db_asset.storage_provider),
         mime_type=db_asset.mime_type
     )
 
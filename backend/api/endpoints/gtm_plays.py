@@ -5,6 +5,8 @@ from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from ...database import get_db
 from ...models_db import GTMPlayModel, AssetGTMPlayAssociation, AssetModel
+from ...services.play_index import play_index
+from ...services.asset_recommender import asset_recommender
 from ...models import GTMPlay, GTMPlayCreate, AssetGTMPlayLink, AssetMetadata, AssetGTMPlayAssociation as AssetGTMPlayAssociationSchema
 
 router = APIRouter()
@@ -22,6 +24,7 @@ async def create_play(play: GTMPlayCreate, db: AsyncSession = Depends(get_db)):
     db.add(db_play)
     await db.commit()
     await db.refresh(db_play)
+    play_index.upsert_play(db_play)
     return GTMPlay(
         id=db_play.id,
         title=db_play.title,
@@ -98,6 +101,7 @@ async def associate_asset_to_play(link: AssetGTMPlayLink, db: AsyncSession = Dep
         db.add(new_assoc)
     
     await db.commit()
+    await asset_recommender.refresh_asset(db, link.asset_id)
     return link
 
 @router.put("/{play_id}", response_model=GTMPlay)
@@ -117,6 +121,7 @@ async def update_play(play_id: int, play: GTMPlayCreate, db: AsyncSession = Depe
     
     await db.commit()
     await db.refresh(db_play)
+    play_index.upsert_play(db_play)
     
     return GTMPlay(
         id=db_play.id,
@@ -135,95 +140,55 @@ async def match_plays(
     industry: Optional[str] = None,
     region: Optional[str] = None,
     stage: Optional[str] = None,
+    limit: Optional[int] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    # Fetch all plays and do in-memory matching for flexibility
-    # In a real app, we would use more SQL filtering
-    query = select(GTMPlayModel).options(selectinload(GTMPlayModel.asset_associations).selectinload(AssetGTMPlayAssociation.asset).selectinload(AssetModel.metadata_entry))
+    # Score against the in-memory match index, then load assets only for the top-k.
+    # All matches by default, as before the index; callers can pass a limit.
+    await play_index.ensure_loaded(db)
+    ranked = play_index.match(offering=offering, industry=industry, region=region, stage=stage, limit=limit)
+    if not ranked:
+        return []
     
-    result = await db.execute(query)
-    plays = result.scalars().all()
+    result = await db.execute(
+        select(GTMPlayModel)
+        .options(selectinload(GTMPlayModel.asset_associations).selectinload(AssetGTMPlayAssociation.asset).selectinload(AssetModel.metadata_entry))
+        .where(GTMPlayModel.id.in_([pid for pid, _ in ranked]))
+    )
+    plays = {play.id: play for play in result.scalars().all()}
     
     matched_plays = []
-    for play in plays:
-        score = 0
-        total_criteria = 0
-        
-        # 1. Offering Match (High Weight)
-        if offering:
-            total_criteria += 3
-            if play.offering:
-                play_offerings = [o.strip().lower() for o in play.offering.split(',')]
-                # Check if ANY of the requested offerings match ANY of the play's offerings
-                match_count = sum(1 for off in offering if any(off.lower() in po for po in play_offerings))
-                if match_count > 0:
-                    score += 3 # Full points if at least one matches
-        
-        # 2. Industry Match (Medium Weight)
-        if industry and industry != 'X-SECTOR':
-            total_criteria += 2
-            if play.industry:
-                # Handle "Cross-sector" or "All" logic
-                if play.industry.lower() in ['all', 'cross-sector', 'x-sector'] or industry.lower() in play.industry.lower():
-                    score += 2
-        
-        # 3. Region Match (Medium Weight)
-        if region and region != 'GLOBAL':
-            total_criteria += 2
-            if play.region:
-                if play.region.lower() in ['global', 'all'] or region.lower() in play.region.lower():
-                    score += 2
-        
-        # 4. Stage Match (Low Weight)
-        if stage:
-            total_criteria += 1
-            if play.sales_stage:
-                if stage.lower() in play.sales_stage.lower() or play.sales_stage.lower() == 'all':
-                    score += 1
-        
-        # Calculate Percentage
-        # If no criteria provided, return 0 or maybe all? Let's return 0 match if no criteria.
-        # But if criteria provided, calculate %.
+    for play_id, final_score in ranked:
+        play = plays.get(play_id)
+        if not play:
+            # Deleted by another worker since the index was loaded
+            continue
+        assets = []
+        for assoc in play.asset_associations:
+            if assoc.asset and assoc.asset.metadata_entry:
+                assets.append(AssetMetadata(
+                    id=assoc.asset.id,
+                    title=assoc.asset.metadata_entry.title,
+                    type=assoc.asset.metadata_entry.type,
+                    category=assoc.asset.metadata_entry.category,
+                    summary=assoc.asset.metadata_entry.summary,
+                    author=assoc.asset.metadata_entry.author,
+                    confidentiality=assoc.asset.metadata_entry.confidentiality,
+                    stage=assoc.phase,
+                    purpose=assoc.purpose,
+                    collection_id=assoc.collection_id
+                ))
         
-        final_score = 0
-        if total_criteria > 0:
-            final_score = int((score / total_criteria) * 100)
-        elif not offering and not industry and not region and not stage:
-             # If no filters, maybe just list them all with 100%? Or 0?
-             # Let's say 100% if browsing without filters (though this endpoint is for matching)
-             final_score = 100
-
-        # Threshold: Only return if > 0% match
-        if final_score > 0:
-            assets = []
-            for assoc in play.asset_associations:
-                if assoc.asset and assoc.asset.metadata_entry:
-                    assets.append(AssetMetadata(
-                        id=assoc.asset.id,
-                        title=assoc.asset.metadata_entry.title,
-                        type=assoc.asset.metadata_entry.type,
-                        category=assoc.asset.metadata_entry.category,
-                        summary=assoc.asset.metadata_entry.summary,
-                        author=assoc.asset.metadata_entry.author,
-                        confidentiality=assoc.asset.metadata_entry.confidentiality,
-                        stage=assoc.phase,
-                        purpose=assoc.purpose,
-                        collection_id=assoc.collection_id
-                    ))
-            
-            matched_plays.append(GTMPlay(
-                id=play.id,
-                title=play.title,
-                description=play.description,
-                offering=play.offering,
-                industry=play.industry,
-                region=play.region,
-                sales_stage=play.sales_stage,
-                match_score=final_score,
-                assets=assets
-            ))
-            
-    # Sort by match score descending
-    matched_plays.sort(key=lambda x: x.match_score or 0, reverse=True)
+        matched_plays.append(GTMPlay(
+            id=play.id,
+            title=play.title,
+            description=play.description,
+            offering=play.offering,
+            industry=play.sector,
+            region=play.geo,
+            sales_stage=play.sales_stage,
+            match_score=final_score,
+            assets=assets
+        ))
             
     return matched_plays
@@ -0,0 +1,171 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple, Union
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=a-b" range into a half-open (start, end). Returns
+    None for anything we serve in full instead (multiple ranges, other
+    units); raises ValueError when the range can't be satisfied.
+    """
+    match = _RANGE.match(header.replace(" ", ""))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size
+    start = int(first)
+    end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        raise ValueError("range outside file")
+    return start, end
+
+
+async def open_file(path: Union[str, Path]) -> Tuple[int, os.stat_result]:
+    """Open a file for AssetFileResponse. Raises FileNotFoundError."""
+    fd = await anyio.to_thread.run_sync(os.open, str(path), os.O_RDONLY)
+    try:
+        return fd, os.fstat(fd)
+    except BaseException:
+        os.close(fd)
+        raise
+
+
+class AssetFileResponse(Response):
+    """
+    Serves a local asset file with strong validators and byte ranges.
+
+    The ETag is the content digest, so it survives copies and re-uploads of
+    identical bytes. Handles If-None-Match / If-Modified-Since (304),
+    If-Range and a single Range (206, or 416 when unsatisfiable); multi-range
+    requests get the whole file, which RFC 9110 allows.
+
+    It sends from a descriptor the endpoint opened (see open_file), so a
+    disk-cache eviction between the lookup and the send can't fail a
+    response whose headers are already out; the descriptor is closed once
+    the response is sent. The body goes out through the server's zero-copy
+    extension (os.sendfile on the socket) when it offers one, and otherwise
+    as chunks read in a worker thread.
+    """
+
+    def __init__(self, fd: int, stat_result: os.stat_result, etag: str, media_type: Optional[str] = None,
+                 filename: Optional[str] = None, cache_control: str = "private, no-cache"):
+        super().__init__(media_type=media_type or "application/octet-stream")
+        self.fd: Optional[int] = fd
+        self.size = stat_result.st_size
+        self.etag = etag
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.mtime = int(stat_result.st_mtime)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = self.last_modified
+        # Asset URLs are per asset, not per content, so by default clients revalidate
+        self.headers["cache-control"] = cache_control
+        if filename:
+            quoted = quote(filename)
+            self.headers["content-disposition"] = (
+                f'attachment; filename="{filename}"' if quoted == filename
+                else f"attachment; filename*=utf-8''{quoted}"
+            )
+        del self.headers["content-length"]
+
+    def _not_modified(self, headers: Headers) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in tags or self.etag in tags
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return self.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range(self, headers: Headers) -> Optional[Tuple[int, int]]:
+        http_range = headers.get("range")
+        if not http_range:
+            return None
+        if_range = headers.get("if-range")
+        # A stale If-Range means the client's partial copy is of another version
+        if if_range is not None and if_range not in (self.etag, self.last_modified):
+            return None
+        return parse_range(http_range, self.size)
+
+    def close(self):
+        if getattr(self, "fd", None) is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __del__(self):
+        # A response that was built but never sent
+        self.close()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self._respond(scope, send)
+        finally:
+            self.close()
+
+    async def _respond(self, scope: Scope, send: Send) -> None:
+        headers = Headers(scope=scope)
+        head_only = scope["method"] == "HEAD"
+
+        if self._not_modified(headers):
+            await send({"type": "http.response.start", "status": 304,
+                        "headers": [(k, v) for k, v in self.raw_headers if k != b"content-type"]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        try:
+            byte_range = self._range(headers)
+        except ValueError:
+            await send({"type": "http.response.start", "status": 416,
+                        "headers": [(b"content-range", f"bytes */{self.size}".encode())]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end = byte_range or (0, self.size)
+        status = 206 if byte_range else 200
+        self.headers["content-length"] = str(end - start)
+        if byte_range:
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{self.size}"
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+
+        if head_only or start == end:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            await send({"type": "http.response.zerocopysend", "file": self.fd,
+                        "offset": start, "count": end - start})
+        else:
+            await self._send_chunks(send, start, end)
+
+    async def _send_chunks(self, send: Send, start: int, end: int):
+        while start < end:
+            chunk = await anyio.to_thread.run_sync(os.pread, self.fd, min(CHUNK_SIZE, end - start), start)
+            if not chunk:
+                raise RuntimeError("asset file is shorter than expected")
+            start += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": start < end})
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from ..database import get_db
 from ..models import Asset, AssetMetadata, InboxItem, Facets, FacetItem
 import uuid
 from datetime import datetime
 from .endpoints import assets, gtm_plays, metadata, settings, notes
+from ..services.asset_processing import asset_processing
 
 router = APIRouter()
 router.include_router(assets.router, prefix="/assets", tags=["assets"])
@@ -56,11 +59,19 @@ async def get_inbox():
     return INBOX
 
 @router.post("/extract")
-async def extract_metadata(file: UploadFile = File(...)):
-    # Mock extraction
+async def extract_metadata(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
+    """
+    Prefill for the upload form from the file itself (markdown, text, PDF,
+    DOCX, PPTX). Parsed in a worker process and cached by content hash.
+    """
+    extracted = await asset_processing.extract_upload(db, file) or {}
     return {
-        "title": file.filename,
-        "summary": "Extracted summary from " + file.filename,
+        "title": extracted.get("title") or file.filename,
+        "summary": extracted.get("summary") or "",
         "type": "template",
-        "category": "technical"
+        "category": "technical",
+        "format": extracted.get("format"),
+        "page_count": extracted.get("page_count"),
+        "word_count": extracted.get("word_count"),
+        "error": extracted.get("error"),
     }
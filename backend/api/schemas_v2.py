@@ -2,13 +2,12 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 
-# --- Base Models ---
+from ..models import (
+    AssetCreate, AssetLink, BulkImportResult, BulkImportRowIssue, OpportunityInput, PersonBase, PersonCreate,
+    PlayCreate, PlayStageDefinition
+)
 
-class AssetLink(BaseModel):
-    id: str
-    title: str
-    url: str
-    type: str # 'preview' | 'source' | 'reference' | 'other'
+# --- Base Models ---
 
 class Asset(BaseModel):
     id: str
@@ -29,27 +28,11 @@ class Asset(BaseModel):
     technologies: Optional[List[str]] = []
     linked_opportunity_ids: Optional[List[str]] = []
     linked_asset_ids: Optional[List[str]] = []
+    thumbnail_url: Optional[str] = None
     
     class Config:
         from_attributes = True
 
-class AssetCreate(BaseModel):
-    title: str
-    description: Optional[str] = None
-    kind: str = 'other'
-    uri: Optional[str] = None
-    purpose: Optional[str] = None
-    default_stage: Optional[str] = None
-    collections: Optional[List[str]] = []
-    offerings: Optional[List[str]] = []
-    linked_play_ids: Optional[List[str]] = []
-    tags: List[str] = []
-    owners: Optional[List[str]] = []
-    technologies: Optional[List[str]] = []
-    links: Optional[List[AssetLink]] = []
-    linked_opportunity_ids: Optional[List[str]] = []
-    linked_asset_ids: Optional[List[str]] = []
-
 class AssetUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -67,20 +50,11 @@ class AssetUpdate(BaseModel):
     linked_opportunity_ids: Optional[List[str]] = None
     linked_asset_ids: Optional[List[str]] = None
 
-
-class PersonBase(BaseModel):
-    name: str
-    email: str
-    role: Optional[str] = None
-    technologies: List[str] = []
-
-class PersonCreate(PersonBase):
-    pass
-
 class PersonUpdate(BaseModel):
     name: Optional[str] = None
     email: Optional[str] = None
     role: Optional[str] = None
+    region: Optional[str] = None
     technologies: Optional[List[str]] = None
 
 class Person(PersonBase):
@@ -89,14 +63,6 @@ class Person(PersonBase):
     class Config:
         from_attributes = True
 
-
-class PlayStageDefinition(BaseModel):
-    key: str
-    label: str
-    objective: str
-    guidance: str
-    checklist_items: List[str]
-
 class Play(BaseModel):
     id: Union[str, int] # V1 uses int, V2 uses string. We'll handle both.
     title: str
@@ -116,20 +82,6 @@ class Play(BaseModel):
     class Config:
         from_attributes = True
 
-class PlayCreate(BaseModel):
-    title: str
-    summary: Optional[str] = None
-    offering: Optional[str] = None
-    technologies: List[str] = []
-    stage_scope: Optional[List[str]] = []
-    stages: Optional[List[PlayStageDefinition]] = []
-    sector: Optional[str] = None
-    geo: Optional[str] = None
-    tags: List[str] = []
-    owners: Optional[List[str]] = []
-    collections: Optional[List[str]] = []
-    default_team_members: Optional[List[str]] = []
-
 class Dictionary(BaseModel):
     offerings: List[str]
     technologies: List[str]
@@ -181,6 +133,7 @@ class OpportunityStageInstance(BaseModel):
     custom_checklist_items: Optional[List[Dict[str, Any]]] = []
     risk_flags: Optional[List[str]] = []
     notes: List[StageNote] = []
+    version: int = 1
     
     class Config:
         from_attributes = True
@@ -193,6 +146,14 @@ class StageUpdate(BaseModel):
     start_date: Optional[datetime] = None
     target_date: Optional[datetime] = None
     completed_date: Optional[datetime] = None
+    expected_version: Optional[int] = None # If set, the update is rejected with 409 unless it matches
+
+class StageBatchItem(StageUpdate):
+    play_id: Union[str, int] # GTM Play ID, as in the single-stage PATCH URL
+    stage_key: str
+
+class StageBatchUpdate(BaseModel):
+    updates: List[StageBatchItem]
 
 class OpportunityPlay(BaseModel):
     id: str
@@ -236,19 +197,6 @@ class Opportunity(BaseModel):
     class Config:
         from_attributes = True
 
-class OpportunityInput(BaseModel):
-    sector: str
-    offering: str
-    stage: str
-    technologies: List[str]
-    geo: str
-    tags: List[str]
-    notes: str
-    plays: Optional[List[str]] = []
-    name: Optional[str] = None
-    account_name: Optional[str] = None
-    team_member_user_ids: Optional[List[str]] = []
-
 class OpportunityUpdate(BaseModel):
     sector: Optional[str] = None
     offering: Optional[str] = None
@@ -261,3 +209,196 @@ class OpportunityUpdate(BaseModel):
     name: Optional[str] = None
     account_name: Optional[str] = None
     team_member_user_ids: Optional[List[str]] = None
+
+# --- Recommendations ---
+
+class AssetRecommendation(BaseModel):
+    asset: Asset
+    score: float
+    matched_features: List[str] = []
+
+class SimilarAsset(BaseModel):
+    asset: Asset
+    score: float
+
+# --- Duplicates ---
+
+class DuplicateAssetRef(BaseModel):
+    id: str
+    title: Optional[str] = None
+
+class DuplicatePair(BaseModel):
+    asset_id: str
+    other_asset_id: str
+    similarity: float
+
+class DuplicateCluster(BaseModel):
+    assets: List[DuplicateAssetRef]
+    similarity: float
+    pairs: List[DuplicatePair] = []
+
+class DuplicateReport(BaseModel):
+    status: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    signatures_updated: int = 0
+    assets_scanned: int = 0
+    threshold: float
+    error: Optional[str] = None
+    clusters: List[DuplicateCluster] = []
+
+# --- Staffing ---
+
+class StaffingCandidate(BaseModel):
+    person: Person
+    coverage: float
+    matched_technologies: List[str] = []
+    missing_technologies: List[str] = []
+
+# --- Workload ---
+
+class UpcomingStage(BaseModel):
+    opportunity_id: str
+    opportunity_name: str
+    play_id: str
+    stage_key: str
+    target_date: datetime
+
+class PersonWorkload(BaseModel):
+    person_id: str
+    name: Optional[str] = None
+    active_opportunities: int = 0
+    as_sales_owner: int = 0
+    as_technical_lead: int = 0
+    as_team_member: int = 0
+    open_stage_instances: int = 0
+    overdue_stage_instances: int = 0
+    upcoming: List[UpcomingStage] = []
+
+# --- Uploads ---
+
+class UploadProgress(BaseModel):
+    upload_id: str
+    filename: Optional[str] = None
+    status: str
+    total_bytes: Optional[int] = None
+    transferred_bytes: int = 0
+    retries: int = 0
+    error: Optional[str] = None
+    updated_at: datetime
+
+class DirectUploadRequest(BaseModel):
+    filename: str
+    content_type: Optional[str] = None
+    size: int
+
+class DirectUploadPart(BaseModel):
+    part_number: int
+    url: str
+
+class DirectUploadPlan(BaseModel):
+    token: str
+    key: str
+    method: str  # "post" or "multipart"
+    expires_at: int
+    post_url: Optional[str] = None
+    post_fields: Dict[str, str] = {}
+    part_size: Optional[int] = None
+    parts: List[DirectUploadPart] = []
+
+class CompletedPart(BaseModel):
+    part_number: int
+    etag: str
+
+class DirectUploadComplete(BaseModel):
+    token: str
+    etag: Optional[str] = None  # ETag header from the POST response
+    parts: List[CompletedPart] = []
+    asset: AssetCreate
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: Optional[str] = None
+    size: int
+
+class UploadSession(BaseModel):
+    id: str
+    filename: str
+    size: int
+    offset: int
+    chunk_size: int  # S3 sessions need exactly this much per PUT, bar the last
+    expires_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class UploadSessionComplete(BaseModel):
+    asset: AssetCreate
+
+class StorageMigrationError(BaseModel):
+    key: str
+    error: str
+
+class StorageMigrationReport(BaseModel):
+    status: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    total_files: int = 0
+    migrated_files: int = 0
+    already_present: int = 0
+    failed_files: int = 0
+    remaining_files: int = 0
+    bytes_transferred: int = 0
+    bytes_per_second: float = 0.0
+    error: Optional[str] = None
+    errors: List[StorageMigrationError] = []
+
+class BlobGCStats(BaseModel):
+    scanned: int = 0
+    orphans: int = 0
+    deleted: int = 0
+    reclaimed_bytes: int = 0
+
+class BlobGCReport(BlobGCStats):
+    status: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    dry_run: bool = False
+    grace_hours: float = 0.0
+    error: Optional[str] = None
+    providers: Dict[str, BlobGCStats] = {}
+
+class AssetText(BaseModel):
+    content_hash: str
+    format: Optional[str] = None
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    text: Optional[str] = None
+    page_count: Optional[int] = None
+    word_count: Optional[int] = None
+    error: Optional[str] = None
+    extracted_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class AssetPreview(BaseModel):
+    status: str # pending | ready | failed | unsupported
+    kind: Optional[str] = None # image | pdf | office | text
+    thumbnail_url: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    snippet: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+class TocEntry(BaseModel):
+    level: int
+    id: str # anchor of the heading in html
+    title: str
+
+class RenderedMarkdown(BaseModel):
+    content_hash: Optional[str] = None
+    html: str
+    toc: List[TocEntry] = []
+    title: Optional[str] = None
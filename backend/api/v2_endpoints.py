@@ -1,21 +1,47 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Query, Header, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
-from typing import List, Dict
+from sqlalchemy import update, func, cast, literal, JSON, String
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import List, Dict, Optional
 from ..database import get_db
 from ..models_db import (
     AssetModel, GTMPlayModel, OpportunityModel, OpportunityPlayModel, 
     OpportunityStageInstanceModel, TagModel, OfferingModel, TechnologyModel, 
-    SectorModel, GeoModel, StageModel, StageNoteModel, PersonModel
+    SectorModel, GeoModel, StageModel, StageNoteModel, PersonModel, ExtractedTextModel, AssetPreviewModel
 )
 from .schemas_v2 import (
-    Dictionary, Play, Asset, AssetCreate, Opportunity, OpportunityInput, OpportunityPlay, PlayCreate, StageUpdate, OpportunityStageInstance, OpportunityUpdate, AssetUpdate, StageNote, StageNoteCreate,
-    Person, PersonCreate, PersonUpdate
+    Dictionary, Play, Asset, AssetCreate, Opportunity, OpportunityInput, OpportunityPlay, PlayCreate, StageUpdate, OpportunityStageInstance, OpportunityUpdate, AssetUpdate, StageNote, StageNoteCreate, StageBatchUpdate,
+    Person, PersonCreate, PersonUpdate, BulkImportResult, AssetLink, AssetRecommendation, SimilarAsset, DuplicateReport,
+    StaffingCandidate, PersonWorkload, UploadProgress, DirectUploadRequest, DirectUploadPlan, DirectUploadComplete,
+    UploadSessionCreate, UploadSession, UploadSessionComplete, StorageMigrationReport, BlobGCReport, AssetText, AssetPreview,
+    RenderedMarkdown
 )
+from ..services.play_index import play_index
+from ..services.play_stages import populate_stages_from_scope
+from ..services.asset_recommender import asset_recommender
+from ..services.similarity_index import similarity_index
+from ..services.duplicate_detector import duplicate_detector, DUPLICATE_THRESHOLD
+from ..services.skill_index import skill_index
+from ..services.workload import sync_opportunity_members, clear_opportunity_members, get_workload
+from ..services.upload_progress import upload_progress
+from ..services import blob_store, direct_upload
+from ..services.resumable_upload import resumable_uploads
+from ..services.storage_migration import storage_migration
+from ..services.blob_gc import blob_gc
+from ..services.asset_processing import asset_processing
+from ..services.preview_worker import preview_worker
+from ..services.markdown_cache import markdown_cache, MarkdownTooLarge
+from ..services import markdown_render, text_extraction
+from ..services.storage import storage
+from ..services.s3_storage import MB
+from .responses import AssetFileResponse, open_file
+from fastapi.responses import RedirectResponse, Response
 import uuid
+import json
 
 router = APIRouter(prefix="/api/v2", tags=["v2"])
 
@@ -154,6 +180,7 @@ async def delete_play(play_id: str, db: AsyncSession = Depends(get_db)):
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    play_index.remove(pid)
     return {"status": "success", "message": "Play deleted"}
 
 @router.put("/plays/{play_id}", response_model=Play)
@@ -186,7 +213,7 @@ async def update_play(play_id: str, play_update: PlayCreate, db: AsyncSession =
     # Auto-populate stages if missing but scope is provided
     final_stages = [s.dict() for s in play_update.stages] if play_update.stages else []
     if not final_stages and play_update.stage_scope:
-        final_stages = _populate_stages_from_scope(play_update.stage_scope)
+        final_stages = populate_stages_from_scope(play_update.stage_scope)
         
     db_play.stages = final_stages
     db_play.owners = play_update.owners
@@ -217,6 +244,7 @@ async def update_play(play_id: str, play_update: PlayCreate, db: AsyncSession =
 
     await db.commit()
     await db.refresh(db_play)
+    play_index.upsert_play(db_play)
     
     return Play(
         id=str(db_play.id),
@@ -245,6 +273,7 @@ async def get_assets(db: AsyncSession = Depends(get_db)):
     )
     result = await db.execute(stmt)
     assets = result.scalars().all()
+    thumbnails = await _thumbnail_urls(db, [a.content_hash for a in assets])
     
     result_list = []
     for a in assets:
@@ -260,12 +289,25 @@ async def get_assets(db: AsyncSession = Depends(get_db)):
             owners=a.owners or [],
             created_at=a.created_at,
             updated_at=a.updated_at,
-            technologies=[] 
+            technologies=[],
+            thumbnail_url=thumbnails.get(a.content_hash)
         ))
     return result_list
 
-@router.post("/assets", response_model=Asset)
-async def create_asset(asset: AssetCreate, db: AsyncSession = Depends(get_db)):
+async def _thumbnail_urls(db: AsyncSession, digests: List[Optional[str]]) -> Dict[str, str]:
+    """Preview image URL per content hash, for those that have one."""
+    digests = [d for d in set(digests) if d]
+    if not digests:
+        return {}
+    result = await db.execute(
+        select(AssetPreviewModel.content_hash).where(
+            AssetPreviewModel.content_hash.in_(digests),
+            AssetPreviewModel.thumbnail_key.isnot(None),
+        )
+    )
+    return {d: f"/api/v2/previews/{d}" for d in result.scalars().all()}
+
+async def _create_asset(db: AsyncSession, asset: AssetCreate, **file_fields) -> Asset:
     db_asset = AssetModel(
         id=str(uuid.uuid4()),
         title=asset.title,
@@ -275,18 +317,21 @@ async def create_asset(asset: AssetCreate, db: AsyncSession = Depends(get_db)):
         default_stage=asset.default_stage,
         uri=asset.uri,
         owners=asset.owners,
-        original_filename="placeholder", 
-        file_path=f"placeholder_{uuid.uuid4()}",
+        original_filename=file_fields.pop("original_filename", "placeholder"),
+        file_path=file_fields.pop("file_path", f"placeholder_{uuid.uuid4()}"),
         links=[l.dict() for l in asset.links] if asset.links else [],
         linked_opportunity_ids=asset.linked_opportunity_ids,
         linked_asset_ids=asset.linked_asset_ids,
         offerings=asset.offerings,
         linked_play_ids=asset.linked_play_ids,
-        technologies=asset.technologies
+        technologies=asset.technologies,
+        **file_fields
     )
     db.add(db_asset)
     await db.commit()
     await db.refresh(db_asset)
+    await asset_recommender.refresh_asset(db, db_asset.id)
+    await similarity_index.index_asset(db, db_asset.id)
     return Asset(
             id=db_asset.id,
             title=db_asset.title,
@@ -307,6 +352,10 @@ async def create_asset(asset: AssetCreate, db: AsyncSession = Depends(get_db)):
             technologies=db_asset.technologies or []
         )
 
+@router.post("/assets", response_model=Asset)
+async def create_asset(asset: AssetCreate, db: AsyncSession = Depends(get_db)):
+    return await _create_asset(db, asset)
+
 @router.get("/assets/{asset_id}", response_model=Asset)
 async def get_asset(asset_id: str, db: AsyncSession = Depends(get_db)):
     from sqlalchemy.orm import selectinload
@@ -337,9 +386,133 @@ async def get_asset(asset_id: str, db: AsyncSession = Depends(get_db)):
         linked_asset_ids=asset.linked_asset_ids or [],
         offerings=asset.offerings or [],
         linked_play_ids=asset.linked_play_ids or [],
-        technologies=asset.technologies or []
+        technologies=asset.technologies or [],
+        thumbnail_url=(await _thumbnail_urls(db, [asset.content_hash])).get(asset.content_hash)
+    )
+
+@router.get("/assets/{asset_id}/similar", response_model=List[SimilarAsset])
+async def get_similar_assets(asset_id: str, limit: int = 10, db: AsyncSession = Depends(get_db)):
+    """Assets with the most similar title, description and metadata text (cosine over TF-IDF vectors)."""
+    await similarity_index.ensure_ready(db)
+    ranked = await similarity_index.similar_async(asset_id, max(1, min(limit, 100)))
+    if ranked is None:
+        # Not indexed yet, e.g. written before the index existed
+        if not await similarity_index.index_asset(db, asset_id):
+            raise HTTPException(status_code=404, detail="Asset not found")
+        ranked = await similarity_index.similar_async(asset_id, max(1, min(limit, 100)))
+    if not ranked:
+        return []
+
+    result = await db.execute(
+        select(AssetModel).options(selectinload(AssetModel.tags)).filter(AssetModel.id.in_([r[0] for r in ranked]))
+    )
+    assets = {a.id: a for a in result.scalars().all()}
+    return [
+        SimilarAsset(asset=_asset_schema(assets[other_id]), score=round(score, 4))
+        for other_id, score in ranked
+        if other_id in assets
+    ]
+
+@router.get("/assets/{asset_id}/preview", response_model=AssetPreview)
+async def get_asset_preview(asset_id: str, db: AsyncSession = Depends(get_db)):
+    """Thumbnail and/or text snippet for the asset's file, once the preview worker has made one."""
+    result = await db.execute(
+        select(AssetModel.content_hash, AssetPreviewModel)
+        .outerjoin(AssetPreviewModel, AssetPreviewModel.content_hash == AssetModel.content_hash)
+        .where(AssetModel.id == asset_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    preview = row[1]
+    if preview is None:
+        raise HTTPException(status_code=404, detail="No preview for this asset")
+    return AssetPreview(
+        status=preview.status,
+        kind=preview.kind,
+        thumbnail_url=f"/api/v2/previews/{preview.content_hash}" if preview.thumbnail_key else None,
+        width=preview.width,
+        height=preview.height,
+        snippet=preview.snippet,
+        attempts=preview.attempts,
+        error=preview.error,
     )
 
+# Preview URLs are per content hash, so the bytes behind one never change
+PREVIEW_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/previews/{content_hash}")
+async def get_preview_image(content_hash: str, db: AsyncSession = Depends(get_db)):
+    preview = await db.get(AssetPreviewModel, content_hash)
+    if preview is None or not preview.thumbnail_key:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    local_path = await storage.local_file(preview.thumbnail_key, provider=preview.storage_provider)
+    remote = (preview.storage_provider or storage.active_provider) == "s3"
+    opened = None
+    if local_path is not None:
+        try:
+            opened = await open_file(local_path)
+        except FileNotFoundError:
+            if not remote:
+                raise HTTPException(status_code=404, detail="Preview file not found")
+            # Evicted from the disk cache since the lookup
+    if opened is None:
+        url = await storage.get_url(preview.thumbnail_key, provider=preview.storage_provider)
+        if not url:
+            raise HTTPException(status_code=502, detail="Could not sign a preview URL")
+        # The presigned URL expires, so only the redirect's target is long-lived
+        return RedirectResponse(url, status_code=302, headers={"cache-control": "private, max-age=300"})
+    fd, stat_result = opened
+    return AssetFileResponse(fd, stat_result, f'"{content_hash}"', media_type="image/webp",
+                             cache_control=PREVIEW_CACHE_CONTROL)
+
+@router.get("/assets/{asset_id}/rendered", response_model=RenderedMarkdown)
+async def get_rendered_markdown(
+    asset_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Sanitized HTML and table of contents for a markdown asset, cached by content hash."""
+    asset = await db.get(AssetModel, asset_id)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if text_extraction.detect_format(asset.original_filename, asset.mime_type) != "markdown":
+        raise HTTPException(status_code=400, detail="Asset is not markdown")
+    etag = None
+    if asset.content_hash:
+        etag = f'"{asset.content_hash}-md{markdown_render.RENDER_VERSION}"'
+        if if_none_match and etag in {t.strip().removeprefix("W/") for t in if_none_match.split(",")}:
+            return Response(status_code=304, headers={"etag": etag})
+    try:
+        rendered = await markdown_cache.render(asset)
+    except MarkdownTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except markdown_render.RendererUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if etag:
+        # Revalidate every time: the same asset id gets new content on update
+        response.headers["etag"] = etag
+        response.headers["cache-control"] = "private, no-cache"
+    return RenderedMarkdown(content_hash=asset.content_hash, **rendered)
+
+@router.get("/assets/{asset_id}/text", response_model=AssetText)
+async def get_asset_text(asset_id: str, db: AsyncSession = Depends(get_db)):
+    """Text extracted from the asset's file. 404 until extraction has run (or for formats we don't read)."""
+    result = await db.execute(
+        select(AssetModel.content_hash, ExtractedTextModel)
+        .outerjoin(ExtractedTextModel, ExtractedTextModel.content_hash == AssetModel.content_hash)
+        .where(AssetModel.id == asset_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if row[1] is None:
+        raise HTTPException(status_code=404, detail="No extracted text for this asset")
+    return row[1]
+
 @router.delete("/assets/{asset_id}")
 async def delete_asset(asset_id: str, db: AsyncSession = Depends(get_db)):
     stmt = select(AssetModel).filter(AssetModel.id == asset_id)
@@ -349,13 +522,18 @@ async def delete_asset(asset_id: str, db: AsyncSession = Depends(get_db)):
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
         
+    file_path = asset.file_path
     await db.delete(asset)
     await db.commit()
+    await blob_store.release(db, [file_path])
+    asset_recommender.remove(asset_id)
+    await similarity_index.discard(asset_id)
     return {"status": "success", "message": "Asset deleted"}
 
 @router.put("/assets/{asset_id}", response_model=Asset)
 async def update_asset(
     asset_id: str, 
+    background_tasks: BackgroundTasks,
     metadata_json: str = Form(...),
     file: UploadFile = File(None),
     db: AsyncSession = Depends(get_db)
@@ -386,15 +564,28 @@ async def update_asset(
     if asset_update.technologies is not None: db_asset.technologies = asset_update.technologies
     if asset_update.links is not None: db_asset.links = [l.dict() for l in asset_update.links]
     
-    # Handle file update if provided (simple mock or overwrite for now as we don't have full storage service in this context)
+    replaced_path = replaced_hash = None
     if file:
-        # In a real scenario, we'd delete old file and save new one
-        # For now, just updating the filename to simulate
+        blob = await blob_store.store_upload(file)
+        if db_asset.file_path != blob.key:
+            replaced_path, replaced_hash = db_asset.file_path, db_asset.content_hash
         db_asset.original_filename = file.filename
-        # db_asset.file_path = ...
+        db_asset.file_path = blob.key
+        db_asset.content_hash = blob.digest
+        db_asset.storage_provider = storage.active_provider
+        db_asset.mime_type = file.content_type
+        db_asset.size_bytes = blob.size
     
     await db.commit()
     await db.refresh(db_asset)
+    if replaced_path:
+        await blob_store.release(db, [replaced_path])
+        await markdown_cache.invalidate(db, [replaced_hash])
+    if file:
+        background_tasks.add_task(asset_processing.process, db.bind, [db_asset.id])
+        background_tasks.add_task(preview_worker.process, db.bind, [db_asset.id])
+    await asset_recommender.refresh_asset(db, db_asset.id)
+    await similarity_index.index_asset(db, db_asset.id)
     
     return Asset(
         id=db_asset.id,
@@ -513,6 +704,7 @@ async def create_opportunity(input: OpportunityInput, db: AsyncSession = Depends
                     current_members.update(play.default_team_members)
                     opp.team_member_user_ids = list(current_members)
     
+    await sync_opportunity_members(db, [opp.id])
     await db.commit()
     
     # Re-fetch the opportunity to ensure everything is loaded and fresh
@@ -543,6 +735,7 @@ async def delete_opportunity(opp_id: str, db: AsyncSession = Depends(get_db)):
     if not opp:
         raise HTTPException(status_code=404, detail="Opportunity not found")
         
+    await clear_opportunity_members(db, opp_id)
     await db.delete(opp)
     await db.commit()
     return {"status": "success", "message": "Opportunity deleted"}
@@ -611,14 +804,52 @@ async def update_opportunity(opp_id: str, opp_update: OpportunityUpdate, db: Asy
                     current_members.update(play.default_team_members)
                     opp.team_member_user_ids = list(current_members)
         
+    await sync_opportunity_members(db, [opp.id])
     await db.commit()
     await db.refresh(opp)
+    # Moving to Closed Won boosts the assets linked to this opportunity
+    await asset_recommender.refresh_opportunity(db, opp.id)
     
     if opp.team_member_user_ids is None:
         opp.team_member_user_ids = []
     
     return opp
 
+STAGE_UPDATE_FIELDS = ("status", "summary_note", "custom_checklist_items", "start_date", "target_date", "completed_date")
+
+def _stage_update_changes(current: Dict, update_data: StageUpdate) -> bool:
+    """True if applying update_data to a stage instance row would change anything."""
+    for field in STAGE_UPDATE_FIELDS:
+        value = getattr(update_data, field)
+        if value is not None and current[field] != value:
+            return True
+    items = current["checklist_item_statuses"] or {}
+    return any(items.get(key) != value for key, value in (update_data.checklist_item_statuses or {}).items())
+
+def _stage_update_values(db: AsyncSession, update_data: StageUpdate) -> Dict:
+    """Column values for an UPDATE of one stage instance; the checklist is merged server-side."""
+    stages = OpportunityStageInstanceModel.__table__
+    values = {
+        field: getattr(update_data, field)
+        for field in STAGE_UPDATE_FIELDS
+        if getattr(update_data, field) is not None
+    }
+    if update_data.checklist_item_statuses is not None:
+        values["checklist_item_statuses"] = _merged_checklist(db, stages.c.checklist_item_statuses, update_data.checklist_item_statuses)
+    values["version"] = stages.c.version + 1
+    return values
+
+def _merged_checklist(db: AsyncSession, column, patch: Dict[str, str]):
+    """Server-side merge of checklist_item_statuses with a partial update."""
+    # SQLite's json_patch deletes keys set to null while Postgres' || keeps them;
+    # drop nulls so both dialects merge the same way.
+    patch = {key: value for key, value in patch.items() if value is not None}
+    if db.bind.dialect.name == "sqlite":
+        return func.json_patch(func.coalesce(column, literal('{}', String)), literal(json.dumps(patch), String))
+    # Column is JSON; the || merge operator is only defined for JSONB
+    merged = func.coalesce(cast(column, JSONB), literal({}, JSONB)).op('||')(literal(patch, JSONB))
+    return cast(merged, JSON)
+
 @router.patch("/opportunities/{opp_id}/play/{play_id}/stage/{stage_key}", response_model=OpportunityStageInstance)
 async def update_opportunity_stage(
     opp_id: str, 
@@ -627,68 +858,177 @@ async def update_opportunity_stage(
     update_data: StageUpdate, 
     db: AsyncSession = Depends(get_db)
 ):
-    # Find the OpportunityPlay
-    # Note: play_id in URL might be the GTM Play ID (int) or the OpportunityPlay ID (uuid).
-    # The UI typically knows the Play ID. Let's assume it's the GTM Play ID for now as that's what we used in the URL structure design.
-    # However, an opportunity can have multiple instances of the same play? 
-    # For V2, let's assume one instance of a play per opportunity for simplicity, OR we need the OpportunityPlay ID.
-    # Looking at the frontend, we have `activePlayId` which is the GTM Play ID.
-    # But `opportunity.opportunity_plays` has `play_id` (GTM Play ID) and `id` (OpportunityPlay ID).
-    # To be safe and support multiple same-plays, we should probably use OpportunityPlay ID, but the URL says `play_id`.
-    # Let's try to find the OpportunityPlay by (opp_id, play_id).
-    
-    stmt = select(OpportunityPlayModel).filter(
-        OpportunityPlayModel.opportunity_id == opp_id,
-        OpportunityPlayModel.play_id == int(play_id)
+    # play_id in the URL is the GTM Play ID; we assume one instance of a play per opportunity
+    # and target the stage instance of the first matching OpportunityPlay.
+    try:
+        pid = int(play_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Play ID format")
+        
+    stages = OpportunityStageInstanceModel.__table__
+    target_id = (
+        select(OpportunityStageInstanceModel.id)
+        .join(OpportunityPlayModel, OpportunityStageInstanceModel.opportunity_play_id == OpportunityPlayModel.id)
+        .filter(
+            OpportunityPlayModel.opportunity_id == opp_id,
+            OpportunityPlayModel.play_id == pid,
+            OpportunityStageInstanceModel.play_stage_key == stage_key
+        )
+        .limit(1)
+        .scalar_subquery()
     )
-    result = await db.execute(stmt)
-    opp_play = result.scalars().first()
     
-    if not opp_play:
-        raise HTTPException(status_code=404, detail="Opportunity Play not found")
-        
-    # Find the Stage Instance
-    # We need to load stage instances
-    await db.refresh(opp_play, attribute_names=['stage_instances'])
+    # Single UPDATE ... RETURNING: no read-modify-write, so concurrent editors
+    # can't drop each other's checklist ticks.
+    stmt = update(stages).where(stages.c.id == target_id)
+    if update_data.expected_version is not None:
+        stmt = stmt.where(stages.c.version == update_data.expected_version)
+    stmt = stmt.values(**_stage_update_values(db, update_data)).returning(*stages.c)
     
-    stage_instance = next((si for si in opp_play.stage_instances if si.play_stage_key == stage_key), None)
+    row = (await db.execute(stmt)).mappings().first()
     
-    if not stage_instance:
-        # If it doesn't exist (maybe added to play definition later), create it?
-        # For now, assume it exists as we create them on opp creation.
+    if row is None:
+        current = (await db.execute(select(OpportunityStageInstanceModel.version).filter(OpportunityStageInstanceModel.id == target_id))).scalar()
+        if current is not None:
+            raise HTTPException(status_code=409, detail=f"Stage Instance was modified concurrently (current version {current})")
         raise HTTPException(status_code=404, detail="Stage Instance not found")
         
-    # Update fields
-    if update_data.status is not None:
-        stage_instance.status = update_data.status
-    if update_data.summary_note is not None:
-        stage_instance.summary_note = update_data.summary_note
-    if update_data.checklist_item_statuses is not None:
-        # Merge or replace? Let's replace for simplicity, frontend sends full state.
-        # But wait, frontend might send partial updates? 
-        # Pydantic model has it as Optional. If sent, we replace.
-        # Ensure we don't lose existing keys if we want merge behavior, but usually full object replace is safer for sync.
-        # Actually, let's do a merge if it's a dict, to be safe? 
-        # No, let's trust the frontend to send what it wants to persist.
-        # However, JSON columns in SQLA sometimes need explicit reassignment to trigger change detection.
-        current = dict(stage_instance.checklist_item_statuses or {})
-        current.update(update_data.checklist_item_statuses)
-        stage_instance.checklist_item_statuses = current
+    notes = (await db.execute(
+        select(StageNoteModel).filter(StageNoteModel.stage_instance_id == row["id"]).order_by(StageNoteModel.created_at)
+    )).scalars().all()
+    
+    await db.commit()
+    
+    return OpportunityStageInstance(**row, notes=notes)
+
+@router.patch("/opportunities/{opp_id}/stages", response_model=List[OpportunityStageInstance])
+async def update_opportunity_stages(opp_id: str, batch: StageBatchUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Apply many stage-instance updates across the plays of one opportunity in a
+    single transaction. Returns only the instances that actually changed.
+    """
+    # One query for every stage instance of the opportunity, keyed by (GTM play id, stage key)
+    stages = OpportunityStageInstanceModel.__table__
+    result = await db.execute(
+        select(*stages.c, OpportunityPlayModel.play_id)
+        .join(OpportunityPlayModel, stages.c.opportunity_play_id == OpportunityPlayModel.id)
+        .filter(OpportunityPlayModel.opportunity_id == opp_id)
+    )
+    instances = {}
+    for row in result.mappings().all():
+        # Keep the first match, like the single-stage endpoint
+        instances.setdefault((row["play_id"], row["play_stage_key"]), row)
+        
+    targets = []
+    missing = []
+    for item in batch.updates:
+        try:
+            key = (int(item.play_id), item.stage_key)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid Play ID format: {item.play_id}")
+        if key in instances:
+            targets.append((instances[key]["id"], item))
+        else:
+            missing.append(f"{item.play_id}/{item.stage_key}")
+            
+    # All or nothing: reject the batch before touching anything
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Stage Instance not found: {', '.join(missing)}")
+        
+    current = {row["id"]: row for row in instances.values()}
+    stale = [
+        f"{item.play_id}/{item.stage_key}"
+        for target_id, item in targets
+        if item.expected_version is not None and current[target_id]["version"] != item.expected_version
+    ]
+    if stale:
+        raise HTTPException(status_code=409, detail=f"Stage Instance was modified concurrently: {', '.join(stale)}")
         
-    if update_data.custom_checklist_items is not None:
-        stage_instance.custom_checklist_items = update_data.custom_checklist_items
+    # Same server-side merge as the single-stage PATCH, so concurrent batches
+    # merge their checklist ticks instead of conflicting
+    changed = {}
+    for target_id, item in targets:
+        if not _stage_update_changes(current[target_id], item):
+            continue
+        stmt = update(stages).where(stages.c.id == target_id)
+        if item.expected_version is not None:
+            # The version we checked, advanced by our own earlier writes in this batch
+            stmt = stmt.where(stages.c.version == current[target_id]["version"])
+        row = (await db.execute(stmt.values(**_stage_update_values(db, item)).returning(*stages.c))).mappings().first()
+        if row is None:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail=f"Stage Instance was modified concurrently: {item.play_id}/{item.stage_key}")
+        current[target_id] = changed[target_id] = row
+        
+    if not changed:
+        return []
         
-    if update_data.start_date is not None:
-        stage_instance.start_date = update_data.start_date
-    if update_data.target_date is not None:
-        stage_instance.target_date = update_data.target_date
-    if update_data.completed_date is not None:
-        stage_instance.completed_date = update_data.completed_date
+    notes = {}
+    for note in (await db.execute(
+        select(StageNoteModel).filter(StageNoteModel.stage_instance_id.in_(list(changed))).order_by(StageNoteModel.created_at)
+    )).scalars().all():
+        notes.setdefault(note.stage_instance_id, []).append(note)
         
     await db.commit()
-    await db.refresh(stage_instance)
     
-    return stage_instance
+    return [OpportunityStageInstance(**row, notes=notes.get(stage_id, [])) for stage_id, row in changed.items()]
+
+def _asset_schema(a: AssetModel) -> Asset:
+    return Asset(
+        id=a.id,
+        title=a.title,
+        description=a.description,
+        kind=a.kind,
+        uri=a.uri or f"/assets/{a.file_path}",
+        purpose=a.purpose,
+        default_stage=a.default_stage,
+        tags=[t.name for t in a.tags],
+        owners=a.owners or [],
+        created_at=a.created_at,
+        updated_at=a.updated_at,
+        links=[AssetLink(**l) for l in a.links] if a.links else [],
+        linked_opportunity_ids=a.linked_opportunity_ids or [],
+        linked_asset_ids=a.linked_asset_ids or [],
+        offerings=a.offerings or [],
+        linked_play_ids=a.linked_play_ids or [],
+        technologies=a.technologies or []
+    )
+
+@router.get("/opportunities/{opp_id}/play/{play_id}/stage/{stage_key}/recommendations", response_model=List[AssetRecommendation])
+async def recommend_stage_assets(
+    opp_id: str,
+    play_id: str,
+    stage_key: str,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db)
+):
+    """Assets ranked for one stage instance by stage, play, technology, offering and tag overlap."""
+    try:
+        pid = int(play_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Play ID format")
+
+    await asset_recommender.ensure_loaded(db)
+    context = await asset_recommender.stage_context(db, opp_id, pid, stage_key)
+    if context is None:
+        raise HTTPException(status_code=404, detail="Stage Instance not found")
+
+    ranked = asset_recommender.recommend(context, limit=max(1, min(limit, 100)))
+    if not ranked:
+        return []
+
+    result = await db.execute(
+        select(AssetModel).options(selectinload(AssetModel.tags)).filter(AssetModel.id.in_([r[0] for r in ranked]))
+    )
+    assets = {a.id: a for a in result.scalars().all()}
+
+    # An asset may have been deleted by another worker since the last reload
+    return [
+        AssetRecommendation(asset=_asset_schema(assets[asset_id]), score=round(score, 4), matched_features=matched)
+        for asset_id, score, matched in ranked
+        if asset_id in assets
+    ]
+
 @router.post("/plays", response_model=Play)
 async def create_play(play: PlayCreate, db: AsyncSession = Depends(get_db)):
     # Create DB model
@@ -700,7 +1040,7 @@ async def create_play(play: PlayCreate, db: AsyncSession = Depends(get_db)):
         geo=play.geo,
         stage_scope=play.stage_scope,
 
-        stages=[s.dict() for s in play.stages] if play.stages else _populate_stages_from_scope(play.stage_scope),
+        stages=[s.dict() for s in play.stages] if play.stages else populate_stages_from_scope(play.stage_scope),
         owners=play.owners,
         collections=play.collections,
         default_team_members=play.default_team_members
@@ -740,6 +1080,7 @@ async def create_play(play: PlayCreate, db: AsyncSession = Depends(get_db)):
         .filter(GTMPlayModel.id == db_play.id)
     )
     db_play = result.scalars().first()
+    play_index.upsert_play(db_play)
     
     # Return schema
     return Play(
@@ -871,99 +1212,95 @@ async def map_offering_technology(offering: str, technology: str, action: str =
     await db.commit()
     return {"status": "success", "message": f"{action}ed {offering} to/from {technology}"}
 
-# --- Constants ---
-
-DEFAULT_STAGES = [
-    {
-        "key": "Discovery",
-        "label": "Discovery",
-        "objective": "Understand the client's current landscape and business drivers.",
-        "guidance": "Focus on open-ended questions. Identify the key stakeholders and the budget holder. Don't pitch solution yet.",
-        "checklist_items": ["Identify Executive Sponsor", "Map current technical landscape", "Define success criteria"]
-    },
-    {
-        "key": "Qualification",
-        "label": "Qualification",
-        "objective": "Confirm budget, authority, need, and timeline (BANT).",
-        "guidance": "Use the TCO calculator to establish a baseline. Ensure technical fit.",
-        "checklist_items": ["Verify budget allocation", "Confirm technical feasibility", "Sign NDA"]
-    },
-    {
-        "key": "Solutioning",
-        "label": "Solutioning",
-        "objective": "Design the technical architecture and migration plan.",
-        "guidance": "Collaborate with the client's architects. Use the standard Reference Architectures.",
-        "checklist_items": ["Draft HLD", "Review with Practice Lead", "Present initial solution"]
-    },
-    {
-        "key": "Validation",
-        "label": "Validation",
-        "objective": "Prove the solution works via POC or deep dive.",
-        "guidance": "Keep scope small and time-boxed.",
-        "checklist_items": ["Execute POC", "Sign off on success criteria"]
-    },
-    {
-        "key": "Closing",
-        "label": "Closing",
-        "objective": "Finalize commercial and legal terms.",
-        "guidance": "Ensure all stakeholders are aligned. Review SOW details.",
-        "checklist_items": ["Finalize commercial proposal", "Legal review", "Sign contract"]
-    },
-    {
-        "key": "Delivery",
-        "label": "Delivery",
-        "objective": "Handover to delivery team for implementation.",
-        "guidance": "Ensure all documentation is up to date in the repository.",
-        "checklist_items": ["Conduct handover workshop", "Finalize SOW"]
-    }
-]
 
-def _populate_stages_from_scope(stage_scope: List[str], existing_stages: List[Dict] = None) -> List[Dict]:
-    """Helper to populate detailed stage definitions from a list of stage keys."""
-    if existing_stages and len(existing_stages) > 0:
-        return existing_stages
-        
-    if not stage_scope:
-        return []
-        
-    result_stages = []
-    # Filter DEFAULT_STAGES based on scope match
-    for default in DEFAULT_STAGES:
-        if default["key"] in stage_scope:
-            result_stages.append(default)
-            
-    # If a scope item is not in defaults, create a generic one
-    existing_keys = [s["key"] for s in result_stages]
-    for scope_item in stage_scope:
-        if scope_item not in existing_keys:
-            result_stages.append({
-                "key": scope_item,
-                "label": scope_item,
-                "objective": f"Complete the {scope_item} stage.",
-                "guidance": "No specific guidance available.",
-                "checklist_items": ["Complete key deliverables"]
-            })
-            
-    # Sort according to stage_scope order? Or keep default order?
-    # Let's sort by stage_scope order to respect user selection order if possible, 
-    # but stage_scope usually comes from multiselect which might be arbitrary. 
-    # Let's trust DEFAULT_STAGES order for standard ones, and append others.
-    return result_stages
+# --- Import ---
 
+@router.post("/admin/duplicates/scan", response_model=DuplicateReport, status_code=202)
+async def scan_duplicate_assets(
+    background_tasks: BackgroundTasks,
+    threshold: float = DUPLICATE_THRESHOLD,
+    db: AsyncSession = Depends(get_db)
+):
+    """Start a near-duplicate scan (MinHash + LSH) in the background. Poll GET /admin/duplicates for the result."""
+    if not 0 < threshold <= 1:
+        raise HTTPException(status_code=400, detail="threshold must be between 0 and 1")
+    if duplicate_detector.running:
+        raise HTTPException(status_code=409, detail="A duplicate scan is already running")
+    duplicate_detector.queue(threshold)
+    background_tasks.add_task(duplicate_detector.run_scan, db.bind, threshold)
+    return duplicate_detector.report()
 
+@router.get("/admin/duplicates", response_model=DuplicateReport)
+async def get_duplicate_assets():
+    return duplicate_detector.report()
 
-# --- Import ---
+@router.post("/admin/storage/migrate", response_model=StorageMigrationReport, status_code=202)
+async def migrate_storage(
+    background_tasks: BackgroundTasks,
+    concurrency: int = Query(4, ge=1, le=32),
+    max_mb_per_second: float = Query(0, ge=0),
+    delete_local: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Copy locally stored asset files to the S3 bucket in the background, after
+    switching storage_provider to s3. Safe to re-run; poll GET /admin/storage/migration.
+    max_mb_per_second caps total upload bandwidth (0 = unlimited).
+    """
+    if storage.s3_provider() is None:
+        raise HTTPException(status_code=409, detail="Switch storage_provider to s3 before migrating")
+    if storage_migration.running:
+        raise HTTPException(status_code=409, detail="A storage migration is already running")
+    storage_migration.queue()
+    background_tasks.add_task(storage_migration.run, db.bind, concurrency, max_mb_per_second * MB, delete_local)
+    return storage_migration.report()
+
+@router.get("/admin/storage/migration", response_model=StorageMigrationReport)
+async def get_storage_migration():
+    return storage_migration.report()
+
+@router.post("/admin/storage/migration/cancel", response_model=StorageMigrationReport)
+async def cancel_storage_migration():
+    """Stop after the files in flight; migrated files stay migrated."""
+    storage_migration.cancel()
+    return storage_migration.report()
+
+@router.post("/admin/storage/gc", response_model=BlobGCReport, status_code=202)
+async def collect_storage_garbage(
+    background_tasks: BackgroundTasks,
+    grace_hours: float = Query(24, ge=1),
+    dry_run: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete stored files no asset references and older than grace_hours, in the
+    background. dry_run only counts them. Poll GET /admin/storage/gc.
+    """
+    if blob_gc.running:
+        raise HTTPException(status_code=409, detail="Garbage collection is already running")
+    blob_gc.queue()
+    background_tasks.add_task(blob_gc.run, db.bind, grace_hours * 3600, dry_run)
+    return blob_gc.report()
+
+@router.get("/admin/storage/gc", response_model=BlobGCReport)
+async def get_storage_gc():
+    return blob_gc.report()
+
+@router.post("/admin/storage/gc/cancel", response_model=BlobGCReport)
+async def cancel_storage_gc():
+    blob_gc.cancel()
+    return blob_gc.report()
 
 @router.post("/admin/import/{type}")
 async def import_dictionary_items(
     type: str, 
     file: UploadFile = File(...), 
+    dry_run: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    import json
-    import yaml
     import csv
-    import io
+    import yaml
+    from ..services import dictionary_import
 
     model_map = {
         "offerings": OfferingModel,
@@ -979,95 +1316,57 @@ async def import_dictionary_items(
         
     Model = model_map[type]
     
-    content = await file.read()
-    filename = file.filename.lower()
-    
-    items_to_add = []
+    if not (file.filename or "").lower().endswith(dictionary_import.SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use JSON, YAML, CSV or NDJSON.")
     
+    # Parsing happens in the threadpool batch by batch and rows are written with
+    # INSERT ... ON CONFLICT, so large imports neither block the loop nor issue
+    # one existence check per item.
     try:
-        if filename.endswith('.json'):
-            data = json.loads(content)
-            if isinstance(data, list):
-                items_to_add = data
-            elif isinstance(data, dict) and 'items' in data:
-                items_to_add = data['items']
-            else:
-                raise ValueError("JSON must be a list or object with 'items' key")
-                
-        elif filename.endswith(('.yaml', '.yml')):
-            data = yaml.safe_load(content)
-            if isinstance(data, list):
-                items_to_add = data
-            elif isinstance(data, dict) and 'items' in data:
-                items_to_add = data['items']
-            else:
-                raise ValueError("YAML must be a list or object with 'items' key")
-                
-        elif filename.endswith('.csv'):
-            # Decode bytes to string
-            text_content = content.decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(text_content))
-            for row in csv_reader:
-                # Expect 'value' column, optional 'category'
-                if 'value' in row:
-                    item = {'value': row['value']}
-                    if 'category' in row:
-                        item['category'] = row['category']
-                    items_to_add.append(item)
-                elif 'name' in row: # Allow 'name' as alias for 'value'
-                    item = {'value': row['name']}
-                    if 'category' in row:
-                        item['category'] = row['category']
-                    items_to_add.append(item)
-                    
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Use JSON, YAML, or CSV.")
-            
-    except Exception as e:
+        return await dictionary_import.import_dictionary_items(
+            db,
+            Model,
+            file.file,
+            file.filename,
+            with_category=(type == "technologies"),
+            dry_run=dry_run
+        )
+    except (ValueError, csv.Error, yaml.YAMLError) as e:
+        await db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to parse file: {str(e)}")
-        
-    # Process items
-    added_count = 0
-    errors = []
-    
-    for item in items_to_add:
-        # Normalize item structure
-        if isinstance(item, str):
-            value = item
-            category = None
-        elif isinstance(item, dict):
-            value = item.get('value') or item.get('name')
-            category = item.get('category')
-        else:
-            continue
-            
-        if not value:
-            continue
-            
-        # Check existence
-        existing = await db.execute(select(Model).filter(Model.name == value))
-        if existing.scalars().first():
-            continue # Skip duplicates
-            
-        try:
-            if type == "technologies" and category:
-                new_option = Model(name=value, category=category)
-            else:
-                new_option = Model(name=value)
-            
-            db.add(new_option)
-            added_count += 1
-        except Exception as e:
-            errors.append(f"Failed to add {value}: {str(e)}")
-            
-    await db.commit()
-    
-    return {
-        "status": "success", 
-        "added": added_count, 
-        "total_processed": len(items_to_add),
-        "errors": errors
-    }
+
+# --- Bulk Entity Import ---
+
+async def _import_entities(entity: str, file: UploadFile, upsert_key: Optional[str], db: AsyncSession) -> BulkImportResult:
+    import csv
+    import yaml
+    from ..services import bulk_import
+
+    if not (file.filename or "").lower().endswith(bulk_import.SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV, JSON, NDJSON or YAML.")
+
+    try:
+        return await bulk_import.import_entities(db, entity, file.file, file.filename, upsert_key=upsert_key)
+    except (ValueError, csv.Error, yaml.YAMLError) as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Failed to import file: {str(e)}")
+
+@router.post("/plays/import", response_model=BulkImportResult)
+async def import_plays(file: UploadFile = File(...), upsert_key: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await _import_entities("plays", file, upsert_key, db)
+
+@router.post("/assets/import", response_model=BulkImportResult)
+async def import_assets(file: UploadFile = File(...), upsert_key: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await _import_entities("assets", file, upsert_key, db)
+
+@router.post("/opportunities/import", response_model=BulkImportResult)
+async def import_opportunities(file: UploadFile = File(...), upsert_key: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await _import_entities("opportunities", file, upsert_key, db)
+
+@router.post("/people/import", response_model=BulkImportResult)
+async def import_people(file: UploadFile = File(...), upsert_key: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await _import_entities("people", file, upsert_key, db)
+
 @router.get("/people", response_model=List[Person])
 async def get_people(db: AsyncSession = Depends(get_db)):
     from sqlalchemy.orm import selectinload
@@ -1081,17 +1380,57 @@ async def get_people(db: AsyncSession = Depends(get_db)):
             name=p.name,
             email=p.email,
             role=p.role,
+            region=p.region,
             technologies=[t.name for t in p.technologies]
         ) for p in people
     ]
 
+@router.get("/people/workload", response_model=List[PersonWorkload])
+async def get_people_workload(
+    person_ids: Optional[List[str]] = Query(None),
+    days: int = 30,
+    upcoming_limit: int = 5,
+    db: AsyncSession = Depends(get_db)
+):
+    """Active opportunities, open stage instances and upcoming target dates per person, busiest first."""
+    return await get_workload(db, person_ids, days=max(days, 0), upcoming_limit=max(1, min(upcoming_limit, 50)))
+
+@router.get("/people/staffing", response_model=List[StaffingCandidate])
+async def search_staffing(
+    technologies: List[str] = Query(...),
+    region: Optional[str] = None,
+    role: Optional[str] = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db)
+):
+    """People ranked by how many of the requested technologies they cover."""
+    await skill_index.ensure_loaded(db)
+    ranked = skill_index.search(technologies, region=region, role=role, limit=max(1, min(limit, 200)))
+    return [
+        StaffingCandidate(
+            person=Person(
+                id=entry.id,
+                name=entry.name,
+                email=entry.email,
+                role=entry.role,
+                region=entry.region,
+                technologies=list(entry.technologies)
+            ),
+            coverage=round(coverage, 4),
+            matched_technologies=matched,
+            missing_technologies=[t for t in technologies if t.lower() not in {m.lower() for m in matched}]
+        )
+        for entry, matched, coverage in ranked
+    ]
+
 @router.post("/people", response_model=Person)
 async def create_person(person: PersonCreate, db: AsyncSession = Depends(get_db)):
     db_person = PersonModel(
         id=str(uuid.uuid4()),
         name=person.name,
         email=person.email,
-        role=person.role
+        role=person.role,
+        region=person.region
     )
     
     if person.technologies:
@@ -1110,12 +1449,14 @@ async def create_person(person: PersonCreate, db: AsyncSession = Depends(get_db)
     stmt = select(PersonModel).options(selectinload(PersonModel.technologies)).filter(PersonModel.id == db_person.id)
     result = await db.execute(stmt)
     db_person = result.scalars().first()
+    skill_index.upsert_person(db_person)
     
     return Person(
         id=db_person.id,
         name=db_person.name,
         email=db_person.email,
         role=db_person.role,
+        region=db_person.region,
         technologies=[t.name for t in db_person.technologies]
     )
 
@@ -1131,6 +1472,7 @@ async def update_person(person_id: str, person_update: PersonUpdate, db: AsyncSe
     if person_update.name is not None: db_person.name = person_update.name
     if person_update.email is not None: db_person.email = person_update.email
     if person_update.role is not None: db_person.role = person_update.role
+    if person_update.region is not None: db_person.region = person_update.region
     
     if person_update.technologies is not None:
         techs = await db.execute(select(TechnologyModel).filter(TechnologyModel.name.in_(person_update.technologies)))
@@ -1143,12 +1485,14 @@ async def update_person(person_id: str, person_update: PersonUpdate, db: AsyncSe
         raise HTTPException(status_code=400, detail="Email already exists")
         
     await db.refresh(db_person)
+    skill_index.upsert_person(db_person)
     
     return Person(
         id=db_person.id,
         name=db_person.name,
         email=db_person.email,
         role=db_person.role,
+        region=db_person.region,
         technologies=[t.name for t in db_person.technologies]
     )
 
@@ -1163,4 +1507,94 @@ async def delete_person(person_id: str, db: AsyncSession = Depends(get_db)):
         
     await db.delete(person)
     await db.commit()
+    skill_index.remove(person_id)
     return {"status": "success", "message": "Person deleted"}
+
+# --- Uploads ---
+
+@router.get("/uploads/{upload_id}", response_model=UploadProgress)
+async def get_upload_progress(upload_id: str):
+    """Progress of an asset upload sent with this upload_id, while it is written to storage."""
+    progress = upload_progress.get(upload_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return progress
+
+@router.post("/uploads/direct", response_model=DirectUploadPlan)
+async def start_direct_upload(request: DirectUploadRequest):
+    """
+    Plan a browser-to-bucket upload (S3 provider only): a presigned POST for
+    small files, presigned part URLs for multipart. Finish with /uploads/direct/complete.
+    """
+    return await direct_upload.plan_upload(request.filename, request.content_type, request.size)
+
+@router.post("/uploads/direct/complete", response_model=Asset)
+async def complete_direct_upload(request: DirectUploadComplete, background_tasks: BackgroundTasks,
+                                  db: AsyncSession = Depends(get_db)):
+    """
+    Verify the uploaded object against the plan, then create the asset for it.
+    The bytes never pass through us, so the content hash (and with it text
+    extraction and previews) is filled in by a background job.
+    """
+    uploaded = await direct_upload.complete_upload(
+        db, request.token, request.etag, [p.dict() for p in request.parts]
+    )
+    asset = await _create_asset(
+        db, request.asset,
+        original_filename=uploaded["filename"],
+        file_path=uploaded["key"],
+        storage_provider="s3",
+        mime_type=uploaded["content_type"],
+        size_bytes=uploaded["size"],
+    )
+    await duplicate_detector.update_signature(db, asset.id)
+    # Background tasks run in order: the hash first, then what keys off it
+    background_tasks.add_task(asset_processing.hash_stored, db.bind, [asset.id])
+    background_tasks.add_task(asset_processing.process, db.bind, [asset.id])
+    background_tasks.add_task(preview_worker.process, db.bind, [asset.id])
+    return asset
+
+@router.post("/uploads/sessions", response_model=UploadSession)
+async def create_upload_session(request: UploadSessionCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Start a resumable upload. PUT the bytes to /uploads/sessions/{id} in one or
+    more chunks with an Upload-Offset header, then POST .../complete.
+    """
+    return await resumable_uploads.create(db, request.filename, request.content_type, request.size)
+
+@router.get("/uploads/sessions/{session_id}", response_model=UploadSession)
+async def get_upload_session(session_id: str, db: AsyncSession = Depends(get_db)):
+    """Where to resume from after a dropped connection: the offset the server has."""
+    return await resumable_uploads.get(db, session_id)
+
+@router.put("/uploads/sessions/{session_id}", response_model=UploadSession)
+async def upload_session_chunk(session_id: str, request: Request, upload_offset: int = Header(..., alias="Upload-Offset"),
+                               db: AsyncSession = Depends(get_db)):
+    # Read the raw body as it arrives rather than letting it spool to a temp file
+    return await resumable_uploads.write_chunk(db, session_id, upload_offset, request.stream())
+
+@router.post("/uploads/sessions/{session_id}/complete", response_model=Asset)
+async def complete_upload_session(session_id: str, request: UploadSessionComplete, background_tasks: BackgroundTasks,
+                                  db: AsyncSession = Depends(get_db)):
+    """Finish a fully uploaded session and create the asset for it."""
+    uploaded = await resumable_uploads.finalize(db, session_id)
+    asset = await _create_asset(
+        db, request.asset,
+        original_filename=uploaded["filename"],
+        file_path=uploaded["key"],
+        mime_type=uploaded["content_type"],
+        size_bytes=uploaded["size"],
+        content_hash=uploaded["digest"],
+        storage_provider=uploaded["provider"],
+    )
+    await duplicate_detector.update_signature(db, asset.id)
+    if uploaded["digest"] is None:
+        background_tasks.add_task(asset_processing.hash_stored, db.bind, [asset.id])
+    background_tasks.add_task(asset_processing.process, db.bind, [asset.id])
+    background_tasks.add_task(preview_worker.process, db.bind, [asset.id])
+    return asset
+
+@router.delete("/uploads/sessions/{session_id}")
+async def abort_upload_session(session_id: str, db: AsyncSession = Depends(get_db)):
+    await resumable_uploads.abort(db, session_id)
+    return {"status": "success", "message": "Upload session aborted"}
@@ -0,0 +1,93 @@
+"""
+Play matching latency at scale.
+
+Builds a PlayMatchIndex over synthetic plays and times match() for a mix of
+typical wizard queries, next to the old per-play scan (excluding the DB
+load of every play and its assets, which dominated the old endpoint).
+Runs without a database:
+
+    python -m backend.benchmarks.bench_play_match --plays 10000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.services.play_index import PlayMatchIndex
+
+OFFERINGS = [f"Offering {i}" for i in range(60)] + ["Hybrid Cloud", "Cloud Native", "Data Platform", "Security"]
+SECTORS = [f"Sector {i}" for i in range(25)] + ["Cross-Sector", "Financial Services", "Public Sector"]
+GEOS = ["NA", "EMEA", "APAC", "LATAM", "Global"]
+STAGES = ["Discovery", "Qualification", "Solutioning", "Validation", "Closing", "Delivery"]
+
+
+def build_index(n: int, rng: random.Random):
+    index = PlayMatchIndex()
+    plays = {}
+    for pid in range(1, n + 1):
+        offering = ", ".join(rng.sample(OFFERINGS, rng.randint(1, 3)))
+        sector = rng.choice(SECTORS)
+        geo = ", ".join(rng.sample(GEOS, rng.randint(1, 2)))
+        stages = rng.sample(STAGES, rng.randint(1, 4))
+        index.upsert(pid, offering, sector, geo, stage_scope=stages)
+        plays[pid] = ([o.strip().lower() for o in offering.split(",")], sector, geo, " ".join(stages).lower())
+    return index, plays
+
+
+def linear_scan(plays, offering, industry, region, stage):
+    # The original per-request matcher, minus the DB load
+    matched = []
+    for pid, (p_offering, p_sector, p_geo, p_stages) in plays.items():
+        score = 3 if any(off.lower() in po for off in offering for po in p_offering) else 0
+        if p_sector.lower() in ['all', 'cross-sector', 'x-sector'] or industry.lower() in p_sector.lower():
+            score += 2
+        if p_geo.lower() in ['global', 'all'] or region.lower() in p_geo.lower():
+            score += 2
+        if stage.lower() in p_stages:
+            score += 1
+        if score:
+            matched.append((pid, int(score / 8 * 100)))
+    matched.sort(key=lambda m: m[1], reverse=True)
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plays", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    start = time.perf_counter()
+    index, plays = build_index(args.plays, rng)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    baseline = []
+    for _ in range(args.queries):
+        query = dict(
+            offering=rng.sample(OFFERINGS, rng.randint(1, 2)) + ["cloud"],
+            industry=rng.choice(SECTORS),
+            region=rng.choice(GEOS[:-1]),
+            stage=rng.choice(STAGES),
+        )
+        start = time.perf_counter()
+        index.match(limit=args.limit, **query)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        linear_scan(plays, **query)
+        baseline.append((time.perf_counter() - start) * 1000)
+
+    print(f"plays={args.plays} queries={args.queries} limit={args.limit}")
+    print(f"index build: {build_ms:.1f} ms")
+    for label, samples in (("index", timings), ("linear scan", baseline)):
+        samples.sort()
+        print(f"{label:>12}: p50={statistics.median(samples):.2f} ms "
+              f"p95={samples[int(len(samples) * 0.95)]:.2f} ms "
+              f"max={samples[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+"More like this" latency at scale.
+
+Builds a SimilarityIndex over synthetic asset text in a temporary directory
+and times similar() (top-k cosine over the memory-mapped matrix) and single
+asset upserts. Runs without a database:
+
+    python -m backend.benchmarks.bench_similar_assets --assets 100000
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from backend.services.similarity_index import SimilarityIndex
+
+WORDS = [f"term{i}" for i in range(20000)] + [
+    "kubernetes", "migration", "security", "zero", "trust", "data", "platform", "cloud", "retail", "finance",
+]
+
+
+def doc(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(20, 80)))
+
+
+def report(label, samples):
+    samples.sort()
+    print(f"{label:>10}: p50={statistics.median(samples):.2f} ms "
+          f"p95={samples[int(len(samples) * 0.95)]:.2f} ms "
+          f"max={samples[-1]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    docs = [(f"asset-{i}", doc(rng)) for i in range(args.assets)]
+
+    with tempfile.TemporaryDirectory() as path:
+        index = SimilarityIndex(path=path)
+        start = time.perf_counter()
+        index.rebuild(docs)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for _ in range(args.queries):
+            asset_id = rng.choice(docs)[0]
+            start = time.perf_counter()
+            index.similar(asset_id, args.limit)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        upserts = []
+        for i in range(200):
+            start = time.perf_counter()
+            index.upsert(f"new-{i}", doc(rng))
+            upserts.append((time.perf_counter() - start) * 1000)
+
+        print(f"assets={args.assets} queries={args.queries} limit={args.limit} dim={index.dim}")
+        print(f"rebuild: {build_ms:.0f} ms")
+        report("similar", timings)
+        report("upsert", upserts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Event-loop latency while uploads are being written.
+
+Runs a ticker coroutine that sleeps 1 ms in a loop and records how late each
+wake-up is, while N concurrent uploads are saved through LocalFileSystemStorage.
+The "inline" mode reproduces the old behaviour (shutil.copyfileobj on the loop)
+for comparison. Runs without a database:
+
+    python -m backend.benchmarks.bench_storage_loop_latency --uploads 8 --size-mb 100
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from fastapi import UploadFile
+
+from backend.services.storage import LocalFileSystemStorage
+
+TICK_SECONDS = 0.001
+
+
+def make_upload(size: int, name: str) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    for _ in range(size // len(block)):
+        spooled.write(block)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename=name)
+
+
+async def inline_save(storage: LocalFileSystemStorage, file: UploadFile, directory: str) -> str:
+    target_dir = storage.base_path / directory
+    target_dir.mkdir(parents=True, exist_ok=True)
+    with (target_dir / file.filename).open("wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return f"{directory}/{file.filename}"
+
+
+async def run(mode: str, uploads: int, size: int) -> list:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append((time.perf_counter() - start - TICK_SECONDS) * 1000)
+
+    with tempfile.TemporaryDirectory() as path:
+        storage = LocalFileSystemStorage(base_path=path)
+        files = [make_upload(size, f"deck-{i}.pptx") for i in range(uploads)]
+        save = storage.save if mode == "threaded" else (lambda f, d: inline_save(storage, f, d))
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await asyncio.gather(*(save(f, f"asset-{i}") for i, f in enumerate(files)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await task
+        for f in files:
+            f.file.close()
+    return lags, elapsed
+
+
+def report(label, lags, elapsed):
+    lags.sort()
+    print(f"{label:>9}: total={elapsed * 1000:.0f} ms ticks={len(lags)} "
+          f"lag p50={statistics.median(lags):.2f} ms p99={lags[int(len(lags) * 0.99)]:.2f} ms "
+          f"max={lags[-1]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=100)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    print(f"uploads={args.uploads} size={args.size_mb} MB")
+    for mode in ("inline", "threaded"):
+        lags, elapsed = asyncio.run(run(mode, args.uploads, size))
+        report(mode, lags, elapsed)
+
+
+if __name__ == "__main__":
+    main()
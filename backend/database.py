@@ -18,3 +18,11 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+def dialect_insert(db, table):
+    """Return an INSERT construct that supports ON CONFLICT for the session's dialect."""
+    if db.bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
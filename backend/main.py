@@ -1,8 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api import routes, v2_endpoints
-from .database import engine, Base
+from .database import engine, Base, AsyncSessionLocal
 from . import models_db  # Import models to register them with Base
+from .services.settings_service import settings_store
+from .services.play_index import play_index
+from .services.asset_recommender import asset_recommender
+from .services.similarity_index import similarity_index
+from .services.skill_index import skill_index
+from .services.resumable_upload import resumable_uploads
+from .services.asset_processing import asset_processing
+from .services.preview_worker import preview_worker
 from fastapi.staticfiles import StaticFiles
 import os
 from pathlib import Path
@@ -14,6 +22,22 @@ async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    # Load system settings once and apply storage configuration before serving
+    async with AsyncSessionLocal() as db:
+        await settings_store.load(db)
+        await play_index.load(db)
+        await asset_recommender.load(db)
+        await similarity_index.ensure_ready(db)
+        await skill_index.load(db)
+        await resumable_uploads.collect_expired(db)
+    # Previews left pending by the last run, and retries from here on
+    preview_worker.start(engine)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await preview_worker.stop()
+    asset_processing.shutdown()
+
 # CORS Configuration
 origins = [
     "http://localhost:3000",
@@ -69,6 +69,12 @@ class AssetMetadata(BaseModel):
     mime_type: Optional[str] = None
     gtm_plays: Optional[List[AssetGTMPlayAssociation]] = []
 
+class BatchUploadResult(BaseModel):
+    index: int  # Position of the file in the request
+    filename: Optional[str] = None
+    status: str  # created or failed
+    asset: Optional[AssetMetadata] = None
+    error: Optional[str] = None
 
 class FacetItem(BaseModel):
     value: str
@@ -126,3 +132,90 @@ class AssetGTMPlayLink(BaseModel):
 
 Asset = AssetMetadata
 
+
+# --- V2 inputs and import reports, shared by the API and services ---
+
+class AssetLink(BaseModel):
+    id: str
+    title: str
+    url: str
+    type: str # 'preview' | 'source' | 'reference' | 'other'
+
+class AssetCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+    kind: str = 'other'
+    uri: Optional[str] = None
+    purpose: Optional[str] = None
+    default_stage: Optional[str] = None
+    collections: Optional[List[str]] = []
+    offerings: Optional[List[str]] = []
+    linked_play_ids: Optional[List[str]] = []
+    tags: List[str] = []
+    owners: Optional[List[str]] = []
+    technologies: Optional[List[str]] = []
+    links: Optional[List[AssetLink]] = []
+    linked_opportunity_ids: Optional[List[str]] = []
+    linked_asset_ids: Optional[List[str]] = []
+    external_id: Optional[str] = None
+
+class PersonBase(BaseModel):
+    name: str
+    email: str
+    role: Optional[str] = None
+    region: Optional[str] = None
+    technologies: List[str] = []
+    external_id: Optional[str] = None
+
+class PersonCreate(PersonBase):
+    pass
+
+class PlayStageDefinition(BaseModel):
+    key: str
+    label: str
+    objective: str
+    guidance: str
+    checklist_items: List[str]
+
+class PlayCreate(BaseModel):
+    title: str
+    summary: Optional[str] = None
+    offering: Optional[str] = None
+    technologies: List[str] = []
+    stage_scope: Optional[List[str]] = []
+    stages: Optional[List[PlayStageDefinition]] = []
+    sector: Optional[str] = None
+    geo: Optional[str] = None
+    tags: List[str] = []
+    owners: Optional[List[str]] = []
+    collections: Optional[List[str]] = []
+    default_team_members: Optional[List[str]] = []
+    external_id: Optional[str] = None
+
+class OpportunityInput(BaseModel):
+    sector: str
+    offering: str
+    stage: str
+    technologies: List[str]
+    geo: str
+    tags: List[str]
+    notes: str
+    plays: Optional[List[str]] = []
+    name: Optional[str] = None
+    account_name: Optional[str] = None
+    team_member_user_ids: Optional[List[str]] = []
+    external_id: Optional[str] = None
+
+class BulkImportRowIssue(BaseModel):
+    row: int
+    key: Optional[str] = None
+    message: str
+
+class BulkImportResult(BaseModel):
+    entity: str
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    total_processed: int = 0
+    errors: List[BulkImportRowIssue] = []
+    warnings: List[BulkImportRowIssue] = []
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Table, Text, Boolean, JSON, Float
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Table, Text, Boolean, JSON, Float, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -52,12 +52,26 @@ person_technologies = Table(
     Column('technology_id', Integer, ForeignKey('technologies.id'), primary_key=True)
 )
 
+# Who works on which opportunity, denormalized from sales_owner_user_id,
+# technical_lead_user_id and team_member_user_ids so workload can be
+# aggregated by person through an index. Kept in sync by services/workload.py.
+opportunity_members = Table(
+    'opportunity_members',
+    Base.metadata,
+    Column('opportunity_id', String, ForeignKey('opportunities.id', ondelete='CASCADE'), primary_key=True),
+    Column('person_id', String, primary_key=True),
+    Column('role', String, primary_key=True), # sales_owner, technical_lead, team_member
+    Index('ix_opportunity_members_person_id', 'person_id')
+)
+
 class AssetModel(Base):
     __tablename__ = "assets"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     original_filename = Column(String, nullable=False)
-    file_path = Column(String, nullable=False, unique=True) # Path relative to assets/ dir
+    file_path = Column(String, nullable=False, index=True) # Storage key; blobs/.. keys are shared by assets with identical content
+    content_hash = Column(String(64), nullable=True, index=True) # sha256 of the file
+    storage_provider = Column(String, nullable=True) # local or s3: where file_path lives; null = the active provider
     mime_type = Column(String, nullable=True)
     size_bytes = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -79,6 +93,7 @@ class AssetModel(Base):
     offerings = Column(JSON, nullable=True) # List of strings
     linked_play_ids = Column(JSON, nullable=True) # List of strings
     technologies = Column(JSON, nullable=True) # List of strings
+    external_id = Column(String, nullable=True, unique=True) # Key in the source system for bulk import upserts
     
     # One-to-one relationship with metadata (Legacy V1, keeping for now but merging fields into AssetModel for V2 simplicity)
     metadata_entry = relationship("AssetMetadataModel", back_populates="asset", uselist=False, cascade="all, delete-orphan")
@@ -132,6 +147,7 @@ class GTMPlayModel(Base):
     default_team_members = Column(JSON, nullable=True) # V2: List of strings (User IDs)
     owners = Column(JSON, nullable=True) # V2: List of strings
     collections = Column(JSON, nullable=True) # V2: List of strings (collection IDs or names)
+    external_id = Column(String, nullable=True, unique=True) # Key in the source system for bulk import upserts
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
     # Relationships
@@ -211,7 +227,7 @@ class OpportunityModel(Base):
     problem_statement = Column(Text, nullable=True)
     key_personas = Column(JSON, nullable=True) # List of strings
     tags = Column(JSON, nullable=True) # List of strings
-    status = Column(String, nullable=False, default='active') # active, parked, closed_won, closed_lost, archived
+    status = Column(String, nullable=False, default='active', index=True) # active, parked, closed_won, closed_lost, archived
     health = Column(String, nullable=False, default='green') # green, yellow, red
     
     sales_owner_user_id = Column(String, nullable=True)
@@ -222,6 +238,7 @@ class OpportunityModel(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
     
     integrations = Column(JSON, nullable=True) # List of IntegrationLink objects
+    external_id = Column(String, nullable=True, unique=True) # CRM key for bulk import upserts
     
     # Relationships
     primary_play_id = Column(Integer, ForeignKey('gtm_plays.id'), nullable=True)
@@ -234,7 +251,7 @@ class OpportunityPlayModel(Base):
     __tablename__ = "opportunity_plays"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    opportunity_id = Column(String, ForeignKey('opportunities.id'), nullable=False)
+    opportunity_id = Column(String, ForeignKey('opportunities.id'), nullable=False, index=True)
     play_id = Column(Integer, ForeignKey('gtm_plays.id'), nullable=False)
     
     alias_name = Column(String, nullable=True)
@@ -252,7 +269,7 @@ class OpportunityStageInstanceModel(Base):
     __tablename__ = "opportunity_stage_instances"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    opportunity_play_id = Column(String, ForeignKey('opportunity_plays.id'), nullable=False)
+    opportunity_play_id = Column(String, ForeignKey('opportunity_plays.id'), nullable=False, index=True)
     
     play_stage_key = Column(String, nullable=False)
     status = Column(String, nullable=False, default='not_started') # not_started, in_progress, completed, skipped
@@ -265,11 +282,15 @@ class OpportunityStageInstanceModel(Base):
     checklist_item_statuses = Column(JSON, nullable=True) # Dict
     custom_checklist_items = Column(JSON, nullable=True) # List of objects
     risk_flags = Column(JSON, nullable=True) # List of strings
+    version = Column(Integer, nullable=False, default=1, server_default='1') # Bumped on every update, for optimistic concurrency
     
     opportunity_play = relationship("OpportunityPlayModel", back_populates="stage_instances")
     
     notes = relationship("StageNoteModel", back_populates="stage_instance", cascade="all, delete-orphan", lazy="selectin")
 
+    # ORM flushes check and bump version, raising StaleDataError on a concurrent change
+    __mapper_args__ = {"version_id_col": version}
+
 class StageNoteModel(Base):
     __tablename__ = "stage_notes"
 
@@ -300,8 +321,69 @@ class PersonModel(Base):
     name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True)
     role = Column(String, nullable=True)
+    region = Column(String, nullable=True)
+    external_id = Column(String, nullable=True, unique=True) # Key in the source system for bulk import upserts
     
     technologies = relationship("TechnologyModel", secondary=person_technologies, back_populates="people")
 
 
+class AssetSignatureModel(Base):
+    __tablename__ = "asset_signatures"
+
+    # MinHash signature for near-duplicate detection, see services/duplicate_detector.py
+    asset_id = Column(String, ForeignKey('assets.id', ondelete='CASCADE'), primary_key=True)
+    signature = Column(LargeBinary, nullable=False) # NUM_PERM little-endian uint32 values
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
 
+class UploadSessionModel(Base):
+    __tablename__ = "upload_sessions"
+
+    # Resumable upload in progress, see services/resumable_upload.py
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    size = Column(Integer, nullable=False)
+    offset = Column(Integer, nullable=False, default=0)
+    chunk_size = Column(Integer, nullable=False)
+    provider = Column(String, nullable=False) # local or s3
+    storage_key = Column(String, nullable=False) # Partial file (local) or object key (s3)
+    s3_upload_id = Column(String, nullable=True)
+    parts = Column(JSON, nullable=True) # [{PartNumber, ETag}] uploaded so far (s3)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ExtractedTextModel(Base):
+    __tablename__ = "extracted_texts"
+
+    # Text pulled out of a stored file, shared by every asset with the same
+    # content, see services/asset_processing.py
+    content_hash = Column(String(64), primary_key=True)
+    format = Column(String, nullable=True) # markdown, text, pdf, docx, pptx
+    title = Column(String, nullable=True)
+    summary = Column(Text, nullable=True)
+    text = Column(Text, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    word_count = Column(Integer, nullable=True)
+    error = Column(String, nullable=True) # Set when the file could not be read; not retried
+    extracted_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class AssetPreviewModel(Base):
+    __tablename__ = "asset_previews"
+
+    # Thumbnail or snippet for a stored file, one per content; doubles as the
+    # job queue for services/preview_worker.py
+    content_hash = Column(String(64), primary_key=True)
+    status = Column(String, nullable=False, default="pending") # pending, ready, failed, unsupported
+    kind = Column(String, nullable=True) # image, pdf, office, text
+    thumbnail_key = Column(String, nullable=True) # previews/.. storage key
+    storage_provider = Column(String, nullable=True) # local or s3: where thumbnail_key lives
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    snippet = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
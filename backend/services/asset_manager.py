@@ -2,53 +2,69 @@ import shutil
 import os
 import uuid
 from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+import anyio
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from ..models_db import AssetModel, AssetMetadataModel, TagModel
+from sqlalchemy.orm import load_only, selectinload
+from ..models_db import AssetModel, AssetMetadataModel, AssetGTMPlayAssociation, TagModel
 from ..models import AssetMetadata as PydanticAssetMetadata
 
-from .storage import LocalFileSystemStorage
+from . import blob_store
+from .blob_store import StoredBlob
+from .storage import storage
+from .upload_progress import upload_progress
+from .asset_recommender import asset_recommender
+from .similarity_index import similarity_index
+from .duplicate_detector import duplicate_detector
+from .markdown_cache import markdown_cache
 
-# Initialize storage (could be injected)
-# Base path is relative to the project root, assuming running from there or configured correctly.
-# We'll use the same path as main.py: "assets"
-storage = LocalFileSystemStorage(base_path="assets")
+# Files go through the configured provider (local "assets" dir or S3, per
+# settings), stored once per distinct content under blobs/ and shared by
+# every asset that uploads the same bytes
 
-async def save_asset_file(file: UploadFile, asset_id: str) -> str:
-    # Use storage service to save file
-    # We organize by asset_id to keep things clean
-    return await storage.save(file, directory=asset_id)
+# Files of one batch upload written to storage at the same time
+BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", "4"))
 
-async def create_asset_entry(
-    db: AsyncSession, 
-    file: UploadFile, 
-    metadata: PydanticAssetMetadata
-) -> AssetModel:
-    # Generate ID if not provided
-    asset_id = metadata.id if metadata.id else str(uuid.uuid4())
-    
-    # 1. Save File
-    relative_path = await save_asset_file(file, asset_id)
-    
-    # 2. Create DB Entry
-    # Check for existing tags or create new ones
-    tags = []
-    for tag_name in metadata.tags:
-        result = await db.execute(select(TagModel).where(TagModel.name == tag_name))
-        tag = result.scalars().first()
-        if not tag:
-            tag = TagModel(name=tag_name)
-            db.add(tag)
-        tags.append(tag)
-        
+async def save_asset_file(file: UploadFile, upload_id: str = None) -> StoredBlob:
+    if not upload_id:
+        return await blob_store.store_upload(file)
+
+    # Client polls /api/v2/uploads/{upload_id} while this runs
+    upload_progress.start(upload_id, file.filename, file.size)
+    try:
+        blob = await blob_store.store_upload(file, progress=upload_progress.reporter(upload_id))
+    except Exception as e:
+        upload_progress.finish(upload_id, error=str(getattr(e, "detail", e)))
+        raise
+    upload_progress.finish(upload_id)
+    return blob
+
+async def resolve_tags(db: AsyncSession, names: Iterable[str]) -> List[TagModel]:
+    """Tags by name in one query, creating the missing ones (flushed with the caller's commit)."""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+    result = await db.execute(select(TagModel).where(TagModel.name.in_(names)))
+    tags = {tag.name: tag for tag in result.scalars().all()}
+    for name in names:
+        if name not in tags:
+            tags[name] = TagModel(name=name)
+            db.add(tags[name])
+    return [tags[name] for name in names]
+
+def _add_asset(db: AsyncSession, asset_id: str, file: UploadFile, metadata: PydanticAssetMetadata,
+               blob: StoredBlob, tags: List[TagModel]) -> AssetModel:
     db_asset = AssetModel(
         id=asset_id,
+        title=metadata.title,
         original_filename=file.filename,
-        file_path=relative_path,
+        file_path=blob.key,
+        content_hash=blob.digest,
+        storage_provider=storage.active_provider,
         mime_type=file.content_type,
-        size_bytes=file.size if file.size else 0, # file.size might be None depending on spooling
+        size_bytes=blob.size,
     )
     
     db_metadata = AssetMetadataModel(
@@ -67,19 +83,35 @@ async def create_asset_entry(
     
     # Handle GTM Play associations
     if metadata.gtm_plays:
-        from ..models_db import AssetGTMPlayAssociation
         for play_assoc in metadata.gtm_plays:
-            # Check if association already exists (shouldn't for new asset, but good practice)
-            # For new asset, just add
-            new_assoc = AssetGTMPlayAssociation(
+            db.add(AssetGTMPlayAssociation(
                 asset_id=asset_id,
                 play_id=play_assoc.play_id,
                 phase=play_assoc.phase
-            )
-            db.add(new_assoc)
+            ))
     
     db.add(db_asset)
+    return db_asset
+
+async def create_asset_entry(
+    db: AsyncSession, 
+    file: UploadFile, 
+    metadata: PydanticAssetMetadata,
+    upload_id: str = None
+) -> AssetModel:
+    # Generate ID if not provided
+    asset_id = metadata.id if metadata.id else str(uuid.uuid4())
+    
+    # 1. Save File
+    blob = await save_asset_file(file, upload_id)
+    
+    # 2. Create DB Entry
+    tags = await resolve_tags(db, metadata.tags)
+    _add_asset(db, asset_id, file, metadata, blob, tags)
     await db.commit()
+    await asset_recommender.refresh_asset(db, asset_id)
+    await similarity_index.index_asset(db, asset_id)
+    await duplicate_detector.update_signature(db, asset_id)
     
     # Reload with eager loading of relationships to avoid MissingGreenlet error
     # when accessing them in the route handler
@@ -90,11 +122,86 @@ async def create_asset_entry(
     )
     return result.scalars().first()
 
+async def create_asset_batch(
+    db: AsyncSession,
+    entries: List[Tuple[UploadFile, PydanticAssetMetadata]]
+) -> List[Union[AssetModel, str]]:
+    """
+    Create one asset per (file, metadata) entry. Files are stored a few at a
+    time, tags for the whole batch are resolved in one query, and every row
+    goes in with a single commit. Returns, in order, the created asset or
+    the reason that entry failed; a failed file doesn't stop the others.
+    """
+    results: List[Union[AssetModel, str, None]] = [None] * len(entries)
+    asset_ids = [metadata.id or str(uuid.uuid4()) for _, metadata in entries]
+
+    # Ids clients chose themselves may already be taken
+    requested = [metadata.id for _, metadata in entries if metadata.id]
+    taken = set()
+    if requested:
+        result = await db.execute(select(AssetModel.id).where(AssetModel.id.in_(requested)))
+        taken = set(result.scalars().all())
+    seen = set()
+    for index, asset_id in enumerate(asset_ids):
+        if asset_id in taken or asset_id in seen:
+            results[index] = f"Asset {asset_id} already exists"
+        seen.add(asset_id)
+
+    # 1. Save files, bounded so a big folder doesn't hold every file open in flight
+    blobs: List[StoredBlob] = [None] * len(entries)
+    limiter = anyio.CapacityLimiter(BATCH_UPLOAD_CONCURRENCY)
+
+    async def store(index: int, file: UploadFile):
+        async with limiter:
+            try:
+                blobs[index] = await blob_store.store_upload(file)
+            except Exception as e:
+                results[index] = f"Could not store file: {getattr(e, 'detail', e)}"
+
+    async with anyio.create_task_group() as tg:
+        for index, (file, _) in enumerate(entries):
+            if results[index] is None:
+                tg.start_soon(store, index, file)
+
+    # 2. One tag lookup and one transaction for everything that was stored
+    pending = [i for i in range(len(entries)) if results[i] is None]
+    tags = {tag.name: tag for tag in await resolve_tags(db, (t for i in pending for t in entries[i][1].tags))}
+    for index in pending:
+        file, metadata = entries[index]
+        _add_asset(db, asset_ids[index], file, metadata, blobs[index],
+                   [tags[name] for name in dict.fromkeys(metadata.tags)])
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        for index in pending:
+            results[index] = f"Could not save asset: {e}"
+        pending = []
+    # Blobs nothing ended up pointing at (newly written for a failed entry)
+    await blob_store.release(db, [blobs[i].key for i in range(len(entries)) if blobs[i] and i not in pending])
+
+    created_ids = [asset_ids[i] for i in pending]
+    if created_ids:
+        await asset_recommender.refresh_assets(db, created_ids)
+        await similarity_index.index_assets(db, created_ids)
+        await duplicate_detector.update_signatures(db, created_ids)
+
+        result = await db.execute(
+            select(AssetModel)
+            .options(selectinload(AssetModel.metadata_entry), selectinload(AssetModel.tags))
+            .where(AssetModel.id.in_(created_ids))
+        )
+        by_id = {asset.id: asset for asset in result.scalars().all()}
+        for index in pending:
+            results[index] = by_id[asset_ids[index]]
+    return results
+
 async def update_asset_entry(
     db: AsyncSession,
     asset_id: str,
     metadata: PydanticAssetMetadata,
-    file: UploadFile = None
+    file: UploadFile = None,
+    upload_id: str = None
 ) -> AssetModel:
     result = await db.execute(
         select(AssetModel)
@@ -107,26 +214,24 @@ async def update_asset_entry(
         raise HTTPException(status_code=404, detail="Asset not found")
         
     # Update File if provided
+    replaced_path = replaced_hash = None
     if file:
-        relative_path = await save_asset_file(file, asset_id)
+        blob = await save_asset_file(file, upload_id)
+        if db_asset.file_path != blob.key:
+            replaced_path = db_asset.file_path
+            replaced_hash = db_asset.content_hash
         db_asset.original_filename = file.filename
-        db_asset.file_path = relative_path
+        db_asset.file_path = blob.key
+        db_asset.content_hash = blob.digest
+        db_asset.storage_provider = storage.active_provider
         db_asset.mime_type = file.content_type
-        if file.size:
-             db_asset.size_bytes = file.size
+        db_asset.size_bytes = blob.size
              
     # Update Tags
-    tags = []
-    for tag_name in metadata.tags:
-        result = await db.execute(select(TagModel).where(TagModel.name == tag_name))
-        tag = result.scalars().first()
-        if not tag:
-            tag = TagModel(name=tag_name)
-            db.add(tag)
-        tags.append(tag)
-    db_asset.tags = tags
+    db_asset.tags = await resolve_tags(db, metadata.tags)
     
     # Update Metadata
+    db_asset.title = metadata.title
     if db_asset.metadata_entry:
          db_asset.metadata_entry.title = metadata.title
          db_asset.metadata_entry.summary = metadata.summary
@@ -136,6 +241,13 @@ async def update_asset_entry(
          db_asset.metadata_entry.confidentiality = metadata.confidentiality.value
     
     await db.commit()
+    # The replaced file goes once no other asset shares it
+    if replaced_path:
+        await blob_store.release(db, [replaced_path])
+        await markdown_cache.invalidate(db, [replaced_hash])
+    await asset_recommender.refresh_asset(db, asset_id)
+    await similarity_index.index_asset(db, asset_id)
+    await duplicate_detector.update_signature(db, asset_id)
     
     result = await db.execute(
         select(AssetModel)
@@ -144,17 +256,15 @@ async def update_asset_entry(
     )
     return result.scalars().first()
 
-async def get_asset_path(asset_id: str, db: AsyncSession) -> Path:
-    result = await db.execute(select(AssetModel).where(AssetModel.id == asset_id))
+async def get_asset_file(asset_id: str, db: AsyncSession) -> AssetModel:
+    """The asset row a download needs; the caller decides how to serve the file."""
+    result = await db.execute(
+        select(AssetModel)
+        .options(load_only(AssetModel.id, AssetModel.file_path, AssetModel.content_hash,
+                           AssetModel.storage_provider, AssetModel.original_filename, AssetModel.mime_type))
+        .where(AssetModel.id == asset_id)
+    )
     asset = result.scalars().first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    
-    # For LocalFileSystemStorage, we can reconstruct the path
-    # asset.file_path is relative to the storage base path
-    full_path = storage.base_path / asset.file_path
-    
-    if not full_path.exists():
-        raise HTTPException(status_code=404, detail="Asset file not found on disk")
-        
-    return full_path
+    return asset
@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+import anyio
+from fastapi import UploadFile
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..database import dialect_insert
+from ..models_db import AssetModel, ExtractedTextModel
+from . import text_extraction
+from .blob_store import hash_stream
+from .storage import CHUNK_SIZE, run_blocking, storage
+from .similarity_index import similarity_index
+from .duplicate_detector import duplicate_detector
+
+# Worker processes for extraction; parsing a big PDF is pure CPU
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "2"))
+# Larger files are stored but not read
+EXTRACTION_MAX_MB = int(os.getenv("EXTRACTION_MAX_MB", "100"))
+
+_FIELDS = ("format", "title", "summary", "text", "page_count", "word_count", "error")
+
+
+def _hash_file(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hash_stream(f)[0]
+
+
+class AssetProcessing:
+    """
+    Text extraction for uploaded files, off the request path.
+
+    Upload endpoints queue process() as a background task once the asset is
+    committed, so the response never waits for it. Parsing runs in a
+    ProcessPoolExecutor: it is CPU bound and would otherwise hold the GIL
+    against the event loop. Results are stored in extracted_texts by content
+    hash, so a file that was seen before (re-upload, /api/extract preview,
+    shared blob) is never parsed twice, failures included. The text then
+    feeds the similarity index and duplicate signatures.
+    """
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.extracted = 0
+        self.cache_hits = 0
+        self.failures = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the server process has threads (and their locks) running
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "extracted": self.extracted, "cache_hits": self.cache_hits,
+                "failures": self.failures}
+
+    async def submit(self, func, *args):
+        """Run a picklable function in the worker pool without blocking the loop."""
+        pool = self._executor()
+        try:
+            return await asyncio.wrap_future(pool.submit(func, *args))
+        except BrokenProcessPool:
+            # A worker died (out of memory on a huge file); start over with a fresh pool
+            if self._pool is pool:
+                self._pool = None
+            raise
+
+    async def _extract(self, path: Path, filename: str, mime_type: Optional[str]) -> Optional[dict]:
+        """Row values for extracted_texts, or None for formats we don't read."""
+        try:
+            result = await self.submit(text_extraction.extract, str(path), filename, mime_type)
+        except text_extraction.UnsupportedFormat:
+            return None
+        except Exception as e:
+            print(f"Text extraction failed for {filename}: {e}")
+            self.failures += 1
+            return {"error": str(e)[:500]}
+        self.extracted += 1
+        return result
+
+    async def _store(self, db: AsyncSession, rows: Dict[str, dict]):
+        if not rows:
+            return
+        stmt = dialect_insert(db, ExtractedTextModel.__table__).values([
+            dict({field: values.get(field) for field in _FIELDS}, content_hash=digest, extracted_at=func.now())
+            for digest, values in rows.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["content_hash"],
+            set_={**{field: getattr(stmt.excluded, field) for field in _FIELDS}, "extracted_at": func.now()},
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+    async def _cached(self, db: AsyncSession, digests) -> set:
+        result = await db.execute(
+            select(ExtractedTextModel.content_hash).where(ExtractedTextModel.content_hash.in_(list(digests)))
+        )
+        return set(result.scalars().all())
+
+    @asynccontextmanager
+    async def local_copy(self, key: str, digest: Optional[str], provider: Optional[str]) -> AsyncIterator[Path]:
+        # Local files and S3 files in the disk cache are read in place
+        path = await storage.local_file(key, digest, provider)
+        if path is not None:
+            yield path
+            return
+
+        def reserve() -> str:
+            with tempfile.NamedTemporaryFile(suffix=Path(key).suffix, delete=False) as f:
+                return f.name
+
+        name = await run_blocking(reserve)
+        try:
+            await storage.download_to(key, Path(name), provider)
+            yield Path(name)
+        finally:
+            await run_blocking(os.unlink, name)
+
+    async def extract_stored(self, db: AsyncSession, asset_ids: List[str]) -> int:
+        """Extract text for assets whose content hasn't been read yet. Returns files parsed."""
+        result = await db.execute(
+            select(AssetModel.content_hash, AssetModel.file_path, AssetModel.storage_provider,
+                   AssetModel.original_filename, AssetModel.mime_type, AssetModel.size_bytes)
+            .where(AssetModel.id.in_(asset_ids), AssetModel.content_hash.isnot(None))
+        )
+        pending = {}
+        for digest, key, provider, filename, mime_type, size in result.all():
+            if text_extraction.detect_format(filename, mime_type) is None:
+                continue
+            if size and size > EXTRACTION_MAX_MB * 1024 * 1024:
+                continue
+            pending.setdefault(digest, (key, provider, filename, mime_type))
+        cached = await self._cached(db, pending)
+        self.cache_hits += len(cached)
+
+        rows: Dict[str, dict] = {}
+        limiter = anyio.CapacityLimiter(self.workers)
+
+        async def extract(digest: str, key: str, provider: Optional[str], filename: str, mime_type: Optional[str]):
+            async with limiter:
+                try:
+                    async with self.local_copy(key, digest, provider) as path:
+                        row = await self._extract(path, filename, mime_type)
+                except Exception as e:
+                    # Couldn't fetch the file; leave it for the next upload or edit
+                    print(f"Could not read {key} for extraction: {e}")
+                    return
+                if row is not None:
+                    rows[digest] = row
+
+        async with anyio.create_task_group() as tg:
+            for digest, args in pending.items():
+                if digest not in cached:
+                    tg.start_soon(extract, digest, *args)
+        await self._store(db, rows)
+        return len(rows)
+
+    async def hash_stored(self, bind, asset_ids: List[str]):
+        """
+        Background task for files whose bytes never passed through us (direct
+        uploads): hash them from storage and record content_hash. Extraction,
+        previews, the markdown cache and download ETags all key off the hash,
+        so queue this ahead of process() and the preview worker.
+        """
+        try:
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                result = await db.execute(
+                    select(AssetModel).where(AssetModel.id.in_(asset_ids), AssetModel.content_hash.is_(None))
+                )
+                for asset in result.scalars().all():
+                    async with self.local_copy(asset.file_path, None, asset.storage_provider) as path:
+                        asset.content_hash = await run_blocking(_hash_file, path)
+                await db.commit()
+        except Exception as e:
+            print(f"Hashing stored files failed for {asset_ids}: {e}")
+
+    async def process(self, bind, asset_ids: List[str]):
+        """Background task after an upload: extract, then re-index with the text. Uses its own session."""
+        try:
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                if await self.extract_stored(db, asset_ids):
+                    await similarity_index.index_assets(db, asset_ids)
+                    await duplicate_detector.update_signatures(db, asset_ids)
+        except Exception as e:
+            print(f"Asset processing failed for {asset_ids}: {e}")
+
+    async def extract_upload(self, db: AsyncSession, file: UploadFile) -> Optional[dict]:
+        """
+        Text and metadata for an upload that isn't an asset yet (the upload
+        form's prefill). Cached like stored files, so creating the asset
+        afterwards doesn't parse it again. None for formats we don't read.
+        """
+        if text_extraction.detect_format(file.filename, file.content_type) is None:
+            return None
+
+        def spool() -> tuple:
+            # Worker processes need a real file, the upload may still be in memory
+            digest = hashlib.sha256()
+            file.file.seek(0)
+            with tempfile.NamedTemporaryFile(suffix=Path(file.filename or "").suffix, delete=False) as f:
+                while True:
+                    chunk = file.file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            return digest.hexdigest(), f.name
+
+        digest, name = await run_blocking(spool)
+        try:
+            row = await db.get(ExtractedTextModel, digest)
+            if row is not None:
+                self.cache_hits += 1
+                return {field: getattr(row, field) for field in _FIELDS}
+            values = await self._extract(Path(name), file.filename, file.content_type)
+        finally:
+            await run_blocking(os.unlink, name)
+        if values is None:
+            return None
+        await self._store(db, {digest: values})
+        return values
+
+
+asset_processing = AssetProcessing()
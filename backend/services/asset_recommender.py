@@ -0,0 +1,290 @@
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from ..models_db import (
+    AssetModel, AssetGTMPlayAssociation, GTMPlayModel, OpportunityModel, OpportunityPlayModel,
+    OpportunityStageInstanceModel, TagModel, asset_tags
+)
+
+# Relative importance of each feature kind, for both assets and stage context
+FEATURE_WEIGHTS = {
+    "stage": 3.0,
+    "play": 2.0,
+    "tech": 1.0,
+    "offering": 1.0,
+    "tag": 0.5,
+}
+
+# Boost per log(1 + number of won opportunities the asset was linked to)
+WON_WEIGHT = 0.25
+WON_STAGE = "closed won"
+
+# Full rebuild interval, to pick up changes made by other workers
+RELOAD_INTERVAL_SECONDS = 300
+
+
+def is_won(status: Optional[str], sales_stage: Optional[str]) -> bool:
+    return status == "closed_won" or (sales_stage or "").strip().lower() == WON_STAGE
+
+
+def _feature_key(kind: str, value) -> Optional[str]:
+    value = str(value).strip().lower() if value is not None else ""
+    return f"{kind}:{value}" if value else None
+
+
+def _features(pairs: Iterable[Tuple[str, object]]) -> Dict[str, float]:
+    features = {}
+    for kind, value in pairs:
+        key = _feature_key(kind, value)
+        if key:
+            features[key] = FEATURE_WEIGHTS[kind]
+    return features
+
+
+def asset_features(
+    default_stage: Optional[str],
+    technologies: Optional[List[str]],
+    offerings: Optional[List[str]],
+    tags: Iterable[str],
+    play_links: Iterable[Tuple[int, Optional[str]]],
+) -> Dict[str, float]:
+    pairs = [("stage", default_stage)]
+    pairs += [("tech", t) for t in technologies or []]
+    pairs += [("offering", o) for o in offerings or []]
+    pairs += [("tag", t) for t in tags]
+    for play_id, phase in play_links:
+        pairs += [("play", play_id), ("stage", phase)]
+    return _features(pairs)
+
+
+class AssetRecommender:
+    """
+    Sparse asset x feature matrix for stage-aware recommendations.
+
+    Each asset is a row of weighted features (stage, play, technology,
+    offering, tag), L2-normalized. A stage instance is turned into a query
+    vector over the same features, so ranking is a single sparse mat-vec plus a
+    boost for assets linked to won opportunities.
+
+    Each row is kept as normalized column/value arrays. After a change the
+    CSR matrix is re-materialized on the next query by concatenating those
+    arrays (numpy, one Python step per asset rather than per feature), and a
+    won-count change only recomputes the boost vector.
+
+    An opportunity counts as won once its status is closed_won or its sales
+    stage is "Closed Won" (what the board sets). refresh_opportunity() picks
+    up a change without a reload.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, int] = {}
+        self._rows: Dict[str, Dict[str, float]] = {}
+        # asset id -> (column indices, L2-normalized weights)
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._won: Dict[str, int] = {}
+        self._opportunities: Dict[str, Set[str]] = {}  # asset id -> linked opportunity ids
+        self._won_opportunities: Set[str] = set()
+        self._matrix = None
+        self._asset_ids: List[str] = []
+        self._boost = None
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # --- Maintenance ---
+
+    def upsert(self, asset_id: str, features: Dict[str, float], won_count: int = 0,
+               opportunity_ids: Iterable[str] = ()):
+        for key in features:
+            self._columns.setdefault(key, len(self._columns))
+        data = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        norm = np.linalg.norm(data)
+        self._arrays[asset_id] = (
+            np.fromiter((self._columns[key] for key in features), dtype=np.int32, count=len(features)),
+            data / norm if norm else data,
+        )
+        self._rows[asset_id] = features
+        self._won[asset_id] = won_count
+        self._opportunities[asset_id] = set(opportunity_ids)
+        self._matrix = None
+
+    def remove(self, asset_id: str):
+        if self._rows.pop(asset_id, None) is not None:
+            self._arrays.pop(asset_id, None)
+            self._won.pop(asset_id, None)
+            self._opportunities.pop(asset_id, None)
+            self._matrix = None
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    async def _fetch(self, db: AsyncSession, asset_ids: Optional[List[str]] = None):
+        assets = select(
+            AssetModel.id, AssetModel.default_stage, AssetModel.technologies,
+            AssetModel.offerings, AssetModel.linked_opportunity_ids
+        )
+        tags = select(asset_tags.c.asset_id, TagModel.name).join(TagModel, TagModel.id == asset_tags.c.tag_id)
+        links = select(AssetGTMPlayAssociation.asset_id, AssetGTMPlayAssociation.play_id, AssetGTMPlayAssociation.phase)
+        if asset_ids is not None:
+            assets = assets.where(AssetModel.id.in_(asset_ids))
+            tags = tags.where(asset_tags.c.asset_id.in_(asset_ids))
+            links = links.where(AssetGTMPlayAssociation.asset_id.in_(asset_ids))
+
+        tags_by_asset: Dict[str, List[str]] = {}
+        for asset_id, name in (await db.execute(tags)).all():
+            tags_by_asset.setdefault(asset_id, []).append(name)
+        links_by_asset: Dict[str, List[Tuple[int, str]]] = {}
+        for asset_id, play_id, phase in (await db.execute(links)).all():
+            links_by_asset.setdefault(asset_id, []).append((play_id, phase))
+
+        for asset_id, default_stage, technologies, offerings, opp_ids in (await db.execute(assets)).all():
+            features = asset_features(
+                default_stage, technologies, offerings,
+                tags_by_asset.get(asset_id, []), links_by_asset.get(asset_id, [])
+            )
+            won = len(self._won_opportunities.intersection(opp_ids or []))
+            self.upsert(asset_id, features, won, opp_ids or [])
+
+    async def load(self, db: AsyncSession):
+        won = await db.execute(select(OpportunityModel.id).where(or_(
+            OpportunityModel.status == "closed_won",
+            func.lower(func.trim(OpportunityModel.sales_stage)) == WON_STAGE,
+        )))
+        self._won_opportunities = set(won.scalars().all())
+        self._columns = {}
+        self._rows = {}
+        self._arrays = {}
+        self._won = {}
+        self._opportunities = {}
+        self._matrix = None
+        await self._fetch(db)
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > RELOAD_INTERVAL_SECONDS:
+            await self.load(db)
+
+    async def refresh_asset(self, db: AsyncSession, asset_id: str):
+        """Re-read one asset's features after it was created or changed."""
+        await self.refresh_assets(db, [asset_id])
+
+    async def refresh_assets(self, db: AsyncSession, asset_ids: List[str]):
+        if not self.loaded:
+            return
+        for asset_id in asset_ids:
+            self.remove(asset_id)
+        await self._fetch(db, asset_ids)
+
+    async def refresh_opportunity(self, db: AsyncSession, opp_id: str):
+        """Re-check whether an opportunity is won and re-weight the assets linked to it."""
+        if not self.loaded:
+            return
+        row = (await db.execute(
+            select(OpportunityModel.status, OpportunityModel.sales_stage).where(OpportunityModel.id == opp_id)
+        )).first()
+        won = row is not None and is_won(*row)
+        if won == (opp_id in self._won_opportunities):
+            return
+        if won:
+            self._won_opportunities.add(opp_id)
+        else:
+            self._won_opportunities.discard(opp_id)
+        for asset_id, opp_ids in self._opportunities.items():
+            if opp_id in opp_ids:
+                self._won[asset_id] += 1 if won else -1
+                self._boost = None
+
+    def _materialize(self):
+        self._asset_ids = list(self._rows)
+        rows = [self._arrays[a] for a in self._asset_ids]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        self._matrix = sparse.csr_matrix(
+            (np.concatenate([data for _, data in rows]), np.concatenate([indices for indices, _ in rows]), indptr),
+            shape=(len(self._asset_ids), max(len(self._columns), 1)),
+        )
+        self._boost = None
+
+    def _won_boost(self):
+        won = np.fromiter((self._won.get(a, 0) for a in self._asset_ids), dtype=np.float32, count=len(self._asset_ids))
+        self._boost = WON_WEIGHT * np.log1p(won)
+
+    # --- Querying ---
+
+    def recommend(self, context: Dict[str, float], limit: int = 10) -> List[Tuple[str, float, List[str]]]:
+        """Return [(asset_id, score, matched feature keys)] best first."""
+        if not self._rows:
+            return []
+        if self._matrix is None:
+            self._materialize()
+        if self._boost is None:
+            self._won_boost()
+
+        query = np.zeros(self._matrix.shape[1], dtype=np.float32)
+        for key, weight in context.items():
+            column = self._columns.get(key)
+            if column is not None:
+                query[column] = weight
+        if not query.any():
+            return []
+
+        relevance = self._matrix.dot(query)
+        candidates = np.flatnonzero(relevance > 0)
+        if candidates.size == 0:
+            return []
+        scores = relevance[candidates] + self._boost[candidates]
+
+        k = min(limit, candidates.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            asset_id = self._asset_ids[candidates[i]]
+            matched = sorted(key for key in self._rows[asset_id] if key in context)
+            results.append((asset_id, float(scores[i]), matched))
+        return results
+
+    async def stage_context(self, db: AsyncSession, opp_id: str, play_id: int, stage_key: str) -> Optional[Dict[str, float]]:
+        """Build the query features for a stage instance, or None if it doesn't exist."""
+        result = await db.execute(
+            select(OpportunityPlayModel)
+            .join(OpportunityStageInstanceModel, OpportunityStageInstanceModel.opportunity_play_id == OpportunityPlayModel.id)
+            .filter(
+                OpportunityPlayModel.opportunity_id == opp_id,
+                OpportunityPlayModel.play_id == play_id,
+                OpportunityStageInstanceModel.play_stage_key == stage_key
+            )
+            .options(
+                selectinload(OpportunityPlayModel.play).selectinload(GTMPlayModel.technologies),
+                selectinload(OpportunityPlayModel.opportunity).selectinload(OpportunityModel.primary_technologies),
+            )
+        )
+        opp_play = result.scalars().first()
+        if not opp_play:
+            return None
+
+        play = opp_play.play
+        opp = opp_play.opportunity
+        pairs = [("stage", stage_key), ("play", play_id)]
+        pairs += [("tech", t.name) for t in play.technologies]
+        pairs += [("tech", t.name) for t in opp.primary_technologies]
+        pairs += [("tech", t) for t in opp_play.selected_technology_ids or []]
+        pairs += [("offering", o) for o in (play.offering or "").split(",")]
+        pairs += [("tag", t) for t in opp.tags or []]
+        return _features(pairs)
+
+
+asset_recommender = AssetRecommender()
@@ -0,0 +1,175 @@
+import os
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import anyio
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import AssetModel, AssetPreviewModel
+from .preview_worker import PREVIEW_PREFIX
+from .storage import local_storage_instance, run_blocking, storage
+
+GC_PAGE_SIZE = 1000
+DEFAULT_GRACE_SECONDS = 24 * 3600
+# Only prefixes the app writes to; the bucket may hold other things
+S3_GC_PREFIXES = ("blobs/", "uploads/", f"{PREVIEW_PREFIX}/")
+# Local sweep: delete this many files, then pause, so the disk stays usable
+LOCAL_DELETE_BATCH = 100
+LOCAL_SWEEP_PAUSE_SECONDS = 0.05
+
+# (key, size, modified unix time)
+StoredObject = Tuple[str, int, float]
+
+
+def _walk_local(base) -> Iterator[StoredObject]:
+    for root, _, files in os.walk(base):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield os.path.relpath(path, base).replace(os.sep, "/"), stat.st_size, stat.st_mtime
+
+
+class BlobGC:
+    """
+    Finds stored files no asset points at and deletes them.
+
+    Walks local storage and, when S3 is active, the app's prefixes in the
+    bucket, one page (up to 1000 objects) at a time. Each page is checked
+    against AssetModel.file_path with a single query (previews against
+    AssetModel.content_hash). Anything younger
+    than the grace period is left alone, because its row may not be
+    committed yet (uploads in flight, direct uploads awaiting completion).
+
+    Orphans are removed with one delete_objects request per page on S3.
+    Locally they go in small batches with pauses in between.
+    """
+
+    def __init__(self):
+        self.status = "idle"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.dry_run = False
+        self.grace_seconds = DEFAULT_GRACE_SECONDS
+        self.error: Optional[str] = None
+        self.providers: Dict[str, dict] = {}
+        self._cancelled = False
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def queue(self):
+        self.status = "queued"
+        self.error = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def report(self) -> dict:
+        totals = {k: sum(p[k] for p in self.providers.values())
+                  for k in ("scanned", "orphans", "deleted", "reclaimed_bytes")}
+        return {
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "dry_run": self.dry_run,
+            "grace_hours": self.grace_seconds / 3600,
+            "error": self.error,
+            "providers": self.providers,
+            **totals,
+        }
+
+    async def _orphans(self, db: AsyncSession, page: List[StoredObject], cutoff: float) -> List[StoredObject]:
+        old = [obj for obj in page if obj[2] < cutoff]
+        if not old:
+            return []
+        # Previews are named by content hash and live as long as some asset has that content
+        previews = {key: key.rsplit("/", 1)[-1].split(".", 1)[0] for key, _, _ in old
+                    if key.startswith(f"{PREVIEW_PREFIX}/")}
+        result = await db.execute(
+            select(AssetModel.file_path).where(AssetModel.file_path.in_([key for key, _, _ in old]))
+        )
+        referenced = set(result.scalars().all())
+        if previews:
+            result = await db.execute(
+                select(AssetModel.content_hash).where(AssetModel.content_hash.in_(set(previews.values())))
+            )
+            kept = set(result.scalars().all())
+            referenced.update(key for key, digest in previews.items() if digest in kept)
+        return [obj for obj in old if obj[0] not in referenced]
+
+    async def _sweep(self, db: AsyncSession, provider: str, pages, cutoff: float):
+        stats = self.providers[provider] = {"scanned": 0, "orphans": 0, "deleted": 0, "reclaimed_bytes": 0}
+        async for page in pages:
+            if self._cancelled:
+                return
+            stats["scanned"] += len(page)
+            orphans = await self._orphans(db, page, cutoff)
+            stats["orphans"] += len(orphans)
+            if self.dry_run or not orphans:
+                continue
+            sizes = {key: size for key, size, _ in orphans}
+            batch_size = LOCAL_DELETE_BATCH if provider == "local" else len(orphans)
+            for i in range(0, len(orphans), batch_size):
+                deleted = await storage.delete_many([key for key, _, _ in orphans[i:i + batch_size]], provider)
+                dropped = [key for key in deleted if key.startswith(f"{PREVIEW_PREFIX}/")]
+                if dropped:
+                    # So the content gets a fresh preview if it is uploaded again
+                    await db.execute(delete(AssetPreviewModel).where(AssetPreviewModel.thumbnail_key.in_(dropped)))
+                    await db.commit()
+                stats["deleted"] += len(deleted)
+                stats["reclaimed_bytes"] += sum(sizes[key] for key in deleted)
+                if provider == "local":
+                    await anyio.sleep(LOCAL_SWEEP_PAUSE_SECONDS)
+
+    async def _local_pages(self):
+        files = _walk_local(local_storage_instance.base_path)
+        while True:
+            page = await run_blocking(lambda: list(islice(files, GC_PAGE_SIZE)))
+            if not page:
+                return
+            yield page
+
+    async def _s3_pages(self, provider):
+        for prefix in S3_GC_PREFIXES:
+            token = None
+            while True:
+                objects, token = await run_blocking(provider.list_page, prefix, token, GC_PAGE_SIZE)
+                if objects:
+                    yield [(o["Key"], o["Size"], o["LastModified"].timestamp()) for o in objects]
+                if not token:
+                    break
+
+    async def run(self, bind, grace_seconds: float = DEFAULT_GRACE_SECONDS, dry_run: bool = False):
+        """Background job; uses its own session."""
+        self.status = "running"
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self.dry_run = dry_run
+        self.grace_seconds = grace_seconds
+        self.error = None
+        self.providers = {}
+        cutoff = time.time() - grace_seconds
+        try:
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                await self._sweep(db, "local", self._local_pages(), cutoff)
+                s3 = storage.s3_provider()
+                if s3 is not None:
+                    await self._sweep(db, "s3", self._s3_pages(s3), cutoff)
+            self.status = "cancelled" if self._cancelled else "completed"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now(timezone.utc)
+
+
+blob_gc = BlobGC()
@@ -0,0 +1,110 @@
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import AssetModel
+from .storage import CHUNK_SIZE, Progress, run_blocking, storage
+
+BLOB_PREFIX = "blobs"
+# release() leaves files written or reused more recently than this to the GC
+RELEASE_GRACE_SECONDS = 15 * 60
+
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+class StoredBlob(NamedTuple):
+    key: str
+    digest: str
+    size: int
+    reused: bool
+
+
+def hash_stream(source: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """sha256 and length of a file object, read in chunks; rewinds it afterwards."""
+    digest = hashlib.sha256()
+    size = 0
+    source.seek(0)
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    source.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_key(digest: str, filename: Optional[str] = None) -> str:
+    # The extension stays on the key so static serving and presigned
+    # downloads get a sensible content type. Identical bytes under a different
+    # extension make a second blob, which in practice never happens for decks.
+    ext = Path(filename or "").suffix.lower()
+    if not _EXTENSION.match(ext):
+        ext = ""
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest}{ext}"
+
+
+async def store_upload(file: UploadFile, progress: Optional[Progress] = None) -> StoredBlob:
+    """
+    Store an upload by content. The spooled upload is hashed in a worker
+    thread first; if a blob with that digest is already stored the upload
+    costs nothing more, otherwise it's written under its digest key.
+    A reused blob is touched, so release() won't delete it from under the
+    asset row we're about to commit.
+    """
+    digest, size = await run_blocking(hash_stream, file.file)
+    key = blob_key(digest, file.filename)
+    if await storage.touch(key):
+        if progress:
+            progress(size)
+        return StoredBlob(key, digest, size, True)
+    await storage.put(file.file, key, file.content_type, progress)
+    return StoredBlob(key, digest, size, False)
+
+
+async def reference_counts(db: AsyncSession, keys: Iterable[str]) -> dict:
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    result = await db.execute(
+        select(AssetModel.file_path, func.count(AssetModel.id))
+        .where(AssetModel.file_path.in_(keys))
+        .group_by(AssetModel.file_path)
+    )
+    counts = dict.fromkeys(keys, 0)
+    counts.update(dict(result.all()))
+    return counts
+
+
+async def _delete_settled(keys: List[str], provider: Optional[str] = None) -> List[str]:
+    # A file written or touched within the grace period may be about to be
+    # referenced by an upload that hasn't committed yet; the GC gets it later
+    cutoff = time.time() - RELEASE_GRACE_SECONDS
+    settled = []
+    for key in keys:
+        modified = await storage.modified(key, provider)
+        if modified is not None and modified < cutoff:
+            settled.append(key)
+    return await storage.delete_many(settled, provider) if settled else []
+
+
+async def release(db: AsyncSession, keys: Iterable[str]) -> List[str]:
+    """
+    Delete stored files no asset references any more. Call after the commit
+    that dropped the reference. Returns the keys deleted.
+    """
+    unreferenced = [key for key, count in (await reference_counts(db, [k for k in keys if k])).items() if not count]
+    if not unreferenced:
+        return []
+    deleted = set(await _delete_settled(unreferenced))
+    if storage.active_provider == "s3":
+        # Files migrated to S3 may still have their local copy
+        deleted.update(await _delete_settled(unreferenced, "local"))
+    return [key for key in unreferenced if key in deleted]
@@ -0,0 +1,553 @@
+import csv
+import io
+import json
+import typing
+import uuid
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import yaml
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import JSON, delete, insert, update
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from ..database import dialect_insert
+from ..models import (
+    AssetCreate, BulkImportResult, BulkImportRowIssue, OpportunityInput, PersonCreate, PlayCreate
+)
+from ..models_db import (
+    AssetModel, GTMPlayModel, OpportunityModel, OpportunityPlayModel, OpportunityStageInstanceModel,
+    PersonModel, TagModel, TechnologyModel,
+    asset_tags, opportunity_technologies, person_technologies, play_tags, play_technologies
+)
+from .play_index import play_index
+from .play_stages import populate_stages_from_scope
+from .asset_recommender import asset_recommender
+from .similarity_index import similarity_index
+from .skill_index import skill_index
+from .workload import sync_opportunity_members
+
+# Rows validated and written per transaction
+IMPORT_CHUNK_SIZE = 500
+
+# CSV cells for list fields are split on this, unless they hold a JSON array
+LIST_SEPARATOR = ';'
+
+SUPPORTED_EXTENSIONS = ('.csv', '.json', '.ndjson', '.jsonl', '.yaml', '.yml')
+
+
+# --- Parsing ---
+
+def iter_records(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[int, Any, Optional[str]]]:
+    """Yield (row number, record, parse error). CSV and NDJSON are read lazily."""
+    name = filename.lower()
+
+    if name.endswith('.csv'):
+        reader = csv.DictReader(io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+        for row_no, row in enumerate(reader, start=2):
+            # Empty cells fall back to schema defaults
+            yield row_no, {k: v for k, v in row.items() if k and v not in (None, '')}, None
+
+    elif name.endswith(('.ndjson', '.jsonl')):
+        for row_no, line in enumerate(io.TextIOWrapper(fileobj, encoding='utf-8-sig'), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield row_no, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield row_no, None, f"Invalid JSON: {e.msg}"
+
+    elif name.endswith(('.json', '.yaml', '.yml')):
+        data = json.load(fileobj) if name.endswith('.json') else yaml.safe_load(fileobj)
+        if isinstance(data, dict) and 'items' in data:
+            data = data['items']
+        if not isinstance(data, list):
+            raise ValueError("Document must be a list or object with 'items' key")
+        for row_no, record in enumerate(data, start=1):
+            yield row_no, record, None
+
+    else:
+        raise ValueError("Unsupported file format. Use CSV, JSON, NDJSON or YAML.")
+
+
+def _structured_kind(annotation) -> Optional[type]:
+    """Return list/dict if a schema field expects a structured value."""
+    origin = typing.get_origin(annotation)
+    if origin is Union:
+        for arg in typing.get_args(annotation):
+            kind = _structured_kind(arg)
+            if kind:
+                return kind
+        return None
+    if origin is list:
+        return list
+    if origin is dict or (isinstance(annotation, type) and issubclass(annotation, BaseModel)):
+        return dict
+    return None
+
+
+def _coerce_cells(schema, record: Dict[str, Any]) -> Dict[str, Any]:
+    # Flat sources (CSV) carry lists as "a;b" or JSON, and nested objects as JSON
+    coerced = {}
+    for key, value in record.items():
+        field = schema.model_fields.get(key)
+        if field is not None and isinstance(value, str):
+            kind = _structured_kind(field.annotation)
+            text = value.strip()
+            if kind is not None and text[:1] in ('[', '{'):
+                value = json.loads(text)
+            elif kind is list:
+                value = [v.strip() for v in text.split(LIST_SEPARATOR) if v.strip()]
+        coerced[key] = value
+    return coerced
+
+
+def validate_record(schema, record: Any) -> BaseModel:
+    if not isinstance(record, dict):
+        raise ValueError("Row must be an object")
+    try:
+        return schema(**_coerce_cells(schema, record))
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+        ))
+
+
+# --- Entity definitions ---
+
+class LinkSpec:
+    """A many-to-many association written alongside the entity rows."""
+
+    def __init__(self, table, owner_column: str, target_column: str, attr: str, target_model):
+        self.table = table
+        self.owner_column = owner_column
+        self.target_column = target_column
+        self.attr = attr
+        self.target_model = target_model
+
+
+class EntitySpec:
+    def __init__(
+        self,
+        name: str,
+        model,
+        schema,
+        field_map: Dict[str, str],
+        key_fields: Tuple[str, ...] = ('external_id',),
+        links: Tuple[LinkSpec, ...] = (),
+        serial_id: bool = False,
+        defaults: Optional[Callable[[BaseModel, Dict[str, Any]], None]] = None,
+    ):
+        self.name = name
+        self.model = model
+        self.schema = schema
+        # schema field -> column
+        self.field_map = field_map
+        # unique columns that can identify an existing row
+        self.key_fields = key_fields
+        self.links = links
+        self.serial_id = serial_id
+        self.defaults = defaults
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+    def columns(self, item: BaseModel, partial: bool = False) -> Dict[str, Any]:
+        data = item.dict(exclude_unset=partial)
+        return {column: data[field] for field, column in self.field_map.items() if field in data}
+
+
+def _play_defaults(item: PlayCreate, row: Dict[str, Any]):
+    # Same stage auto-population as create_play
+    if not row.get('stages'):
+        row['stages'] = populate_stages_from_scope(item.stage_scope)
+
+
+def _asset_defaults(item: AssetCreate, row: Dict[str, Any]):
+    row['id'] = str(uuid.uuid4())
+    # Metadata-only assets, same placeholders as create_asset
+    row['original_filename'] = "placeholder"
+    row['file_path'] = f"placeholder_{uuid.uuid4()}"
+
+
+def _opportunity_defaults(item: OpportunityInput, row: Dict[str, Any]):
+    row['id'] = str(uuid.uuid4())
+    row['name'] = item.name or f"New Opportunity - {item.offering}"
+    row['account_name'] = item.account_name or "New Account"
+    row['team_member_user_ids'] = list(item.team_member_user_ids or [])
+    row['status'] = "active"
+    row['health'] = "green"
+
+
+def _person_defaults(item: PersonCreate, row: Dict[str, Any]):
+    row['id'] = str(uuid.uuid4())
+
+
+ENTITY_SPECS: Dict[str, EntitySpec] = {
+    "plays": EntitySpec(
+        "plays", GTMPlayModel, PlayCreate,
+        field_map={
+            'title': 'title', 'summary': 'description', 'offering': 'offering', 'sector': 'sector',
+            'geo': 'geo', 'stage_scope': 'stage_scope', 'stages': 'stages', 'owners': 'owners',
+            'collections': 'collections', 'default_team_members': 'default_team_members',
+            'external_id': 'external_id',
+        },
+        links=(
+            LinkSpec(play_technologies, 'play_id', 'technology_id', 'technologies', TechnologyModel),
+            LinkSpec(play_tags, 'play_id', 'tag_id', 'tags', TagModel),
+        ),
+        serial_id=True,
+        defaults=_play_defaults,
+    ),
+    "assets": EntitySpec(
+        "assets", AssetModel, AssetCreate,
+        field_map={
+            'title': 'title', 'description': 'description', 'kind': 'kind', 'uri': 'uri',
+            'purpose': 'purpose', 'default_stage': 'default_stage', 'owners': 'owners', 'links': 'links',
+            'linked_opportunity_ids': 'linked_opportunity_ids', 'linked_asset_ids': 'linked_asset_ids',
+            'offerings': 'offerings', 'linked_play_ids': 'linked_play_ids', 'technologies': 'technologies',
+            'external_id': 'external_id',
+        },
+        links=(
+            LinkSpec(asset_tags, 'asset_id', 'tag_id', 'tags', TagModel),
+        ),
+        defaults=_asset_defaults,
+    ),
+    "opportunities": EntitySpec(
+        "opportunities", OpportunityModel, OpportunityInput,
+        field_map={
+            'name': 'name', 'account_name': 'account_name', 'stage': 'sales_stage', 'geo': 'region',
+            'sector': 'industry', 'notes': 'problem_statement', 'tags': 'tags',
+            'team_member_user_ids': 'team_member_user_ids', 'external_id': 'external_id',
+        },
+        links=(
+            LinkSpec(opportunity_technologies, 'opportunity_id', 'technology_id', 'technologies', TechnologyModel),
+        ),
+        defaults=_opportunity_defaults,
+    ),
+    "people": EntitySpec(
+        "people", PersonModel, PersonCreate,
+        field_map={'name': 'name', 'email': 'email', 'role': 'role', 'region': 'region', 'external_id': 'external_id'},
+        key_fields=('external_id', 'email'),
+        links=(
+            LinkSpec(person_technologies, 'person_id', 'technology_id', 'technologies', TechnologyModel),
+        ),
+        defaults=_person_defaults,
+    ),
+}
+
+
+# --- Writing ---
+
+async def _copy_or_insert(db: AsyncSession, table, rows: List[Dict[str, Any]]):
+    """Insert rows with COPY on asyncpg, falling back to an executemany INSERT."""
+    if not rows:
+        return
+    if db.bind.dialect.driver == "asyncpg":
+        columns = list(rows[0].keys())
+        json_columns = {c for c in columns if isinstance(table.c[c].type, JSON)}
+        records = [
+            tuple(json.dumps(row[c]) if c in json_columns and row[c] is not None else row[c] for c in columns)
+            for row in rows
+        ]
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        import asyncpg
+        try:
+            await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            # COPY runs on the driver connection, past SQLAlchemy's error
+            # wrapping; re-raise so the chunk is rolled back and reported
+            raise DBAPIError(f"COPY {table.name}", None, e) from e
+    else:
+        await db.execute(insert(table), rows)
+
+
+async def _resolve_names(db: AsyncSession, Model, names: set) -> Dict[str, Any]:
+    if not names:
+        return {}
+    result = await db.execute(select(Model.name, Model.id).where(Model.name.in_(names)))
+    return dict(result.all())
+
+
+async def _resolve_tags(db: AsyncSession, names: set) -> Dict[str, Any]:
+    # Unknown tags are created on the fly, as in create_play
+    if names:
+        await db.execute(
+            dialect_insert(db, TagModel.__table__)
+            .values([{'name': n} for n in sorted(names)])
+            .on_conflict_do_nothing(index_elements=['name'])
+        )
+    return await _resolve_names(db, TagModel, names)
+
+
+def _link_rows(link: LinkSpec, owner_id, names, refs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    target_ids = dict.fromkeys(refs[n] for n in names or [] if n in refs)
+    return [{link.owner_column: owner_id, link.target_column: tid} for tid in target_ids]
+
+
+async def _attach_opportunity_plays(db: AsyncSession, creates, updates, existing_team, warn) -> List[Tuple[Any, list]]:
+    """Build opportunity_plays and stage instance rows, mirroring create/update_opportunity."""
+    requested = {}
+    for row_no, item, opp_id, fields in creates + updates:
+        if 'plays' not in item.dict(exclude_unset=True):
+            continue
+        ids = []
+        for pid in item.plays or []:
+            try:
+                ids.append(int(pid))
+            except (TypeError, ValueError):
+                warn(row_no, f"Invalid play id '{pid}'")
+        requested[opp_id] = (row_no, ids)
+
+    all_ids = {pid for _, ids in requested.values() for pid in ids}
+    if not all_ids:
+        return []
+    result = await db.execute(
+        select(GTMPlayModel.id, GTMPlayModel.stages, GTMPlayModel.default_team_members)
+        .where(GTMPlayModel.id.in_(all_ids))
+    )
+    plays = {pid: (stages, team) for pid, stages, team in result.all()}
+
+    # Plays are additive on update, like update_opportunity
+    attached = set()
+    update_ids = [opp_id for _, _, opp_id, _ in updates]
+    if update_ids:
+        result = await db.execute(
+            select(OpportunityPlayModel.opportunity_id, OpportunityPlayModel.play_id)
+            .where(OpportunityPlayModel.opportunity_id.in_(update_ids))
+        )
+        attached = set(result.all())
+
+    opp_play_rows = []
+    stage_rows = []
+    for row_no, item, opp_id, fields in creates + updates:
+        if opp_id not in requested:
+            continue
+        unknown = [str(pid) for pid in requested[opp_id][1] if pid not in plays]
+        if unknown:
+            warn(row_no, f"Unknown plays: {', '.join(unknown)}")
+
+        team = fields.get('team_member_user_ids')
+        if team is None:
+            team = list(existing_team.get(opp_id) or [])
+        for pid in dict.fromkeys(requested[opp_id][1]):
+            if pid not in plays or (opp_id, pid) in attached:
+                continue
+            stages, default_team = plays[pid]
+            opp_play_id = str(uuid.uuid4())
+            opp_play_rows.append({
+                'id': opp_play_id, 'opportunity_id': opp_id, 'play_id': pid,
+                'is_primary': False, 'is_active': True,
+            })
+            for stage in stages or []:
+                stage_rows.append({
+                    'id': str(uuid.uuid4()), 'opportunity_play_id': opp_play_id,
+                    'play_stage_key': stage['key'], 'status': "not_started", 'checklist_item_statuses': {},
+                })
+            # Copy default team members from play
+            for member in default_team or []:
+                if member not in team:
+                    team.append(member)
+        fields['team_member_user_ids'] = team
+
+    return [
+        (OpportunityPlayModel.__table__, opp_play_rows),
+        (OpportunityStageInstanceModel.__table__, stage_rows),
+    ]
+
+
+async def _write_chunk(db: AsyncSession, spec: EntitySpec, chunk, upsert_key: Optional[str], result: BulkImportResult, warn):
+    Model = spec.model
+
+    # 1. Look up existing rows by every unique key in one query per key
+    existing: Dict[str, Dict[Any, Any]] = {}
+    for field in spec.key_fields:
+        values = {getattr(item, field) for _, item in chunk if getattr(item, field, None)}
+        existing[field] = {}
+        if values:
+            rows = await db.execute(select(getattr(Model, field), Model.id).where(getattr(Model, field).in_(values)))
+            existing[field] = dict(rows.all())
+
+    creates, updates = [], []
+    for row_no, item in chunk:
+        target_id = existing[upsert_key].get(getattr(item, upsert_key)) if upsert_key else None
+        conflict = next((
+            f for f in spec.key_fields
+            if getattr(item, f, None) and existing[f].get(getattr(item, f)) not in (None, target_id)
+        ), None)
+        if conflict:
+            result.failed += 1
+            result.errors.append(BulkImportRowIssue(
+                row=row_no, key=getattr(item, conflict), message=f"{conflict} already exists"
+            ))
+            continue
+        if target_id is not None:
+            updates.append((row_no, item, target_id, spec.columns(item, partial=True)))
+        else:
+            row = spec.columns(item)
+            if spec.defaults:
+                spec.defaults(item, row)
+            creates.append((row_no, item, row.get('id'), row))
+
+    if not creates and not updates:
+        return
+
+    # 2. Resolve dictionary references for the whole chunk at once
+    refs: Dict[str, Dict[str, Any]] = {}
+    for link in spec.links:
+        names = set()
+        for _, item, _, _ in creates + updates:
+            names.update(getattr(item, link.attr) or [])
+        if link.target_model is TagModel:
+            refs[link.attr] = await _resolve_tags(db, names)
+        else:
+            refs[link.attr] = await _resolve_names(db, link.target_model, names)
+        for row_no, item, _, _ in creates + updates:
+            unknown = [n for n in getattr(item, link.attr) or [] if n not in refs[link.attr]]
+            if unknown:
+                warn(row_no, f"Unknown {link.attr}: {', '.join(unknown)}")
+
+    extra_rows = []
+    if spec.name == "opportunities":
+        existing_team = {}
+        if updates:
+            rows = await db.execute(
+                select(OpportunityModel.id, OpportunityModel.team_member_user_ids)
+                .where(OpportunityModel.id.in_([u[2] for u in updates]))
+            )
+            existing_team = dict(rows.all())
+        extra_rows = await _attach_opportunity_plays(db, creates, updates, existing_team, warn)
+
+    # 3. Write entity rows
+    if creates:
+        rows = [row for _, _, _, row in creates]
+        if spec.serial_id:
+            ids = (await db.execute(
+                insert(spec.table).returning(spec.table.c.id, sort_by_parameter_order=True), rows
+            )).scalars().all()
+            creates = [(row_no, item, new_id, row) for (row_no, item, _, row), new_id in zip(creates, ids)]
+        else:
+            await _copy_or_insert(db, spec.table, rows)
+
+    update_params = [dict(fields, id=target_id) for _, _, target_id, fields in updates if fields]
+    if update_params:
+        await db.execute(update(Model), update_params)
+
+    # 4. Write associations; updates replace only the lists present in the row
+    for link in spec.links:
+        replaced = [target_id for _, item, target_id, _ in updates if link.attr in item.dict(exclude_unset=True)]
+        if replaced:
+            await db.execute(delete(link.table).where(link.table.c[link.owner_column].in_(replaced)))
+        link_rows = []
+        for _, item, owner_id, _ in creates:
+            link_rows.extend(_link_rows(link, owner_id, getattr(item, link.attr), refs[link.attr]))
+        for _, item, owner_id, _ in updates:
+            if owner_id in replaced:
+                link_rows.extend(_link_rows(link, owner_id, getattr(item, link.attr), refs[link.attr]))
+        await _copy_or_insert(db, link.table, link_rows)
+
+    for table, rows in extra_rows:
+        await _copy_or_insert(db, table, rows)
+    if spec.name == "opportunities":
+        await sync_opportunity_members(db, [owner_id for _, _, owner_id, _ in creates + updates])
+
+    await db.commit()
+    if spec.name == "plays":
+        # Reload the match index on next use
+        play_index.invalidate()
+    elif spec.name in ("assets", "opportunities"):
+        # Asset features and the won-opportunity boost both come from these
+        asset_recommender.invalidate()
+    elif spec.name == "people":
+        skill_index.invalidate()
+    if spec.name == "assets":
+        await similarity_index.index_assets(db, [owner_id for _, _, owner_id, _ in creates + updates])
+    result.created += len(creates)
+    result.updated += len(updates)
+
+
+def _next_chunk(records, size: int):
+    return list(islice(records, size))
+
+
+async def import_entities(
+    db: AsyncSession,
+    entity: str,
+    fileobj: BinaryIO,
+    filename: str,
+    upsert_key: Optional[str] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> BulkImportResult:
+    """
+    Validate and write entity rows from an upload in chunked transactions.
+
+    Each chunk is committed on its own, so a failing chunk is reported per row
+    without discarding earlier ones. With upsert_key, rows whose key matches an
+    existing record update it (only the fields present in the row) instead of
+    being rejected as duplicates.
+    """
+    spec = ENTITY_SPECS[entity]
+    if upsert_key is not None and upsert_key not in spec.key_fields:
+        raise ValueError(f"Invalid upsert key '{upsert_key}'. Use one of: {', '.join(spec.key_fields)}")
+
+    result = BulkImportResult(entity=entity)
+
+    def warn(row_no: int, message: str):
+        result.warnings.append(BulkImportRowIssue(row=row_no, message=message))
+
+    records = iter_records(fileobj, filename)
+    seen = {field: set() for field in spec.key_fields}
+
+    while True:
+        batch = await run_in_threadpool(_next_chunk, records, chunk_size)
+        if not batch:
+            break
+
+        chunk = []
+        for row_no, record, error in batch:
+            result.total_processed += 1
+            item = None
+            if error is None:
+                try:
+                    item = validate_record(spec.schema, record)
+                except ValueError as e:
+                    error = str(e)
+            if item is not None:
+                duplicate = next((f for f in spec.key_fields if getattr(item, f, None) in seen[f]), None)
+                if duplicate:
+                    error = f"Duplicate {duplicate} '{getattr(item, duplicate)}' in file"
+            if error is not None:
+                result.failed += 1
+                result.errors.append(BulkImportRowIssue(row=row_no, message=error))
+                continue
+            for field in spec.key_fields:
+                if getattr(item, field, None):
+                    seen[field].add(getattr(item, field))
+            chunk.append((row_no, item))
+
+        if not chunk:
+            continue
+
+        errors_before, warnings_before = len(result.errors), len(result.warnings)
+        try:
+            await _write_chunk(db, spec, chunk, upsert_key, result, warn)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            # Nothing from the chunk was written, so its warnings don't apply
+            del result.warnings[warnings_before:]
+            message = f"Chunk rolled back: {getattr(e, 'orig', None) or e}"
+            # Rows already rejected while planning the chunk keep their own error
+            rejected = {issue.row for issue in result.errors[errors_before:]}
+            for row_no, item in chunk:
+                if row_no in rejected:
+                    continue
+                result.failed += 1
+                result.errors.append(BulkImportRowIssue(row=row_no, message=message))
+
+    return result
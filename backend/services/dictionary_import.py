@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple
+
+import yaml
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from ..database import dialect_insert
+
+# Rows parsed and inserted per round trip. Keeps memory flat for large uploads
+# and stays well below the bind-parameter limits of Postgres and SQLite.
+IMPORT_BATCH_SIZE = 1000
+
+STREAMING_EXTENSIONS = ('.csv', '.ndjson', '.jsonl')
+DOCUMENT_EXTENSIONS = ('.json', '.yaml', '.yml')
+SUPPORTED_EXTENSIONS = STREAMING_EXTENSIONS + DOCUMENT_EXTENSIONS
+
+# (row number, raw item, parse error)
+ParsedRow = Tuple[int, Any, Optional[str]]
+
+
+def _unwrap_document(data: Any, fmt: str) -> List[Any]:
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and 'items' in data:
+        return data['items']
+    raise ValueError(f"{fmt} must be a list or object with 'items' key")
+
+
+def iter_dictionary_rows(fileobj: BinaryIO, filename: str) -> Iterator[ParsedRow]:
+    """
+    Lazily parse an uploaded dictionary file.
+
+    CSV and NDJSON are read line by line so only the current batch is held in
+    memory. JSON and YAML documents have to be parsed whole; callers should
+    drive this generator from a worker thread so that never blocks the loop.
+    """
+    name = filename.lower()
+
+    if name.endswith('.csv'):
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        reader = csv.DictReader(text)
+        fields = reader.fieldnames or []
+        if 'value' not in fields and 'name' not in fields:
+            raise ValueError("CSV must have a 'value' or 'name' column")
+        # Row 1 is the header
+        for row_no, row in enumerate(reader, start=2):
+            # Allow 'name' as alias for 'value'
+            yield row_no, {'value': row.get('value') or row.get('name'), 'category': row.get('category')}, None
+
+    elif name.endswith(('.ndjson', '.jsonl')):
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+        for row_no, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield row_no, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield row_no, None, f"Invalid JSON: {e.msg}"
+
+    elif name.endswith('.json'):
+        for row_no, item in enumerate(_unwrap_document(json.load(fileobj), "JSON"), start=1):
+            yield row_no, item, None
+
+    elif name.endswith(('.yaml', '.yml')):
+        for row_no, item in enumerate(_unwrap_document(yaml.safe_load(fileobj), "YAML"), start=1):
+            yield row_no, item, None
+
+    else:
+        raise ValueError("Unsupported file format. Use JSON, YAML, CSV or NDJSON.")
+
+
+def normalize_item(item: Any) -> Tuple[str, Optional[str]]:
+    """Return (value, category) for a raw import item or raise ValueError."""
+    if isinstance(item, str):
+        value, category = item, None
+    elif isinstance(item, dict):
+        value = item.get('value') or item.get('name')
+        category = item.get('category') or None
+    else:
+        raise ValueError(f"Unsupported item type '{type(item).__name__}'")
+
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("Missing 'value'")
+    return value.strip(), category
+
+
+def _next_batch(rows: Iterator[ParsedRow], size: int) -> List[ParsedRow]:
+    return list(islice(rows, size))
+
+
+async def import_dictionary_items(
+    db: AsyncSession,
+    Model,
+    fileobj: BinaryIO,
+    filename: str,
+    with_category: bool = False,
+    dry_run: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """
+    Import dictionary options from an upload in set-based batches.
+
+    Parsing runs in the threadpool one batch at a time, duplicates are dropped
+    in memory and each batch is written with a single
+    INSERT ... ON CONFLICT DO NOTHING. With dry_run nothing is written; existing
+    names are looked up per batch so the report matches a real run.
+    """
+    parsed = iter_dictionary_rows(fileobj, filename)
+
+    seen = set()
+    added = 0
+    skipped = 0
+    processed = 0
+    errors = []
+
+    while True:
+        batch = await run_in_threadpool(_next_batch, parsed, batch_size)
+        if not batch:
+            break
+
+        values = []
+        for row_no, item, error in batch:
+            processed += 1
+            if error is None:
+                try:
+                    value, category = normalize_item(item)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                errors.append(f"Row {row_no}: {error}")
+                continue
+
+            if value in seen:
+                skipped += 1
+                continue
+            seen.add(value)
+
+            row = {'name': value}
+            if with_category:
+                row['category'] = category
+            values.append(row)
+
+        if not values:
+            continue
+
+        if dry_run:
+            existing = await db.execute(
+                select(Model.name).where(Model.name.in_([v['name'] for v in values]))
+            )
+            inserted = len(values) - len(existing.scalars().all())
+        else:
+            stmt = (
+                dialect_insert(db, Model.__table__)
+                .values(values)
+                .on_conflict_do_nothing(index_elements=['name'])
+                .returning(Model.name)
+            )
+            inserted = len((await db.execute(stmt)).all())
+
+        added += inserted
+        skipped += len(values) - inserted
+
+    if not dry_run:
+        await db.commit()
+
+    return {
+        "status": "success",
+        "dry_run": dry_run,
+        "added": added,
+        "skipped": skipped,
+        "total_processed": processed,
+        "errors": errors,
+    }
@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import re
+import secrets
+import time
+import uuid
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import AssetModel
+from .s3_storage import MAX_PARTS, S3StorageProvider
+from .storage import run_blocking, storage
+
+DIRECT_UPLOAD_PREFIX = "uploads"
+PLAN_EXPIRES_IN = 3600
+
+# Completion tokens are signed so any worker can finish an upload another
+# worker planned. Set UPLOAD_TOKEN_SECRET when running more than one process.
+_SECRET = (os.getenv("UPLOAD_TOKEN_SECRET") or secrets.token_hex(32)).encode()
+if not os.getenv("UPLOAD_TOKEN_SECRET"):
+    print("Warning: UPLOAD_TOKEN_SECRET is not set; direct upload tokens only verify in the process that issued them")
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def safe_name(filename: str) -> str:
+    return _UNSAFE.sub('_', filename).strip('._') or 'file'
+
+
+def _sign(payload: dict) -> str:
+    body = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+    mac = hmac.new(_SECRET, body.encode(), hashlib.sha256).hexdigest()
+    return f"{body}.{mac}"
+
+
+def read_token(token: str) -> dict:
+    body, _, mac = token.rpartition(".")
+    if not body or not hmac.compare_digest(mac, hmac.new(_SECRET, body.encode(), hashlib.sha256).hexdigest()):
+        raise HTTPException(status_code=400, detail="Invalid upload token")
+    payload = json.loads(base64.urlsafe_b64decode(body))
+    if payload["exp"] < time.time():
+        raise HTTPException(status_code=410, detail="Upload token expired")
+    return payload
+
+
+def multipart_etag(part_etags: List[str]) -> str:
+    """The ETag S3 gives a completed multipart object: md5 of the part md5s, then -N."""
+    digests = b"".join(bytes.fromhex(etag.strip('"')) for etag in part_etags)
+    return f'"{hashlib.md5(digests).hexdigest()}-{len(part_etags)}"'
+
+
+def _provider() -> S3StorageProvider:
+    provider = storage.s3_provider()
+    if provider is None:
+        raise HTTPException(status_code=409, detail="Direct uploads need the S3 storage provider")
+    return provider
+
+
+async def plan_upload(filename: str, content_type: Optional[str], size: int) -> dict:
+    """
+    Where and how the browser should send the file: a presigned POST form for
+    files under the multipart threshold, otherwise a multipart upload with a
+    presigned PUT URL per part. Direct uploads land under uploads/<id>/
+    rather than the content-addressed blobs/, since we never see the bytes.
+    """
+    provider = _provider()
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    content_type = content_type or "application/octet-stream"
+    key = f"{DIRECT_UPLOAD_PREFIX}/{uuid.uuid4()}/{safe_name(filename)}"
+    expires_at = int(time.time()) + PLAN_EXPIRES_IN
+    payload = {"key": key, "size": size, "type": content_type, "name": filename, "exp": expires_at}
+
+    if size < provider.multipart_threshold:
+        post = await run_blocking(provider.presigned_post, key, content_type, size, PLAN_EXPIRES_IN)
+        return {"token": _sign(payload), "key": key, "method": "post", "expires_at": expires_at,
+                "post_url": post["url"], "post_fields": post["fields"], "part_size": None, "parts": []}
+
+    # S3 allows at most 10,000 parts, so very large files get bigger parts
+    part_size = max(provider.part_size, math.ceil(size / MAX_PARTS))
+    count = math.ceil(size / part_size)
+    upload_id = await run_blocking(provider.create_multipart, key, content_type)
+
+    def sign_parts():
+        return [
+            {"part_number": n, "url": provider.presigned_part_url(key, upload_id, n, PLAN_EXPIRES_IN)}
+            for n in range(1, count + 1)
+        ]
+
+    parts = await run_blocking(sign_parts)
+    payload.update(upload_id=upload_id, part_size=part_size, parts=count)
+    return {"token": _sign(payload), "key": key, "method": "multipart", "expires_at": expires_at,
+            "post_url": None, "post_fields": {}, "part_size": part_size, "parts": parts}
+
+
+async def complete_upload(db: AsyncSession, token: str, etag: Optional[str] = None,
+                          parts: Optional[List[dict]] = None) -> dict:
+    """
+    Finish a browser upload and check what landed in the bucket matches the
+    plan: exact size, and the ETag the client (multipart: its parts) reported.
+    Each token completes one asset. Returns {key, filename, content_type, size}.
+    """
+    plan = read_token(token)
+    provider = _provider()
+    key = plan["key"]
+    result = await db.execute(select(AssetModel.id).where(AssetModel.file_path == key).limit(1))
+    if result.scalar() is not None:
+        raise HTTPException(status_code=409, detail="Upload already completed")
+
+    if "upload_id" in plan:
+        parts = sorted(parts or [], key=lambda p: p["part_number"])
+        if [p["part_number"] for p in parts] != list(range(1, plan["parts"] + 1)):
+            raise HTTPException(status_code=400, detail=f"Expected parts 1..{plan['parts']}")
+        etags = [p["etag"] for p in parts]
+        try:
+            await run_blocking(provider.complete_multipart, key, plan["upload_id"],
+                               [{"PartNumber": p["part_number"], "ETag": p["etag"]} for p in parts])
+        except Exception as e:
+            # A finished upload can be completed again (retries); anything else is fatal
+            if await run_blocking(provider.head, key) is None:
+                await run_blocking(provider.abort_multipart, key, plan["upload_id"])
+                raise HTTPException(status_code=409, detail=f"Could not complete upload: {e}")
+        etag = multipart_etag(etags)
+
+    head = await run_blocking(provider.head, key)
+    if head is None:
+        raise HTTPException(status_code=409, detail="Upload not found in bucket")
+    problem = None
+    if head["ContentLength"] != plan["size"]:
+        problem = f"Expected {plan['size']} bytes, bucket has {head['ContentLength']}"
+    elif etag and head["ETag"].strip('"') != etag.strip('"'):
+        problem = "ETag mismatch"
+    if problem:
+        await storage.delete(key)
+        raise HTTPException(status_code=409, detail=problem)
+
+    return {"key": key, "filename": plan["name"], "content_type": plan["type"], "size": plan["size"]}
@@ -0,0 +1,263 @@
+import re
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from ..database import dialect_insert
+from ..models_db import AssetModel, AssetSignatureModel, ExtractedTextModel, TagModel, asset_tags
+from .text_extraction import INDEXED_TEXT_CHARS
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a bucket,
+# pairs below ~0.5 almost never do
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.7
+
+SHINGLE_SIZE = 5
+# A bucket this large means degenerate text (boilerplate titles); comparing
+# every pair in it would be the quadratic scan we're avoiding
+MAX_BUCKET_SIZE = 500
+SIGNATURE_BATCH_SIZE = 500
+
+# Universal hashing (a*x + b) mod p. Seeded: signatures are persisted, so the
+# permutations must be identical across processes and releases.
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(20261018)
+_A = _rng.randint(1, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 2**32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def shingles(text: str, metadata: Tuple[str, ...] = ()) -> np.ndarray:
+    """Hashed character shingles of normalized text, plus exact metadata features."""
+    text = _NON_WORD.sub(" ", text.lower()).strip()
+    grams = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))} if text else set()
+    grams.update(metadata)
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashes: np.ndarray) -> Optional[np.ndarray]:
+    if hashes.size == 0:
+        return None
+    values = ((hashes[:, None] * _A) % _PRIME + _B) % _PRIME
+    return (values.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def lsh_clusters(ids: List[str], signatures: np.ndarray, threshold: float = DUPLICATE_THRESHOLD) -> List[dict]:
+    """
+    Group near-duplicates: band the signatures, compare only assets that share
+    a bucket, and union pairs whose estimated similarity clears the threshold.
+    """
+    n = len(ids)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    pairs: Dict[Tuple[int, int], float] = {}
+    for band in range(BANDS):
+        block = np.ascontiguousarray(signatures[:, band * ROWS:(band + 1) * ROWS])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * ROWS))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for bucket in np.flatnonzero((counts > 1) & (counts <= MAX_BUCKET_SIZE)):
+            members = order[starts[bucket]:starts[bucket] + counts[bucket]]
+            sigs = signatures[members]
+            sims = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=2)
+            for i, j in zip(*np.nonzero(np.triu(sims >= threshold, k=1))):
+                a, b = sorted((int(members[i]), int(members[j])))
+                if (a, b) not in pairs:
+                    pairs[(a, b)] = float(sims[i, j])
+                    parent[find(a)] = find(b)
+
+    clusters: Dict[int, dict] = {}
+    for (a, b), sim in pairs.items():
+        cluster = clusters.setdefault(find(a), {"members": set(), "pairs": []})
+        cluster["members"].update((a, b))
+        cluster["pairs"].append((ids[a], ids[b], round(sim, 4)))
+
+    result = [
+        {
+            "asset_ids": sorted(ids[m] for m in c["members"]),
+            "similarity": max(p[2] for p in c["pairs"]),
+            "pairs": sorted(c["pairs"], key=lambda p: -p[2]),
+        }
+        for c in clusters.values()
+    ]
+    result.sort(key=lambda c: (-c["similarity"], -len(c["asset_ids"]), c["asset_ids"][0]))
+    return result
+
+
+class DuplicateDetector:
+    """
+    MinHash signatures per asset (persisted in asset_signatures) and an LSH
+    scan that reports near-duplicate clusters.
+
+    Uploads keep signatures current through update_signature(); the scan job
+    fills in any that are missing or older than the asset, then clusters.
+    The last report is kept in memory for the admin endpoint.
+    """
+
+    def __init__(self):
+        self.status = "idle"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.signatures_updated = 0
+        self.assets_scanned = 0
+        self.threshold = DUPLICATE_THRESHOLD
+        self.error: Optional[str] = None
+        self.clusters: List[dict] = []
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def queue(self, threshold: float):
+        self.status = "queued"
+        self.threshold = threshold
+        self.error = None
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "signatures_updated": self.signatures_updated,
+            "assets_scanned": self.assets_scanned,
+            "threshold": self.threshold,
+            "error": self.error,
+            "clusters": self.clusters,
+        }
+
+    # --- Signatures ---
+
+    async def _documents(self, db: AsyncSession, asset_ids: List[str]) -> List[Tuple[str, str, Tuple[str, ...]]]:
+        tags_by_asset: Dict[str, List[str]] = {}
+        result = await db.execute(
+            select(asset_tags.c.asset_id, TagModel.name)
+            .join(TagModel, TagModel.id == asset_tags.c.tag_id)
+            .where(asset_tags.c.asset_id.in_(asset_ids))
+        )
+        for asset_id, name in result.all():
+            tags_by_asset.setdefault(asset_id, []).append(name)
+
+        result = await db.execute(
+            select(AssetModel.id, AssetModel.title, AssetModel.description, AssetModel.purpose,
+                   AssetModel.original_filename, AssetModel.mime_type, AssetModel.size_bytes,
+                   func.substr(ExtractedTextModel.text, 1, INDEXED_TEXT_CHARS))
+            .outerjoin(ExtractedTextModel, ExtractedTextModel.content_hash == AssetModel.content_hash)
+            .where(AssetModel.id.in_(asset_ids))
+        )
+        docs = []
+        for asset_id, title, description, purpose, filename, mime_type, size, body in result.all():
+            text = " ".join(p for p in (title, description, purpose, filename, *sorted(tags_by_asset.get(asset_id, [])), body) if p)
+            metadata = tuple(f"\x00{k}:{v}" for k, v in (("mime", mime_type), ("size", size)) if v)
+            docs.append((asset_id, text, metadata))
+        return docs
+
+    @staticmethod
+    def _compute(docs) -> List[dict]:
+        rows = []
+        for asset_id, text, metadata in docs:
+            signature = minhash(shingles(text, metadata))
+            if signature is not None:
+                rows.append({"asset_id": asset_id, "signature": signature.astype("<u4").tobytes()})
+        return rows
+
+    async def _store(self, db: AsyncSession, rows: List[dict]):
+        if not rows:
+            return
+        stmt = dialect_insert(db, AssetSignatureModel.__table__).values(
+            [dict(r, computed_at=func.now()) for r in rows]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["asset_id"],
+            set_={"signature": stmt.excluded.signature, "computed_at": func.now()},
+        )
+        await db.execute(stmt)
+
+    async def update_signature(self, db: AsyncSession, asset_id: str):
+        """Recompute one asset's signature after upload or edit."""
+        await self.update_signatures(db, [asset_id])
+
+    async def update_signatures(self, db: AsyncSession, asset_ids: List[str]):
+        docs = await self._documents(db, asset_ids)
+        await self._store(db, await run_in_threadpool(self._compute, docs))
+        await db.commit()
+
+    async def refresh_signatures(self, db: AsyncSession) -> int:
+        """Compute signatures that are missing or older than their asset."""
+        result = await db.execute(
+            select(AssetModel.id)
+            .outerjoin(AssetSignatureModel, AssetSignatureModel.asset_id == AssetModel.id)
+            .where(or_(AssetSignatureModel.asset_id.is_(None), AssetModel.updated_at >= AssetSignatureModel.computed_at))
+        )
+        stale = result.scalars().all()
+        updated = 0
+        for start in range(0, len(stale), SIGNATURE_BATCH_SIZE):
+            docs = await self._documents(db, stale[start:start + SIGNATURE_BATCH_SIZE])
+            rows = await run_in_threadpool(self._compute, docs)
+            await self._store(db, rows)
+            await db.commit()
+            updated += len(rows)
+        return updated
+
+    # --- Scan ---
+
+    async def find_clusters(self, db: AsyncSession, threshold: float = DUPLICATE_THRESHOLD) -> List[dict]:
+        result = await db.execute(select(AssetSignatureModel.asset_id, AssetSignatureModel.signature))
+        rows = result.all()
+        self.assets_scanned = len(rows)
+        if len(rows) < 2:
+            return []
+        ids = [r[0] for r in rows]
+        signatures = np.frombuffer(b"".join(r[1] for r in rows), dtype="<u4").reshape(len(rows), NUM_PERM)
+        clusters = await run_in_threadpool(lsh_clusters, ids, signatures, threshold)
+
+        clustered = {asset_id for c in clusters for asset_id in c["asset_ids"]}
+        titles = {}
+        if clustered:
+            result = await db.execute(select(AssetModel.id, AssetModel.title).where(AssetModel.id.in_(clustered)))
+            titles = dict(result.all())
+        for c in clusters:
+            c["assets"] = [{"id": asset_id, "title": titles.get(asset_id)} for asset_id in c.pop("asset_ids")]
+            c["pairs"] = [{"asset_id": a, "other_asset_id": b, "similarity": s} for a, b, s in c["pairs"]]
+        return clusters
+
+    async def run_scan(self, bind, threshold: float = DUPLICATE_THRESHOLD):
+        """Background job: refresh signatures, then cluster. Uses its own session."""
+        self.status = "running"
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self.threshold = threshold
+        self.error = None
+        try:
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                self.signatures_updated = await self.refresh_signatures(db)
+                self.clusters = await self.find_clusters(db, threshold)
+            self.status = "completed"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now(timezone.utc)
+
+
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import AssetModel
+from . import markdown_render
+from .asset_processing import asset_processing
+from .storage import run_blocking
+
+# Bigger markdown files are only offered as a download
+MARKDOWN_MAX_MB = int(os.getenv("MARKDOWN_MAX_MB", "5"))
+
+
+class MarkdownTooLarge(Exception):
+    pass
+
+
+class MarkdownCache:
+    """
+    Rendered HTML and table of contents for markdown assets, kept on disk.
+
+    One JSON file per content hash and render version, so repeat views are a
+    file read and assets sharing a blob share the render. An edited file gets
+    a new hash and so a new entry; update_asset discards the old one once no
+    asset has that content any more. Bumping markdown_render.RENDER_VERSION
+    orphans every entry, and they're rebuilt on the next view. Rendering runs
+    in the asset_processing worker pool.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("MARKDOWN_CACHE_DIR", "data/markdown_cache"))
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.v{markdown_render.RENDER_VERSION}.json"
+
+    def _read(self, digest: str) -> Optional[dict]:
+        try:
+            return json.loads(self._path(digest).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, digest: str, rendered: dict):
+        path = self._path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Readers never see a half written entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(rendered, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _discard(self, digest: str):
+        for path in (self.directory / digest[:2]).glob(f"{digest}.v*.json"):
+            path.unlink(missing_ok=True)
+
+    async def get(self, digest: str) -> Optional[dict]:
+        return await run_blocking(self._read, digest)
+
+    async def put(self, digest: str, rendered: dict):
+        await run_blocking(self._write, digest, rendered)
+
+    async def render(self, asset: AssetModel) -> dict:
+        """html, toc and title for a markdown asset, from the cache when it's there."""
+        if asset.size_bytes and asset.size_bytes > MARKDOWN_MAX_MB * 1024 * 1024:
+            raise MarkdownTooLarge(f"Markdown over {MARKDOWN_MAX_MB} MB isn't rendered")
+        digest = asset.content_hash
+        if digest:
+            cached = await self.get(digest)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        self.misses += 1
+        async with asset_processing.local_copy(asset.file_path, digest, asset.storage_provider) as path:
+            rendered = await asset_processing.submit(markdown_render.render_file, str(path))
+        # Rows from before content hashing are rendered every time
+        if digest:
+            await self.put(digest, rendered)
+        return rendered
+
+    async def invalidate(self, db: AsyncSession, digests: Iterable[Optional[str]]):
+        """Drop renders for content no asset has any more."""
+        digests = {d for d in digests if d}
+        if not digests:
+            return
+        result = await db.execute(
+            select(AssetModel.content_hash).distinct().where(AssetModel.content_hash.in_(digests))
+        )
+        for digest in digests - set(result.scalars().all()):
+            await run_blocking(self._discard, digest)
+
+
+markdown_cache = MarkdownCache()
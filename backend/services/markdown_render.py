@@ -0,0 +1,68 @@
+"""
+Markdown to HTML for markdown assets, with a table of contents.
+
+Pure functions that run in the asset_processing worker pool (see
+services/markdown_cache.py). Uses markdown-it-py with raw HTML turned off,
+so any HTML in the source comes out escaped, and its link validation, which
+drops javascript:, vbscript:, file: and non-image data: URLs. The output is
+safe to insert as is.
+"""
+import re
+import unicodedata
+from typing import Dict, List
+
+# Part of the cache key: bump when the HTML we produce changes
+RENDER_VERSION = 1
+
+_SLUG_DROP = re.compile(r"[^\w\s-]")
+_SLUG_SPACE = re.compile(r"[\s_-]+")
+
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _SLUG_SPACE.sub("-", _SLUG_DROP.sub("", text).strip().lower()).strip("-") or "section"
+
+
+class RendererUnavailable(Exception):
+    """markdown-it-py isn't installed."""
+
+
+def _parser():
+    try:
+        from markdown_it import MarkdownIt
+    except ImportError:
+        raise RendererUnavailable("Markdown rendering needs the markdown-it-py package")
+    return MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+
+def render(source: str) -> dict:
+    """html, toc ([{level, id, title}] in document order) and title (the first h1)."""
+    md = _parser()
+    tokens = md.parse(source)
+    toc: List[dict] = []
+    used: Dict[str, int] = {}
+    for i, token in enumerate(tokens):
+        if token.type == "heading_open":
+            inline = tokens[i + 1]
+            title = "".join(c.content for c in inline.children or [] if c.type in ("text", "code_inline")).strip()
+            slug = slugify(title)
+            # Repeated headings get -1, -2.. like GitHub does
+            if slug in used:
+                used[slug] += 1
+                slug = f"{slug}-{used[slug]}"
+            else:
+                used[slug] = 0
+            token.attrSet("id", slug)
+            toc.append({"level": int(token.tag[1]), "id": slug, "title": title})
+        elif token.type == "inline":
+            for child in token.children or []:
+                if child.type == "link_open" and re.match(r"[a-z][a-z0-9+.-]*:", child.attrGet("href") or "", re.I):
+                    child.attrSet("rel", "nofollow noopener noreferrer")
+    html = md.renderer.render(tokens, md.options, {})
+    title = next((entry["title"] for entry in toc if entry["level"] == 1), None)
+    return {"html": html, "toc": toc, "title": title}
+
+
+def render_file(path: str) -> dict:
+    with open(path, "rb") as f:
+        return render(f.read().decode("utf-8-sig", errors="replace"))
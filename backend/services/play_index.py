@@ -0,0 +1,170 @@
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import GTMPlayModel
+
+# Criterion weights, same as the original in-Python matcher
+OFFERING_WEIGHT = 3
+SECTOR_WEIGHT = 2
+GEO_WEIGHT = 2
+STAGE_WEIGHT = 1
+
+# Values on a play that match any requested value for that dimension
+WILDCARDS = {
+    "offering": set(),
+    "sector": {"all", "cross-sector", "x-sector"},
+    "geo": {"global", "all"},
+    "stage": {"all"},
+}
+
+# Other workers may change plays; reload at most this often to pick that up
+RELOAD_INTERVAL_SECONDS = 60
+
+
+def tokenize(value: Optional[str]) -> Set[str]:
+    """Normalize a comma separated metadata string into a token set."""
+    if not value:
+        return set()
+    return {t.strip().lower() for t in value.split(",") if t.strip()}
+
+
+class PlayMatchIndex:
+    """
+    Inverted index of plays by offering, sector, geo and stage tokens.
+
+    Matching keeps the substring semantics of the original matcher (a requested
+    "cloud" matches a play offering "hybrid cloud"), but the substring test runs
+    against the small token vocabulary of each dimension rather than against
+    every play, and scores are accumulated from posting lists.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Set[int]]] = {dim: {} for dim in WILDCARDS}
+        self._wildcards: Dict[str, Set[int]] = {dim: set() for dim in WILDCARDS}
+        self._tokens: Dict[int, Dict[str, Set[str]]] = {}
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    # --- Maintenance ---
+
+    async def load(self, db: AsyncSession):
+        result = await db.execute(select(
+            GTMPlayModel.id, GTMPlayModel.offering, GTMPlayModel.sector, GTMPlayModel.geo,
+            GTMPlayModel.sales_stage, GTMPlayModel.stage_scope
+        ))
+        self.clear()
+        for row in result.all():
+            self.upsert(*row)
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > RELOAD_INTERVAL_SECONDS:
+            await self.load(db)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def clear(self):
+        for dim in WILDCARDS:
+            self._postings[dim] = {}
+            self._wildcards[dim] = set()
+        self._tokens = {}
+
+    def upsert(self, play_id: int, offering: Optional[str], sector: Optional[str], geo: Optional[str],
+               sales_stage: Optional[str] = None, stage_scope: Optional[Iterable[str]] = None):
+        self.remove(play_id)
+        tokens = {
+            "offering": tokenize(offering),
+            "sector": tokenize(sector),
+            "geo": tokenize(geo),
+            # V1 plays use sales_stage, V2 plays use stage_scope
+            "stage": tokenize(sales_stage) | {s.strip().lower() for s in stage_scope or [] if s and s.strip()},
+        }
+        self._tokens[play_id] = tokens
+        for dim, values in tokens.items():
+            for token in values:
+                if token in WILDCARDS[dim]:
+                    self._wildcards[dim].add(play_id)
+                self._postings[dim].setdefault(token, set()).add(play_id)
+
+    def upsert_play(self, play: GTMPlayModel):
+        self.upsert(play.id, play.offering, play.sector, play.geo, play.sales_stage, play.stage_scope)
+
+    def remove(self, play_id: int):
+        tokens = self._tokens.pop(play_id, None)
+        if not tokens:
+            return
+        for dim, values in tokens.items():
+            self._wildcards[dim].discard(play_id)
+            for token in values:
+                posting = self._postings[dim].get(token)
+                if posting is not None:
+                    posting.discard(play_id)
+                    if not posting:
+                        del self._postings[dim][token]
+
+    # --- Querying ---
+
+    def _matching(self, dim: str, needles: Iterable[str]) -> Set[int]:
+        matched = set(self._wildcards[dim])
+        for needle in needles:
+            needle = needle.strip().lower()
+            if not needle:
+                continue
+            for token, posting in self._postings[dim].items():
+                if needle in token:
+                    matched |= posting
+        return matched
+
+    def match(
+        self,
+        offering: Optional[List[str]] = None,
+        industry: Optional[str] = None,
+        region: Optional[str] = None,
+        stage: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, int]]:
+        """Return [(play_id, score percent)] for the top matches, best first."""
+        criteria = []
+        if offering:
+            criteria.append(("offering", offering, OFFERING_WEIGHT))
+        if industry and industry != 'X-SECTOR':
+            criteria.append(("sector", [industry], SECTOR_WEIGHT))
+        if region and region != 'GLOBAL':
+            criteria.append(("geo", [region], GEO_WEIGHT))
+        if stage:
+            criteria.append(("stage", [stage], STAGE_WEIGHT))
+
+        if not criteria:
+            # Browsing without filters: everything matches fully
+            if offering or industry or region or stage:
+                return []
+            ids = sorted(self._tokens)
+            return [(pid, 100) for pid in (ids[:limit] if limit else ids)]
+
+        total = sum(weight for _, _, weight in criteria)
+        scores: Dict[int, int] = {}
+        for dim, needles, weight in criteria:
+            for pid in self._matching(dim, needles):
+                scores[pid] = scores.get(pid, 0) + weight
+
+        ranked = [(pid, int(score / total * 100)) for pid, score in scores.items()]
+        ranked = [r for r in ranked if r[1] > 0]
+        # Ties keep ascending id order
+        key = lambda r: (r[1], -r[0])
+        if limit:
+            return heapq.nlargest(limit, ranked, key=key)
+        return sorted(ranked, key=key, reverse=True)
+
+
+play_index = PlayMatchIndex()
@@ -0,0 +1,197 @@
+import asyncio
+import io
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+import anyio
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..database import dialect_insert
+from ..models_db import AssetModel, AssetPreviewModel, ExtractedTextModel
+from . import previews
+from .asset_processing import asset_processing
+from .storage import storage
+
+# Previews rendered at once; the rest wait their turn
+PREVIEW_CONCURRENCY = int(os.getenv("PREVIEW_CONCURRENCY", "1"))
+PREVIEW_MAX_ATTEMPTS = 4
+# Wait before the first retry, doubled after each failed attempt
+PREVIEW_RETRY_SECONDS = 60
+PREVIEW_POLL_SECONDS = 60
+PREVIEW_BATCH_SIZE = 50
+PREVIEW_PREFIX = "previews"
+
+
+def preview_key(digest: str) -> str:
+    return f"{PREVIEW_PREFIX}/{digest[:2]}/{digest}.webp"
+
+
+class PreviewWorker:
+    """
+    Thumbnails for images, PDFs and Office files, and text snippets for
+    markdown and text, generated in the background after upload.
+
+    Jobs are rows in asset_previews, one per content hash, so identical files
+    share a preview and pending work survives a restart. At most
+    PREVIEW_CONCURRENCY previews render at a time, in the asset_processing
+    worker pool, so a burst of uploads queues up instead of taking CPU from
+    requests. A failed render is retried with exponential backoff by the poll
+    loop started with the app, up to PREVIEW_MAX_ATTEMPTS; files that can't
+    have a preview are marked unsupported and left alone.
+
+    Thumbnails are stored through the active storage provider under
+    previews/, keyed by content hash, and served by content hash with
+    immutable cache headers.
+    """
+
+    def __init__(self):
+        self._limiter = anyio.CapacityLimiter(PREVIEW_CONCURRENCY)
+        self._running: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.generated = 0
+        self.failures = 0
+
+    # --- Queue ---
+
+    async def enqueue(self, db: AsyncSession, asset_ids: List[str]) -> List[str]:
+        """Add jobs for these assets' content unless it has one. Returns the content hashes."""
+        result = await db.execute(
+            select(AssetModel.content_hash).distinct()
+            .where(AssetModel.id.in_(asset_ids), AssetModel.content_hash.isnot(None))
+        )
+        digests = result.scalars().all()
+        if digests:
+            now = datetime.now(timezone.utc)
+            stmt = dialect_insert(db, AssetPreviewModel.__table__).values([
+                {"content_hash": d, "status": "pending", "attempts": 0, "next_attempt_at": now} for d in digests
+            ])
+            await db.execute(stmt.on_conflict_do_nothing(index_elements=["content_hash"]))
+            await db.commit()
+        return digests
+
+    async def process(self, bind, asset_ids: List[str]):
+        """Background task after an upload. Uses its own session."""
+        try:
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                await self._run_due(db, await self.enqueue(db, asset_ids))
+        except Exception as e:
+            print(f"Preview generation failed for {asset_ids}: {e}")
+
+    async def run_due(self, bind) -> int:
+        """Render jobs that are due (new, or waiting to retry). Returns how many were attempted."""
+        async with AsyncSession(bind, expire_on_commit=False) as db:
+            return await self._run_due(db)
+
+    # --- Rendering ---
+
+    async def _run_due(self, db: AsyncSession, digests: Optional[List[str]] = None) -> int:
+        query = select(AssetPreviewModel).where(
+            AssetPreviewModel.status == "pending",
+            AssetPreviewModel.next_attempt_at <= datetime.now(timezone.utc),
+        )
+        if digests is not None:
+            if not digests:
+                return 0
+            query = query.where(AssetPreviewModel.content_hash.in_(digests))
+        result = await db.execute(query.order_by(AssetPreviewModel.next_attempt_at).limit(PREVIEW_BATCH_SIZE))
+        # Another task may be on some of them already
+        jobs = [job for job in result.scalars().all() if job.content_hash not in self._running]
+        if not jobs:
+            return 0
+        wanted = [job.content_hash for job in jobs]
+        self._running.update(wanted)
+        try:
+            # Any one asset with this content will do as the source
+            sources: Dict[str, tuple] = {}
+            result = await db.execute(
+                select(AssetModel.content_hash, AssetModel.file_path, AssetModel.storage_provider,
+                       AssetModel.original_filename, AssetModel.mime_type)
+                .where(AssetModel.content_hash.in_(wanted))
+            )
+            for digest, *source in result.all():
+                sources.setdefault(digest, tuple(source))
+            # Text snippets come from the extracted text when there is some
+            result = await db.execute(
+                select(ExtractedTextModel.content_hash, func.substr(ExtractedTextModel.text, 1, 2 * previews.SNIPPET_CHARS))
+                .where(ExtractedTextModel.content_hash.in_(wanted), ExtractedTextModel.text.isnot(None))
+            )
+            texts = dict(result.all())
+
+            outcomes: Dict[str, dict] = {}
+
+            async def run(job: AssetPreviewModel):
+                async with self._limiter:
+                    outcomes[job.content_hash] = await self._generate(job, sources.get(job.content_hash),
+                                                                      texts.get(job.content_hash))
+
+            async with anyio.create_task_group() as tg:
+                for job in jobs:
+                    tg.start_soon(run, job)
+            for job in jobs:
+                for field, value in outcomes[job.content_hash].items():
+                    setattr(job, field, value)
+            await db.commit()
+        finally:
+            self._running.difference_update(wanted)
+        return len(jobs)
+
+    async def _generate(self, job: AssetPreviewModel, source: Optional[tuple], text: Optional[str]) -> dict:
+        """Column updates for the job after one attempt."""
+        if source is None:
+            return {"status": "unsupported", "error": "No asset has this content any more"}
+        key, provider, filename, mime_type = source
+        kind = previews.preview_kind(filename, mime_type)
+        if kind is None:
+            return {"status": "unsupported", "kind": None, "error": None}
+        try:
+            if kind == "text" and text is not None:
+                rendered = {"snippet": previews.snippet(text)}
+            else:
+                async with asset_processing.local_copy(key, job.content_hash, provider) as path:
+                    rendered = await asset_processing.submit(previews.render, str(path), kind, filename)
+            updates = {"status": "ready", "kind": kind, "error": None, "snippet": rendered.get("snippet")}
+            if rendered.get("thumbnail"):
+                thumbnail_key = preview_key(job.content_hash)
+                await storage.put(io.BytesIO(rendered["thumbnail"]), thumbnail_key, "image/webp")
+                updates.update(thumbnail_key=thumbnail_key, storage_provider=storage.active_provider,
+                               width=rendered["width"], height=rendered["height"])
+            self.generated += 1
+            return updates
+        except previews.PreviewUnavailable as e:
+            return {"status": "unsupported", "kind": kind, "error": str(e)}
+        except Exception as e:
+            self.failures += 1
+            attempts = job.attempts + 1
+            print(f"Preview attempt {attempts} failed for {key}: {e}")
+            if attempts >= PREVIEW_MAX_ATTEMPTS:
+                return {"status": "failed", "kind": kind, "attempts": attempts, "error": str(e)[:500]}
+            delay = PREVIEW_RETRY_SECONDS * 2 ** (attempts - 1)
+            return {"kind": kind, "attempts": attempts, "error": str(e)[:500],
+                    "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay)}
+
+    # --- Poll loop ---
+
+    def start(self, bind):
+        """Pick up pending jobs and retries in the background until stop()."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._poll(bind))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self, bind):
+        while True:
+            try:
+                while await self.run_due(bind):
+                    pass
+            except Exception as e:
+                print(f"Preview worker error: {e}")
+            await asyncio.sleep(PREVIEW_POLL_SECONDS)
+
+
+preview_worker = PreviewWorker()
@@ -0,0 +1,124 @@
+"""
+Thumbnails and text snippets for the asset library.
+
+Like text_extraction, plain functions over a file path that run in the
+asset_processing worker pool (see services/preview_worker.py). Everything is
+rendered locally: Pillow for images, pypdfium2 for the first page of a PDF,
+and for PPTX/DOCX the first-page thumbnail the authoring app embeds in the
+file. Both libraries are optional and imported on first use.
+"""
+import io
+import os
+import zipfile
+from typing import Optional
+
+from . import text_extraction
+
+THUMBNAIL_SIZE = (320, 320)
+SNIPPET_CHARS = 500
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+OFFICE_THUMBNAILS = ("docProps/thumbnail.jpeg", "docProps/thumbnail.jpg", "docProps/thumbnail.png")
+
+
+class PreviewUnavailable(Exception):
+    """This file can't have a preview; not worth retrying."""
+
+
+def preview_kind(filename: Optional[str], mime_type: Optional[str] = None) -> Optional[str]:
+    fmt = text_extraction.detect_format(filename, mime_type)
+    if fmt in ("markdown", "text"):
+        return "text"
+    if fmt == "pdf":
+        return "pdf"
+    if fmt in ("pptx", "docx"):
+        return "office"
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in IMAGE_EXTENSIONS or (mime_type or "").startswith("image/"):
+        return "image"
+    return None
+
+
+def snippet(text: str, limit: int = SNIPPET_CHARS) -> str:
+    text = text.strip()
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    # Drop the word the limit cut through, unless it ended right there
+    if not text[limit].isspace() and not cut[-1].isspace():
+        cut = cut.rsplit(None, 1)[0]
+    return cut.rstrip() + "…"
+
+
+def _pillow():
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise PreviewUnavailable("Thumbnails need the Pillow package")
+    return Image, ImageOps
+
+
+def _thumbnail(image) -> dict:
+    _, ImageOps = _pillow()
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(THUMBNAIL_SIZE)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.getbands() else "RGB")
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=80)
+    return {"thumbnail": out.getvalue(), "width": image.width, "height": image.height}
+
+
+def _image(path: str) -> dict:
+    Image, _ = _pillow()
+    with Image.open(path) as image:
+        # JPEGs decode straight at a reduced scale
+        image.draft("RGB", THUMBNAIL_SIZE)
+        return _thumbnail(image)
+
+
+def _pdf(path: str) -> dict:
+    _pillow()
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise PreviewUnavailable("PDF previews need the pypdfium2 package")
+    pdf = pdfium.PdfDocument(path)
+    try:
+        if len(pdf) == 0:
+            raise PreviewUnavailable("PDF has no pages")
+        page = pdf[0]
+        # Render at twice the thumbnail size, then downsample for smooth text
+        scale = 2 * max(THUMBNAIL_SIZE) / max(page.get_width(), page.get_height())
+        return _thumbnail(page.render(scale=scale).to_pil())
+    finally:
+        pdf.close()
+
+
+def _office(path: str) -> dict:
+    Image, _ = _pillow()
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        embedded = next((n for n in OFFICE_THUMBNAILS if n in names), None)
+        if embedded is None:
+            raise PreviewUnavailable("No thumbnail saved in the file")
+        data = archive.read(embedded)
+    with Image.open(io.BytesIO(data)) as image:
+        return _thumbnail(image)
+
+
+def _text(path: str, filename: Optional[str]) -> dict:
+    return {"snippet": snippet(text_extraction.extract(path, filename)["text"])}
+
+
+def render(path: str, kind: str, filename: Optional[str] = None) -> dict:
+    """thumbnail (WebP bytes), width and height, or snippet for text files."""
+    if kind == "image":
+        return _image(path)
+    if kind == "pdf":
+        return _pdf(path)
+    if kind == "office":
+        return _office(path)
+    if kind == "text":
+        return _text(path, filename)
+    raise PreviewUnavailable(f"No previews for {kind}")
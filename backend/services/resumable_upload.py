@@ -0,0 +1,336 @@
+import asyncio
+import errno
+import hashlib
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import UploadSessionModel
+from .blob_store import blob_key, hash_stream
+from .direct_upload import DIRECT_UPLOAD_PREFIX, safe_name
+from .s3_storage import MAX_COPY_SIZE, MAX_PARTS, MB
+from .storage import CHUNK_SIZE, local_storage_instance, run_blocking, storage
+
+SESSION_TTL = timedelta(hours=24)
+# Recommended chunk size for local sessions; S3 sessions use the part size
+LOCAL_CHUNK_SIZE = 8 * MB
+GC_INTERVAL_SECONDS = 600
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class ResumableUploads:
+    """
+    Chunked uploads that survive dropped connections.
+
+    A session row records the file and how many bytes have been accepted;
+    that offset is the source of truth. Local sessions append to a partial
+    file (truncated back to the offset before each write, so a half-written
+    chunk from a crash is discarded) and move it into the content-addressed
+    blob store on finalize. S3 sessions turn each chunk into one part of a
+    multipart upload, so every chunk except the last must be exactly
+    chunk_size (S3's minimum part size rules out anything smaller). Both
+    keep a running sha256, and a completed S3 upload is copied to its
+    content-addressed key like local ones; if the hash was lost (the upload
+    moved between workers) the asset is hashed in the background instead.
+
+    The offset only advances under a row lock (SELECT ... FOR UPDATE held
+    until the chunk is committed), so two workers can't both accept a chunk
+    at the same offset.
+
+    Bodies are read straight from the request stream, never spooled. Each
+    PUT refreshes the expiry; abandoned sessions are collected after
+    SESSION_TTL (partial files removed, multipart uploads aborted).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("UPLOAD_SESSION_DIR", "data/uploads"))
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # sha256 state per session, valid while its offset matches the row; a
+        # resumed session on another worker rehashes (local) or is hashed in
+        # the background after finalize (s3)
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+        self._last_gc = 0.0
+
+    def _partial(self, session: UploadSessionModel) -> Path:
+        return self.directory / session.storage_key
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    def _forget(self, session_id: str):
+        self._locks.pop(session_id, None)
+        self._hashers.pop(session_id, None)
+
+    # --- Sessions ---
+
+    async def create(self, db: AsyncSession, filename: str, content_type: Optional[str], size: int) -> UploadSessionModel:
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="size must be positive")
+        await self.maybe_collect(db)
+
+        session = UploadSessionModel(
+            id=str(uuid.uuid4()), filename=filename, content_type=content_type, size=size, offset=0, parts=[],
+            expires_at=datetime.now(timezone.utc) + SESSION_TTL,
+        )
+        s3 = storage.s3_provider()
+        if s3 is not None:
+            session.provider = "s3"
+            # S3 allows at most 10,000 parts, so very large files get bigger chunks
+            session.chunk_size = max(s3.part_size, math.ceil(size / MAX_PARTS))
+            session.storage_key = f"{DIRECT_UPLOAD_PREFIX}/{session.id}/{safe_name(filename)}"
+            session.s3_upload_id = await run_blocking(s3.create_multipart, session.storage_key,
+                                                      content_type or "application/octet-stream")
+            self._hashers[session.id] = (0, hashlib.sha256())
+        else:
+            session.provider = "local"
+            session.chunk_size = LOCAL_CHUNK_SIZE
+            session.storage_key = f"{session.id}.part"
+            await run_blocking(self._create_partial, self._partial(session))
+            self._hashers[session.id] = (0, hashlib.sha256())
+        db.add(session)
+        await db.commit()
+        return session
+
+    def _create_partial(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def _live(self, session: Optional[UploadSessionModel]) -> UploadSessionModel:
+        if session is None or _aware(session.expires_at) < datetime.now(timezone.utc):
+            raise HTTPException(status_code=404, detail="Upload session not found or expired")
+        return session
+
+    async def get(self, db: AsyncSession, session_id: str) -> UploadSessionModel:
+        return self._live(await db.get(UploadSessionModel, session_id))
+
+    async def _get_for_update(self, db: AsyncSession, session_id: str) -> UploadSessionModel:
+        # The row stays locked until the caller commits: a request for the same
+        # session on another worker waits here, then sees the new offset
+        result = await db.execute(
+            select(UploadSessionModel).where(UploadSessionModel.id == session_id)
+            .with_for_update().execution_options(populate_existing=True)
+        )
+        return self._live(result.scalars().first())
+
+    # --- Chunks ---
+
+    async def write_chunk(self, db: AsyncSession, session_id: str, offset: int, body: AsyncIterator[bytes]) -> UploadSessionModel:
+        async with self._lock(session_id):
+            session = await self._get_for_update(db, session_id)
+            if offset != session.offset:
+                raise HTTPException(status_code=409, detail=f"Offset mismatch: session is at {session.offset}")
+            try:
+                if session.provider == "s3":
+                    await self._write_part(session, body)
+                else:
+                    await self._append(session, body)
+            finally:
+                # Record whatever reached storage, even if the client went away mid-chunk
+                session.expires_at = datetime.now(timezone.utc) + SESSION_TTL
+                await db.commit()
+            return session
+
+    async def _append(self, session: UploadSessionModel, body: AsyncIterator[bytes]):
+        path = self._partial(session)
+        start = session.offset
+        cached = self._hashers.get(session.id)
+        hasher = cached[1] if cached and cached[0] == start else None
+        if hasher is None:
+            self._hashers.pop(session.id, None)
+
+        def open_at():
+            file = open(path, "r+b")
+            # Anything past the recorded offset is an unacknowledged write
+            file.truncate(start)
+            file.seek(start)
+            return file
+
+        try:
+            file = await run_blocking(open_at)
+        except FileNotFoundError:
+            raise HTTPException(status_code=410, detail="Upload session data is gone")
+        written = 0
+        buffer = bytearray()
+
+        async def flush():
+            nonlocal written
+            data = bytes(buffer)
+            buffer.clear()
+            await run_blocking(file.write, data)
+            if hasher:
+                hasher.update(data)
+            written += len(data)
+
+        try:
+            async for chunk in body:
+                if start + written + len(buffer) + len(chunk) > session.size:
+                    raise HTTPException(status_code=413, detail="Chunk runs past the declared size")
+                buffer += chunk
+                if len(buffer) >= CHUNK_SIZE:
+                    await flush()
+        finally:
+            # Bytes received before a dropped connection still count
+            try:
+                if buffer:
+                    await flush()
+            finally:
+                await run_blocking(file.close)
+                session.offset = start + written
+                if hasher:
+                    self._hashers[session.id] = (session.offset, hasher)
+
+    async def _write_part(self, session: UploadSessionModel, body: AsyncIterator[bytes]):
+        if session.offset % session.chunk_size:
+            raise HTTPException(status_code=409, detail="S3 sessions resume on chunk boundaries")
+        # One part per chunk, held in memory (at most chunk_size) until complete
+        data = bytearray()
+        async for chunk in body:
+            data += chunk
+            if len(data) > session.chunk_size:
+                raise HTTPException(status_code=413, detail=f"Chunks must be at most {session.chunk_size} bytes")
+        end = session.offset + len(data)
+        if end > session.size:
+            raise HTTPException(status_code=413, detail="Chunk runs past the declared size")
+        if not data or (len(data) < session.chunk_size and end != session.size):
+            raise HTTPException(status_code=400, detail=f"Only the final chunk may be shorter than {session.chunk_size} bytes")
+
+        s3 = storage.s3_provider()
+        if s3 is None:
+            raise HTTPException(status_code=409, detail="S3 storage is no longer active")
+        number = session.offset // session.chunk_size + 1
+        part = await run_blocking(s3._upload_part, session.storage_key, session.s3_upload_id, number, bytes(data), None)
+        parts = [p for p in session.parts or [] if p["PartNumber"] != number]
+        session.parts = parts + [part]
+        cached = self._hashers.pop(session.id, None)
+        if cached and cached[0] == session.offset:
+            cached[1].update(data)
+            self._hashers[session.id] = (end, cached[1])
+        session.offset = end
+
+    # --- Finish ---
+
+    async def finalize(self, db: AsyncSession, session_id: str) -> dict:
+        """
+        Turn a fully uploaded session into a stored file and drop the session.
+        Returns {key, digest, filename, content_type, size, provider}.
+        """
+        async with self._lock(session_id):
+            session = await self._get_for_update(db, session_id)
+            if session.offset != session.size:
+                raise HTTPException(status_code=409, detail=f"Upload incomplete: {session.offset} of {session.size} bytes")
+            if session.provider == "s3":
+                key, digest = await self._complete_s3(session)
+            else:
+                key, digest = await self._complete_local(session)
+            result = {"key": key, "digest": digest, "filename": session.filename,
+                      "content_type": session.content_type, "size": session.size, "provider": session.provider}
+            await db.delete(session)
+            await db.commit()
+        self._forget(session_id)
+        return result
+
+    async def _complete_local(self, session: UploadSessionModel) -> Tuple[str, str]:
+        path = self._partial(session)
+        cached = self._hashers.get(session.id)
+        if cached and cached[0] == session.size:
+            digest = cached[1].hexdigest()
+        else:
+            def rehash():
+                with open(path, "rb") as f:
+                    return hash_stream(f)[0]
+            digest = await run_blocking(rehash)
+
+        key = blob_key(digest, session.filename)
+        target = local_storage_instance.base_path / key
+
+        def place():
+            if target.is_file():
+                path.unlink()  # Same content is already stored
+                return
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(path, target)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Session dir on another filesystem: copy in, then drop the partial
+                with open(path, "rb") as f:
+                    local_storage_instance._put_sync(f, key, None)
+                path.unlink()
+
+        await run_blocking(place)
+        return key, digest
+
+    async def _complete_s3(self, session: UploadSessionModel) -> Tuple[str, Optional[str]]:
+        s3 = storage.s3_provider()
+        if s3 is None:
+            raise HTTPException(status_code=409, detail="S3 storage is no longer active")
+        parts = sorted(session.parts or [], key=lambda p: p["PartNumber"])
+        await run_blocking(s3.complete_multipart, session.storage_key, session.s3_upload_id, parts)
+        head = await run_blocking(s3.head, session.storage_key)
+        if head is None or head["ContentLength"] != session.size:
+            raise HTTPException(status_code=409, detail="Uploaded object does not match the declared size")
+
+        cached = self._hashers.get(session.id)
+        if not cached or cached[0] != session.size or session.size > MAX_COPY_SIZE:
+            # Stays where it is; the asset gets its hash in the background
+            return session.storage_key, None
+        digest = cached[1].hexdigest()
+        key = blob_key(digest, session.filename)
+        if not await s3.touch(key):
+            await run_blocking(s3.copy, session.storage_key, key)
+        await s3.delete(session.storage_key)
+        return key, digest
+
+    async def abort(self, db: AsyncSession, session_id: str):
+        async with self._lock(session_id):
+            session = await self.get(db, session_id)
+            await self._discard(session)
+            await db.delete(session)
+            await db.commit()
+        self._forget(session_id)
+
+    async def _discard(self, session: UploadSessionModel):
+        if session.provider == "s3":
+            s3 = storage.s3_provider()
+            if s3 is not None and session.s3_upload_id:
+                await run_blocking(s3.abort_multipart, session.storage_key, session.s3_upload_id)
+        else:
+            await run_blocking(lambda: self._partial(session).unlink(missing_ok=True))
+
+    # --- Garbage collection ---
+
+    async def collect_expired(self, db: AsyncSession) -> int:
+        """Remove sessions past their expiry along with their partial data."""
+        result = await db.execute(
+            select(UploadSessionModel).where(UploadSessionModel.expires_at < datetime.now(timezone.utc))
+        )
+        expired = result.scalars().all()
+        for session in expired:
+            await self._discard(session)
+            self._forget(session.id)
+        if expired:
+            await db.execute(delete(UploadSessionModel).where(UploadSessionModel.id.in_([s.id for s in expired])))
+            await db.commit()
+        self._last_gc = time.monotonic()
+        return len(expired)
+
+    async def maybe_collect(self, db: AsyncSession):
+        if time.monotonic() - self._last_gc > GC_INTERVAL_SECONDS:
+            await self.collect_expired(db)
+
+
+resumable_uploads = ResumableUploads()
@@ -1,60 +1,332 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from fastapi import UploadFile, HTTPException
-from .storage import StorageProvider
-import os
-import uuid
+from .storage import Progress, StorageProvider, run_blocking
+
+MB = 1024 * 1024
+# S3 rejects non-final parts smaller than 5 MiB
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+DEFAULT_PART_SIZE = 8 * MB
+DEFAULT_MULTIPART_THRESHOLD = 16 * MB
+DEFAULT_MAX_CONCURRENCY = 4
+# Threads sending multipart parts, shared by every upload in the process
+PART_THREADS = int(os.getenv("S3_PART_THREADS", "16"))
+DEFAULT_MAX_ATTEMPTS = 4
+RETRY_BACKOFF_SECONDS = 0.5
+# Lifetime of presigned download URLs
+URL_EXPIRES_IN = 3600
+# Keys per delete_objects / list_objects_v2 request (the S3 maximum)
+DELETE_BATCH_SIZE = 1000
+# copy_object's limit; touch() leaves bigger objects as they are
+MAX_COPY_SIZE = 5 * 1024 * MB
+
+RETRYABLE_CODES = {"RequestTimeout", "SlowDown", "Throttling", "ThrottlingException", "InternalError",
+                   "ServiceUnavailable", "RequestTimeTooSkewed"}
+
+
+# Sized once: threads start as parts are submitted and are never torn down
+part_pool = ThreadPoolExecutor(max_workers=PART_THREADS, thread_name_prefix="s3-part")
+
+
+def is_retryable(error: Exception) -> bool:
+    """Connection-level failures, throttling and 5xx are worth another try; other 4xx are not."""
+    if isinstance(error, BotoCoreError):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return code in RETRYABLE_CODES or status >= 500
+    return False
+
 
 class S3StorageProvider(StorageProvider):
-    def __init__(self, bucket_name: str, region_name: str, aws_access_key_id: str = None, aws_secret_access_key: str = None):
+    """
+    Uploads below multipart_threshold go up in one PUT. Larger ones use a
+    multipart upload: parts of part_size are read sequentially from the
+    upload and sent max_concurrency at a time, each part retried on its own
+    (with backoff) up to max_attempts, so one dropped connection costs a part
+    rather than the whole deck. At most max_concurrency parts per upload are
+    held in memory. Parts go through part_pool, shared by all uploads and
+    providers, so a burst of uploads (or a settings change that rebuilds the
+    provider) queues parts rather than adding threads.
+    A failed upload is aborted so S3 doesn't keep the parts around.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        region_name: str,
+        aws_access_key_id: str = None,
+        aws_secret_access_key: str = None,
+        endpoint_url: Optional[str] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
         self.bucket_name = bucket_name
         self.region_name = region_name
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.multipart_threshold = max(multipart_threshold, self.part_size)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_attempts = max(max_attempts, 1)
         self.s3_client = boto3.client(
             's3',
             region_name=region_name,
             aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
+            aws_secret_access_key=aws_secret_access_key,
+            # Set for S3-compatible stores (MinIO, LocalStack)
+            endpoint_url=endpoint_url or None
         )
 
-    async def save(self, file: UploadFile, directory: str = "") -> str:
+    async def save(self, file: UploadFile, directory: str = "", progress: Optional[Progress] = None) -> str:
+        # Generate a unique key
+        # We use the directory as a prefix if provided
+        key = f"{directory}/{file.filename}" if directory else file.filename
+
+        # Remove leading slash if present to avoid empty folder at root
+        if key.startswith("/"):
+            key = key[1:]
+        return await self.put(file.file, key, file.content_type, progress)
+
+    async def put(self, source: BinaryIO, key: str, content_type: Optional[str] = None,
+                  progress: Optional[Progress] = None) -> str:
         try:
-            # Generate a unique key
-            # We use the directory as a prefix if provided
-            key = f"{directory}/{file.filename}" if directory else file.filename
-            
-            # Remove leading slash if present to avoid empty folder at root
-            if key.startswith("/"):
-                key = key[1:]
-
-            self.s3_client.upload_fileobj(
-                file.file,
-                self.bucket_name,
-                key,
-                ExtraArgs={'ContentType': file.content_type}
-            )
+            # boto3 is synchronous; run the transfer in a worker thread
+            await run_blocking(self._upload, source, key, content_type, progress)
             return key
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             print(f"S3 Upload Error: {e}")
             raise HTTPException(status_code=500, detail=f"S3 Upload failed: {str(e)}")
 
-    def get_url(self, path: str) -> str:
+    async def exists(self, key: str) -> bool:
+        return await run_blocking(self.head, key) is not None
+
+    def _touch(self, key: str) -> bool:
+        head = self.head(key)
+        if head is None:
+            return False
+        if head["ContentLength"] <= MAX_COPY_SIZE:
+            # Copying an object onto itself is the only way to bump LastModified
+            extra = {"ContentType": head["ContentType"]} if head.get("ContentType") else {}
+            self._retrying(lambda: self.s3_client.copy_object(
+                Bucket=self.bucket_name, Key=key, CopySource={"Bucket": self.bucket_name, "Key": key},
+                MetadataDirective="REPLACE", Metadata=head.get("Metadata", {}), **extra
+            ))
+        return True
+
+    async def touch(self, key: str) -> bool:
+        return await run_blocking(self._touch, key)
+
+    def copy(self, source: str, key: str):
+        """Server-side copy within the bucket, for objects up to MAX_COPY_SIZE. Blocking."""
+        self._retrying(lambda: self.s3_client.copy_object(
+            Bucket=self.bucket_name, Key=key, CopySource={"Bucket": self.bucket_name, "Key": source}
+        ))
+
+    async def modified(self, key: str) -> Optional[float]:
+        head = await run_blocking(self.head, key)
+        return head["LastModified"].timestamp() if head else None
+
+    # --- Transfer (runs in a worker thread) ---
+
+    def _retrying(self, call, progress: Optional[Progress] = None):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return call()
+            except (ClientError, BotoCoreError) as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                if progress is not None and hasattr(progress, "retried"):
+                    progress.retried()
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+    def _upload(self, source: BinaryIO, key: str, content_type: Optional[str], progress: Optional[Progress]):
+        extra = {"ContentType": content_type} if content_type else {}
+        head = source.read(self.multipart_threshold)
+        if len(head) < self.multipart_threshold:
+            self._retrying(lambda: self.s3_client.put_object(
+                Bucket=self.bucket_name, Key=key, Body=head, **extra
+            ), progress)
+            if progress:
+                progress(len(head))
+            return
+
+        upload_id = self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=key, **extra)["UploadId"]
+        try:
+            parts = self._upload_parts(source, head, key, upload_id, progress)
+            self._retrying(lambda: self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            ), progress)
+        except BaseException:
+            try:
+                self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            except (ClientError, BotoCoreError) as e:
+                print(f"S3 Abort Error: {e}")
+            raise
+
+    def _parts(self, source: BinaryIO, head: bytes) -> Iterator[bytes]:
+        buffer = head
+        while True:
+            while len(buffer) < self.part_size:
+                chunk = source.read(self.part_size - len(buffer))
+                if not chunk:
+                    break
+                buffer += chunk
+            if not buffer:
+                return
+            yield buffer[:self.part_size]
+            buffer = buffer[self.part_size:]
+
+    def _upload_part(self, key: str, upload_id: str, number: int, body: bytes, progress: Optional[Progress]) -> dict:
+        response = self._retrying(lambda: self.s3_client.upload_part(
+            Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+        ), progress)
+        if progress:
+            progress(len(body))
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def _upload_parts(self, source: BinaryIO, head: bytes, key: str, upload_id: str,
+                      progress: Optional[Progress]) -> List[dict]:
+        futures = []
+        try:
+            in_flight = set()
+            for number, body in enumerate(self._parts(source, head), start=1):
+                if len(in_flight) >= self.max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()  # surface a failed part before reading more
+                future = part_pool.submit(self._upload_part, key, upload_id, number, body, progress)
+                futures.append(future)
+                in_flight.add(future)
+            return [future.result() for future in futures]
+        finally:
+            # The pool outlives this upload: drop its queued parts and let the
+            # running ones finish before the caller completes or aborts
+            for future in futures:
+                future.cancel()
+            wait(futures)
+
+    # --- Browser uploads (presigned; the bytes never pass through us) ---
+
+    def presigned_post(self, key: str, content_type: str, size: int, expires_in: int) -> dict:
+        # The policy pins type and exact length, so the form can't be reused for something else
+        return self.s3_client.generate_presigned_post(
+            self.bucket_name, key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", size, size]],
+            ExpiresIn=expires_in,
+        )
+
+    def create_multipart(self, key: str, content_type: str) -> str:
+        return self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=key, ContentType=content_type
+        )["UploadId"]
+
+    def presigned_part_url(self, key: str, upload_id: str, number: int, expires_in: int) -> str:
+        return self.s3_client.generate_presigned_url(
+            'upload_part',
+            Params={'Bucket': self.bucket_name, 'Key': key, 'UploadId': upload_id, 'PartNumber': number},
+            ExpiresIn=expires_in,
+        )
+
+    def complete_multipart(self, key: str, upload_id: str, parts: List[dict]):
+        self._retrying(lambda: self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        ))
+
+    def abort_multipart(self, key: str, upload_id: str):
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+        except (ClientError, BotoCoreError) as e:
+            print(f"S3 Abort Error: {e}")
+
+    def open_object(self, key: str) -> dict:
+        """get_object response with a streaming Body. Blocking."""
+        return self._retrying(lambda: self.s3_client.get_object(Bucket=self.bucket_name, Key=key))
+
+    def head(self, key: str) -> Optional[dict]:
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    # --- Other operations ---
+
+    async def get_url(self, path: str, filename: Optional[str] = None) -> str:
         # Generate a presigned URL or public URL depending on requirements.
         # For now, let's assume public accessible or presigned.
         # Let's generate a presigned URL for safety and compatibility with private buckets
+        # (signing is local, but credential resolution can hit the network)
+        params = {'Bucket': self.bucket_name, 'Key': path}
+        if filename:
+            # Keys are content digests; have S3 name the download
+            params['ResponseContentDisposition'] = f"attachment; filename*=utf-8''{quote(filename)}"
         try:
-            response = self.s3_client.generate_presigned_url('get_object',
-                                                            Params={'Bucket': self.bucket_name,
-                                                                    'Key': path},
-                                                            ExpiresIn=3600)
+            response = await run_blocking(lambda: self.s3_client.generate_presigned_url(
+                'get_object', Params=params, ExpiresIn=URL_EXPIRES_IN
+            ))
             return response
         except ClientError as e:
              print(f"S3 Presign Error: {e}")
              return ""
 
-    def delete(self, path: str) -> bool:
+    def _sign_many(self, paths: List[str]) -> List[str]:
+        urls = []
+        for path in paths:
+            try:
+                urls.append(self.s3_client.generate_presigned_url(
+                    'get_object', Params={'Bucket': self.bucket_name, 'Key': path}, ExpiresIn=URL_EXPIRES_IN
+                ))
+            except ClientError as e:
+                print(f"S3 Presign Error: {e}")
+                urls.append("")
+        return urls
+
+    async def get_urls(self, paths: List[str]) -> List[str]:
+        return await run_blocking(self._sign_many, paths)
+
+    async def delete(self, path: str) -> bool:
         try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=path)
+            await run_blocking(lambda: self.s3_client.delete_object(Bucket=self.bucket_name, Key=path))
             return True
         except ClientError as e:
             print(f"S3 Delete Error: {e}")
             return False
+
+    def _delete_batch(self, paths: List[str]) -> List[str]:
+        deleted = []
+        # delete_objects takes at most 1000 keys per request
+        for i in range(0, len(paths), DELETE_BATCH_SIZE):
+            batch = paths[i:i + DELETE_BATCH_SIZE]
+            try:
+                response = self._retrying(lambda: self.s3_client.delete_objects(
+                    Bucket=self.bucket_name, Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True}
+                ))
+            except (ClientError, BotoCoreError) as e:
+                print(f"S3 Delete Error: {e}")
+                continue
+            failed = {error["Key"] for error in response.get("Errors", [])}
+            for error in response.get("Errors", []):
+                print(f"S3 Delete Error: {error['Key']}: {error.get('Message')}")
+            deleted.extend(k for k in batch if k not in failed)
+        return deleted
+
+    async def delete_many(self, paths: List[str]) -> List[str]:
+        return await run_blocking(self._delete_batch, paths) if paths else []
+
+    def list_page(self, prefix: str, token: Optional[str] = None, limit: int = DELETE_BATCH_SIZE) -> Tuple[List[dict], Optional[str]]:
+        """One page of objects under prefix ({Key, Size, LastModified}) and the token for the next. Blocking."""
+        params = {"Bucket": self.bucket_name, "Prefix": prefix, "MaxKeys": limit}
+        if token:
+            params["ContinuationToken"] = token
+        response = self._retrying(lambda: self.s3_client.list_objects_v2(**params))
+        return response.get("Contents", []), response.get("NextContinuationToken")
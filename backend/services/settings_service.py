@@ -0,0 +1,121 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..database import dialect_insert
+from ..models_db import SystemSettingsModel
+from .storage import storage
+from .s3_storage import MB
+
+
+class StorageSettings(BaseModel):
+    provider: str = "local"
+    s3_bucket: Optional[str] = None
+    s3_region: Optional[str] = None
+    s3_access_key: Optional[str] = None
+    s3_secret_key: Optional[str] = None
+    s3_endpoint_url: Optional[str] = None
+    # Multipart transfer tuning; unset means the provider defaults
+    s3_part_size_mb: Optional[int] = None
+    s3_multipart_threshold_mb: Optional[int] = None
+    s3_max_concurrency: Optional[int] = None
+    s3_max_attempts: Optional[int] = None
+    # Local disk cache in front of S3; off unless a size is set
+    cache_dir: str = "data/storage_cache"
+    cache_max_mb: int = 0
+    cache_max_object_mb: int = 256
+
+    def s3_config(self) -> dict:
+        transfer = {
+            "part_size": self.s3_part_size_mb and self.s3_part_size_mb * MB,
+            "multipart_threshold": self.s3_multipart_threshold_mb and self.s3_multipart_threshold_mb * MB,
+            "max_concurrency": self.s3_max_concurrency,
+            "max_attempts": self.s3_max_attempts,
+        }
+        return {
+            "bucket": self.s3_bucket,
+            "region": self.s3_region,
+            "access_key": self.s3_access_key,
+            "secret_key": self.s3_secret_key,
+            "endpoint_url": self.s3_endpoint_url,
+            "transfer": {k: v for k, v in transfer.items() if v},
+        }
+
+
+class SettingsStore:
+    """
+    In-process cache of the system_settings table.
+
+    Loaded once at startup and kept in sync by update(), so reads never hit
+    the database. Each worker process holds its own copy; a change made through
+    one worker reaches the others on their next restart or load().
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Optional[str]] = {}
+        self._descriptions: Dict[str, Optional[str]] = {}
+        self.loaded = False
+
+    async def load(self, db: AsyncSession):
+        result = await db.execute(select(SystemSettingsModel))
+        rows = result.scalars().all()
+        self._values = {row.key: row.value for row in rows}
+        self._descriptions = {row.key: row.description for row in rows}
+        self.loaded = True
+        self.apply_storage()
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._values.get(key)
+        return default if value is None else value
+
+    def all(self) -> List[dict]:
+        return [
+            {"key": key, "value": value, "description": self._descriptions.get(key)}
+            for key, value in sorted(self._values.items())
+        ]
+
+    def storage_settings(self) -> StorageSettings:
+        return StorageSettings(
+            provider=self.get("storage_provider", "local"),
+            s3_bucket=self.get("storage_s3_bucket"),
+            s3_region=self.get("storage_s3_region"),
+            s3_access_key=self.get("storage_s3_access_key"),
+            s3_secret_key=self.get("storage_s3_secret_key"),
+            s3_endpoint_url=self.get("storage_s3_endpoint_url"),
+            s3_part_size_mb=self._int("storage_s3_part_size_mb"),
+            s3_multipart_threshold_mb=self._int("storage_s3_multipart_threshold_mb"),
+            s3_max_concurrency=self._int("storage_s3_max_concurrency"),
+            s3_max_attempts=self._int("storage_s3_max_attempts"),
+            cache_dir=self.get("storage_cache_dir", "data/storage_cache"),
+            cache_max_mb=self._int("storage_cache_max_mb") or 0,
+            cache_max_object_mb=self._int("storage_cache_max_object_mb") or 256,
+        )
+
+    def _int(self, key: str) -> Optional[int]:
+        try:
+            return int(self.get(key))
+        except (TypeError, ValueError):
+            return None
+
+    def apply_storage(self):
+        config = self.storage_settings()
+        storage.configure(config.provider, config.s3_config())
+        storage.configure_cache(config.cache_dir, config.cache_max_mb * MB, config.cache_max_object_mb * MB)
+
+    async def update(self, db: AsyncSession, values: Dict[str, str]):
+        """Write all values with one multi-row upsert, then refresh the cache."""
+        if not values:
+            return
+        stmt = dialect_insert(db, SystemSettingsModel.__table__).values(
+            [{"key": key, "value": value} for key, value in values.items()]
+        )
+        stmt = stmt.on_conflict_do_update(index_elements=["key"], set_={"value": stmt.excluded.value})
+        await db.execute(stmt)
+        await db.commit()
+
+        self._values.update(values)
+        self.apply_storage()
+
+
+settings_store = SettingsStore()
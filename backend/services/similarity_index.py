@@ -0,0 +1,346 @@
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from ..models_db import AssetModel, ExtractedTextModel, TagModel, asset_tags
+from .text_extraction import INDEXED_TEXT_CHARS
+
+# Width of the stored vectors. Tokens are hashed straight into this many signed
+# buckets (the hashing trick), which keeps rows dense, fixed size and
+# independent of a vocabulary, so workers can append rows without coordination
+# beyond a file lock. 256 float32 columns is 100 MB at 100k assets.
+DIM = 256
+
+# Buckets for document frequencies, much wider than DIM so IDF is not smeared
+HASH_SPACE = 1 << 20
+
+MIN_CAPACITY = 1024
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOP_WORDS]
+
+
+def _hashes(text: str) -> Counter:
+    # crc32 rather than hash(): it has to agree across processes and restarts
+    return Counter(zlib.crc32(t.encode()) for t in tokenize(text))
+
+
+def asset_text(title: Optional[str], description: Optional[str], purpose: Optional[str], tags: Iterable[str],
+               offerings: Optional[List[str]] = None, technologies: Optional[List[str]] = None,
+               body: Optional[str] = None) -> str:
+    # body: text extracted from the file, see services/asset_processing.py
+    parts = [title, description, purpose, " ".join(tags), " ".join(offerings or []), " ".join(technologies or []), body]
+    return "\n".join(p for p in parts if p)
+
+
+class SimilarityIndex:
+    """
+    TF-IDF vectors for assets in a memory-mapped matrix shared by all workers.
+
+    Layout under ``path``:
+      manifest.json           generation, row count, capacity, document count
+      ids.<gen>.txt           asset id per row, append only
+      vectors.<gen>.f32       (capacity, DIM) float32, L2-normalized rows
+      df.<gen>.i32            document frequency per hash bucket
+
+    Writers take an exclusive flock, update rows in place (or append) and
+    rewrite the manifest; readers re-open their mappings when the manifest
+    changes. A full rebuild writes a new generation and swaps the manifest, so
+    a reader never sees a half-built matrix.
+
+    Within a process, worker threads share the mappings and row maps; _mutex
+    guards them (the flock only orders processes), and is taken before the
+    flock.
+
+    IDF weights are taken from the frequencies at the time a row is written.
+    Incremental adds bump the frequencies, edits don't; a rebuild re-weights
+    everything.
+    """
+
+    def __init__(self, path: Optional[str] = None, dim: int = DIM):
+        self.path = Path(path or os.getenv("SIMILARITY_INDEX_DIR", "data/similarity"))
+        self.dim = dim
+        self._manifest: Optional[dict] = None
+        self._stamp = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = None
+        self._df = None
+        self._mutex = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._manifest is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- Files ---
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    def _file(self, kind: str, generation: int) -> Path:
+        ext = {"ids": "txt", "vectors": "f32", "df": "i32"}[kind]
+        return self.path / f"{kind}.{generation}.{ext}"
+
+    @contextmanager
+    def _locked(self):
+        with open(self.path / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_manifest(self, manifest: dict):
+        tmp = self._manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, self._manifest_path)
+
+    def _stat(self):
+        st = os.stat(self._manifest_path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _sync(self, attempts: int = 3):
+        """Re-open the mappings if another process changed the index. Call with _mutex held."""
+        for attempt in range(attempts):
+            stamp = self._stat()
+            if stamp == self._stamp:
+                return
+            manifest = json.loads(self._manifest_path.read_text())
+            gen = manifest["generation"]
+            try:
+                with open(self._file("ids", gen)) as f:
+                    ids = [line.rstrip("\n") for _, line in zip(range(manifest["count"]), f)]
+                vectors = np.memmap(self._file("vectors", gen), dtype=np.float32, mode="r+",
+                                    shape=(manifest["capacity"], manifest["dim"]))
+                df = np.memmap(self._file("df", gen), dtype=np.int32, mode="r+", shape=(HASH_SPACE,))
+            except FileNotFoundError:
+                # Another process's rebuild dropped this generation after we
+                # read the manifest; the manifest now names its replacement
+                if attempt == attempts - 1:
+                    raise
+                continue
+            self._vectors = vectors
+            self._df = df
+            self._ids = ids
+            self._rows = {asset_id: row for row, asset_id in enumerate(ids)}
+            self._manifest = manifest
+            self._stamp = stamp
+            return
+
+    def _write_generation(self, generation: int, ids: List[str], vectors: np.ndarray, df: np.ndarray, n_docs: int) -> dict:
+        capacity = max(MIN_CAPACITY, 1 << max(len(ids) - 1, 0).bit_length())
+        matrix = np.memmap(self._file("vectors", generation), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        matrix[:len(ids)] = vectors
+        matrix.flush()
+        del matrix
+        df.astype(np.int32).tofile(self._file("df", generation))
+        self._file("ids", generation).write_text("".join(f"{i}\n" for i in ids))
+        return {"generation": generation, "dim": self.dim, "capacity": capacity, "count": len(ids), "n_docs": n_docs}
+
+    def _drop_generations(self, keep: int):
+        for f in self.path.glob("*.*.*"):
+            if f.suffix in (".txt", ".f32", ".i32") and f.name.split(".")[1] != str(keep):
+                f.unlink(missing_ok=True)
+
+    def open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not self._manifest_path.exists():
+            with self._locked():
+                if not self._manifest_path.exists():
+                    empty = np.zeros((0, self.dim), dtype=np.float32)
+                    self._write_manifest(self._write_generation(1, [], empty, np.zeros(HASH_SPACE, np.int32), 0))
+        with self._mutex:
+            self._sync()
+
+    def close(self):
+        with self._mutex:
+            self._manifest = None
+            self._stamp = None
+            self._ids = []
+            self._rows = {}
+            self._vectors = None
+            self._df = None
+
+    # --- Vectors ---
+
+    def _vectorize(self, counts: Counter, df, n_docs: int) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for h, tf in counts.items():
+            idf = math.log((1 + n_docs) / (1 + int(df[h % HASH_SPACE]))) + 1
+            weight = (1 + math.log(tf)) * idf
+            vec[(h >> 20) % self.dim] += weight if h & 1 else -weight
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def rebuild(self, docs: List[Tuple[str, str]]):
+        """Replace the whole index with freshly weighted vectors for docs [(asset_id, text)]."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        counts = [_hashes(text) for _, text in docs]
+        df = np.zeros(HASH_SPACE, dtype=np.int32)
+        for c in counts:
+            buckets = np.fromiter((h % HASH_SPACE for h in c), dtype=np.int64, count=len(c))
+            np.add.at(df, buckets, 1)
+        vectors = np.zeros((len(docs), self.dim), dtype=np.float32)
+        for row, c in enumerate(counts):
+            vectors[row] = self._vectorize(c, df, len(docs))
+
+        with self._locked():
+            previous = json.loads(self._manifest_path.read_text())["generation"] if self._manifest_path.exists() else 0
+            generation = previous + 1
+            manifest = self._write_generation(generation, [d[0] for d in docs], vectors, df, len(docs))
+            self._write_manifest(manifest)
+            self._drop_generations(keep=generation)
+        with self._mutex:
+            self._sync()
+
+    def upsert(self, asset_id: str, text: str):
+        self.upsert_many([(asset_id, text)])
+
+    def upsert_many(self, docs: List[Tuple[str, str]]):
+        with self._mutex, self._locked():
+            self._sync()
+            manifest = dict(self._manifest)
+            gen = manifest["generation"]
+            appended = []
+            for asset_id, text in docs:
+                counts = _hashes(text)
+                row = self._rows.get(asset_id)
+                if row is None:
+                    for h in counts:
+                        self._df[h % HASH_SPACE] += 1
+                    manifest["n_docs"] += 1
+                    row = manifest["count"]
+                    if row >= manifest["capacity"]:
+                        # Grow the file in place; readers re-map on the manifest change
+                        manifest["capacity"] *= 2
+                        with open(self._file("vectors", gen), "r+b") as f:
+                            f.truncate(manifest["capacity"] * self.dim * 4)
+                        self._vectors = np.memmap(self._file("vectors", gen), dtype=np.float32,
+                                                  mode="r+", shape=(manifest["capacity"], self.dim))
+                    manifest["count"] = row + 1
+                    self._rows[asset_id] = row
+                    appended.append(asset_id)
+                self._vectors[row] = self._vectorize(counts, self._df, manifest["n_docs"])
+
+            if appended:
+                with open(self._file("ids", gen), "a") as f:
+                    f.write("".join(f"{i}\n" for i in appended))
+            self._df.flush()
+            self._vectors.flush()
+            self._write_manifest(manifest)
+            # Our own write; no need to re-read the id list
+            self._ids.extend(appended)
+            self._manifest = manifest
+            self._stamp = self._stat()
+
+    def remove(self, asset_id: str):
+        with self._mutex, self._locked():
+            self._sync()
+            row = self._rows.get(asset_id)
+            if row is not None:
+                # Zeroed rows never score; the slot is reclaimed on the next rebuild
+                self._vectors[row] = 0
+                self._vectors.flush()
+
+    # --- Querying ---
+
+    def similar(self, asset_id: str, limit: int = 10) -> Optional[List[Tuple[str, float]]]:
+        """Return [(asset_id, cosine)] best first, or None if the asset isn't indexed."""
+        with self._mutex:
+            self._sync()
+            row = self._rows.get(asset_id)
+            if row is None:
+                return None
+            # The row list is only ever appended to or replaced whole, so the
+            # first n entries stay valid once the lock is released
+            ids, vectors = self._ids, self._vectors
+            matrix = vectors[:len(ids)]
+        scores = matrix @ matrix[row]
+        scores[row] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size == 0:
+            return []
+        k = min(limit, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(ids[i], float(scores[i])) for i in top]
+
+    # --- Database ---
+
+    async def _documents(self, db: AsyncSession, asset_ids: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        assets = select(
+            AssetModel.id, AssetModel.title, AssetModel.description, AssetModel.purpose,
+            AssetModel.offerings, AssetModel.technologies, func.substr(ExtractedTextModel.text, 1, INDEXED_TEXT_CHARS)
+        ).outerjoin(ExtractedTextModel, ExtractedTextModel.content_hash == AssetModel.content_hash)
+        tags = select(asset_tags.c.asset_id, TagModel.name).join(TagModel, TagModel.id == asset_tags.c.tag_id)
+        if asset_ids is not None:
+            assets = assets.where(AssetModel.id.in_(asset_ids))
+            tags = tags.where(asset_tags.c.asset_id.in_(asset_ids))
+
+        tags_by_asset: Dict[str, List[str]] = {}
+        for asset_id, name in (await db.execute(tags)).all():
+            tags_by_asset.setdefault(asset_id, []).append(name)
+        return [
+            (asset_id, asset_text(title, description, purpose, tags_by_asset.get(asset_id, []), offerings, technologies, body))
+            for asset_id, title, description, purpose, offerings, technologies, body in (await db.execute(assets)).all()
+        ]
+
+    async def rebuild_from_db(self, db: AsyncSession):
+        docs = await self._documents(db)
+        await run_in_threadpool(self.rebuild, docs)
+
+    async def ensure_ready(self, db: AsyncSession):
+        """Open the shared index, building it from the database the first time."""
+        if self.loaded:
+            return
+        await run_in_threadpool(self.open)
+        if not self._ids:
+            await self.rebuild_from_db(db)
+
+    async def index_assets(self, db: AsyncSession, asset_ids: List[str]) -> int:
+        """Re-vectorize assets after their content changed. Returns how many were found."""
+        if not self.loaded or not asset_ids:
+            return 0
+        docs = await self._documents(db, asset_ids)
+        if docs:
+            await run_in_threadpool(self.upsert_many, docs)
+        return len(docs)
+
+    async def index_asset(self, db: AsyncSession, asset_id: str) -> bool:
+        return await self.index_assets(db, [asset_id]) == 1
+
+    async def similar_async(self, asset_id: str, limit: int = 10) -> Optional[List[Tuple[str, float]]]:
+        # The scan is a full matrix product; keep it off the event loop
+        return await run_in_threadpool(self.similar, asset_id, limit)
+
+    async def discard(self, asset_id: str):
+        if self.loaded:
+            # remove() takes the file lock and flushes the memmap
+            await run_in_threadpool(self.remove, asset_id)
+
+
+similarity_index = SimilarityIndex()
@@ -0,0 +1,201 @@
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import PersonModel, TechnologyModel, person_technologies
+
+# Other workers may change people; reload at most this often to pick that up
+RELOAD_INTERVAL_SECONDS = 60
+
+MIN_CAPACITY = 1024
+
+
+class PersonEntry(NamedTuple):
+    id: str
+    name: str
+    email: str
+    role: Optional[str]
+    region: Optional[str]
+    technologies: Tuple[str, ...]
+
+
+def _key(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+class SkillIndex:
+    """
+    Packed bitsets over people for staffing queries.
+
+    Every person gets a slot; each technology, role and region keeps one bit
+    per slot. A query unpacks only the bitsets of the requested technologies,
+    sums them into a per-person coverage count and masks by role/region, so it
+    costs a few vector ops over n/8 bytes per technology regardless of how
+    many people know nothing relevant.
+    """
+
+    def __init__(self):
+        self.clear()
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def clear(self):
+        self._capacity = MIN_CAPACITY
+        self._slots: Dict[str, int] = {}
+        self._people: List[Optional[PersonEntry]] = []
+        self._free: List[int] = []
+        self._live = np.zeros(MIN_CAPACITY // 8, dtype=np.uint8)
+        self._bits: Dict[Tuple[str, str], np.ndarray] = {}
+
+    # --- Bits ---
+
+    def _grow(self):
+        self._capacity *= 2
+        size = self._capacity // 8
+        self._live = np.resize(self._live, size)
+        self._live[len(self._live) // 2:] = 0
+        for key, bits in self._bits.items():
+            grown = np.zeros(size, dtype=np.uint8)
+            grown[:len(bits)] = bits
+            self._bits[key] = grown
+
+    @staticmethod
+    def _set(bits: np.ndarray, slot: int, on: bool):
+        mask = np.uint8(0x80 >> (slot & 7))
+        if on:
+            bits[slot >> 3] |= mask
+        else:
+            bits[slot >> 3] &= ~mask
+
+    def _entry_keys(self, entry: PersonEntry) -> List[Tuple[str, str]]:
+        keys = [("tech", _key(t)) for t in entry.technologies]
+        keys += [("role", _key(entry.role)), ("region", _key(entry.region))]
+        return [k for k in keys if k[1]]
+
+    def _unpacked(self, kind: str, value: Optional[str]) -> Optional[np.ndarray]:
+        bits = self._bits.get((kind, _key(value)))
+        if bits is None:
+            return None
+        return np.unpackbits(bits).astype(bool)
+
+    # --- Maintenance ---
+
+    def upsert(self, entry: PersonEntry):
+        self.remove(entry.id)
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._people)
+            if slot >= self._capacity:
+                self._grow()
+            self._people.append(None)
+        self._slots[entry.id] = slot
+        self._people[slot] = entry
+        self._set(self._live, slot, True)
+        for key in self._entry_keys(entry):
+            bits = self._bits.get(key)
+            if bits is None:
+                bits = self._bits[key] = np.zeros(self._capacity // 8, dtype=np.uint8)
+            self._set(bits, slot, True)
+
+    def upsert_person(self, person: PersonModel):
+        """Index a person whose technologies relationship is loaded."""
+        self.upsert(PersonEntry(
+            person.id, person.name, person.email, person.role, person.region,
+            tuple(t.name for t in person.technologies)
+        ))
+
+    def remove(self, person_id: str):
+        slot = self._slots.pop(person_id, None)
+        if slot is None:
+            return
+        entry = self._people[slot]
+        self._set(self._live, slot, False)
+        for key in self._entry_keys(entry):
+            self._set(self._bits[key], slot, False)
+        self._people[slot] = None
+        self._free.append(slot)
+
+    async def load(self, db: AsyncSession):
+        result = await db.execute(
+            select(person_technologies.c.person_id, TechnologyModel.name)
+            .join(TechnologyModel, TechnologyModel.id == person_technologies.c.technology_id)
+        )
+        techs: Dict[str, List[str]] = {}
+        for person_id, name in result.all():
+            techs.setdefault(person_id, []).append(name)
+
+        result = await db.execute(select(
+            PersonModel.id, PersonModel.name, PersonModel.email, PersonModel.role, PersonModel.region
+        ))
+        self.clear()
+        for person_id, name, email, role, region in result.all():
+            self.upsert(PersonEntry(person_id, name, email, role, region, tuple(techs.get(person_id, []))))
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > RELOAD_INTERVAL_SECONDS:
+            await self.load(db)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    # --- Querying ---
+
+    def search(
+        self,
+        technologies: Iterable[str],
+        region: Optional[str] = None,
+        role: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Tuple[PersonEntry, List[str], float]]:
+        """Return [(person, matched technologies, coverage 0..1)] best first."""
+        wanted = list({_key(t): t for t in reversed(list(technologies)) if _key(t)}.values())[::-1]
+        if not wanted:
+            return []
+
+        mask = np.unpackbits(self._live).astype(bool)
+        for kind, value in (("region", region), ("role", role)):
+            if _key(value):
+                bits = self._unpacked(kind, value)
+                if bits is None:
+                    return []
+                mask &= bits
+
+        counts = np.zeros(self._capacity, dtype=np.int32)
+        for tech in wanted:
+            bits = self._unpacked("tech", tech)
+            if bits is not None:
+                counts += bits
+        counts[~mask] = 0
+
+        candidates = np.flatnonzero(counts)
+        if candidates.size == 0:
+            return []
+        # Everyone tied with the k-th best count stays in, so the name
+        # tie-break below decides who makes the cut, not partition order
+        k = min(limit, candidates.size)
+        kth = np.partition(counts[candidates], candidates.size - k)[candidates.size - k]
+        chosen = candidates[counts[candidates] >= kth]
+        chosen = sorted(chosen, key=lambda s: (-counts[s], self._people[s].name.lower(), self._people[s].id))[:k]
+
+        results = []
+        for slot in chosen:
+            entry = self._people[slot]
+            have = {_key(t) for t in entry.technologies}
+            matched = [t for t in wanted if _key(t) in have]
+            results.append((entry, matched, len(matched) / len(wanted)))
+        return results
+
+
+skill_index = SkillIndex()
@@ -1,32 +1,347 @@
 import abc
+import hashlib
 import os
-import shutil
+import time
+import uuid
+from collections import OrderedDict
 from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import anyio
 from fastapi import UploadFile
 
+# Disk writes and boto3 calls block, so they run in worker threads. The limiter
+# caps how many run at once: a burst of large uploads queues here instead of
+# taking every thread in the pool (which sync endpoints and DB drivers share).
+STORAGE_IO_CONCURRENCY = int(os.getenv("STORAGE_IO_CONCURRENCY", "8"))
+CHUNK_SIZE = 1024 * 1024
+
+io_limiter = anyio.CapacityLimiter(STORAGE_IO_CONCURRENCY)
+
+
+async def run_blocking(func, *args):
+    """Run a blocking storage call off the event loop, within io_limiter."""
+    return await anyio.to_thread.run_sync(func, *args, limiter=io_limiter)
+
+
+# Called with the byte count of each chunk as it's stored
+Progress = Callable[[int], None]
+
+
+def copy_chunked(source: BinaryIO, target_path: Path, chunk_size: int = CHUNK_SIZE,
+                 progress: Optional[Progress] = None) -> int:
+    """Copy a file object to disk in fixed-size chunks. Returns bytes written."""
+    written = 0
+    with target_path.open("wb") as buffer:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            buffer.write(chunk)
+            written += len(chunk)
+            if progress:
+                progress(len(chunk))
+    return written
+
+
 class StorageProvider(abc.ABC):
     @abc.abstractmethod
-    async def save(self, file: UploadFile, directory: str) -> str:
+    async def save(self, file: UploadFile, directory: str, progress: Optional[Progress] = None) -> str:
         """Save a file and return its relative path or identifier."""
         pass
 
     @abc.abstractmethod
-    def get_url(self, path: str) -> str:
-        """Get the access URL for a file."""
+    async def put(self, source: BinaryIO, key: str, content_type: Optional[str] = None,
+                  progress: Optional[Progress] = None) -> str:
+        """Store a file object under exactly this key and return the key."""
         pass
 
     @abc.abstractmethod
-    def delete(self, path: str) -> bool:
+    async def exists(self, key: str) -> bool:
+        """Whether something is stored under this key."""
+        pass
+
+    @abc.abstractmethod
+    async def get_url(self, path: str, filename: Optional[str] = None) -> str:
+        """Get the access URL for a file, optionally downloading under filename."""
+        pass
+
+    async def get_urls(self, paths: List[str]) -> List[str]:
+        """Access URLs for many files, in order. Providers override this to batch."""
+        return [await self.get_url(path) for path in paths]
+
+    @abc.abstractmethod
+    async def delete(self, path: str) -> bool:
         """Delete a file."""
         pass
 
+    async def delete_many(self, paths: List[str]) -> List[str]:
+        """Delete several files; returns the ones deleted. Providers override this to batch."""
+        return [path for path in paths if await self.delete(path)]
+
+    async def touch(self, key: str) -> bool:
+        """Mark a stored file as just written, so age-based cleanup leaves it be. False if there's nothing under key."""
+        return await self.exists(key)
+
+    async def modified(self, key: str) -> Optional[float]:
+        """Unix time the file was last written or touched; None if it isn't there."""
+        return None
+
+
+class UrlCache:
+    """
+    Bounded LRU of signed URLs with a per-entry deadline. Entries are
+    dropped well before the signature itself expires, so a URL handed out
+    from the cache still has at least the safety margin left to be used.
+    Only touched from the event loop, so no locking.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[str, float]]" = OrderedDict()
+        # path -> its entries (one per download filename), so discards don't scan
+        self._by_path: Dict[str, Set[Tuple[str, Optional[str]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Tuple[str, Optional[str]]):
+        del self._entries[key]
+        keys = self._by_path[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_path[key[0]]
+
+    def get(self, path: str, filename: Optional[str] = None) -> Optional[str]:
+        key = (path, filename)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, path: str, url: str, filename: Optional[str] = None):
+        if not url:
+            return
+        key = (path, filename)
+        self._entries[key] = (url, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        self._by_path.setdefault(path, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def discard(self, path: str):
+        self.discard_many([path])
+
+    def discard_many(self, paths: Iterable[str]):
+        for path in paths:
+            for key in self._by_path.pop(path, ()):
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+        self._by_path.clear()
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+class DiskCache:
+    """
+    Read-through LRU of remote objects on local disk, capped at max_bytes.
+
+    A miss downloads the object in a worker thread to a temp file, checks it
+    against the expected sha256 (the asset's content hash) or, failing that,
+    a single-part ETag (md5), and only then renames it into place, so any
+    file under its final name is complete and verified. Hits check the size
+    still matches. Objects over max_object_bytes aren't cached; callers fall
+    back to the remote URL for those.
+
+    Files are named by a hash of the key, so the index can be rebuilt from
+    the directory after a restart (oldest mtime evicted first). The index is
+    only touched from the event loop; concurrent misses for one key wait on
+    a single download.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_object_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._filling: dict = {}
+        self._loaded = False
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.checksum_failures = 0
+        self.bypassed = 0  # Too big to cache
+
+    @staticmethod
+    def _name(key: str) -> str:
+        suffix = Path(key).suffix.lower()
+        return hashlib.sha256(key.encode()).hexdigest() + (suffix if len(suffix) <= 11 else "")
+
+    def _scan(self) -> List[Tuple[str, int]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        found = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                path.unlink(missing_ok=True)  # Leftover from an interrupted fill
+                continue
+            stat = path.stat()
+            found.append((stat.st_mtime, path.name, stat.st_size))
+        return [(name, size) for _, name, size in sorted(found)]
+
+    async def _load(self):
+        if self._loaded:
+            return
+        for name, size in await run_blocking(self._scan):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._loaded = True
+        await self._evict()
+
+    def _fill(self, provider: "S3StorageProvider", key: str, target: Path, digest: Optional[str]) -> Optional[int]:
+        response = provider.open_object(key)
+        body = response["Body"]
+        if response["ContentLength"] > self.max_object_bytes:
+            body.close()
+            return None
+        partial = self.directory / f".{target.name}.{uuid.uuid4().hex}"
+        sha256, md5 = hashlib.sha256(), hashlib.md5()
+        size = 0
+        try:
+            with partial.open("wb") as out:
+                for chunk in body.iter_chunks(CHUNK_SIZE):
+                    out.write(chunk)
+                    sha256.update(chunk)
+                    md5.update(chunk)
+                    size += len(chunk)
+            etag = response.get("ETag", "").strip('"')
+            if size != response["ContentLength"]:
+                raise ChecksumMismatch(f"{key}: got {size} of {response['ContentLength']} bytes")
+            if digest and sha256.hexdigest() != digest:
+                raise ChecksumMismatch(f"{key}: sha256 mismatch")
+            if not digest and etag and "-" not in etag and md5.hexdigest() != etag:
+                raise ChecksumMismatch(f"{key}: ETag mismatch")
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+        return size
+
+    async def peek(self, key: str) -> Optional[Path]:
+        """Local path of key if it's already cached; never downloads."""
+        await self._load()
+        name = self._name(key)
+        path = self.directory / name
+        return path if await self._hit(name, path) else None
+
+    async def fetch(self, provider: "S3StorageProvider", key: str, digest: Optional[str] = None) -> Optional[Path]:
+        """Local path of a verified copy of key, downloading it on a miss; None if not cacheable."""
+        await self._load()
+        name = self._name(key)
+        path = self.directory / name
+        if await self._hit(name, path):
+            return path
+
+        lock = self._filling.setdefault(name, anyio.Lock())
+        try:
+            async with lock:
+                # Another request may have filled it while we waited
+                if await self._hit(name, path):
+                    return path
+                self.misses += 1
+                try:
+                    size = await run_blocking(self._fill, provider, key, path, digest)
+                except ChecksumMismatch as e:
+                    self.checksum_failures += 1
+                    print(f"Storage cache: {e}")
+                    return None
+                except Exception as e:
+                    # The caller falls back to the remote copy
+                    print(f"Storage cache fill error: {e}")
+                    return None
+                if size is None:
+                    self.bypassed += 1
+                    return None
+                self._entries[name] = size
+                self.total_bytes += size
+        finally:
+            # Only the last one out drops the lock, so a newcomer can't start
+            # a second fill beside a waiter still holding the old one
+            if not lock.statistics().tasks_waiting and not lock.locked():
+                self._filling.pop(name, None)
+        await self._evict(keep=name)
+        return path
+
+    async def _hit(self, name: str, path: Path) -> bool:
+        size = self._entries.get(name)
+        if size is None:
+            return False
+        try:
+            intact = (await run_blocking(os.stat, path)).st_size == size
+        except FileNotFoundError:
+            intact = False
+        if not intact:
+            await self._drop(name)
+            return False
+        self._entries.move_to_end(name)
+        self.hits += 1
+        return True
+
+    async def _drop(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self.total_bytes -= size
+            await run_blocking(lambda: (self.directory / name).unlink(missing_ok=True))
+
+    async def _evict(self, keep: Optional[str] = None):
+        while self.total_bytes > self.max_bytes and self._entries:
+            name = next(iter(self._entries))
+            if name == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(name)
+                continue
+            await self._drop(name)
+            self.evictions += 1
+
+    async def discard(self, key: str):
+        await self._drop(self._name(key))
+
+    async def clear(self):
+        await self._load()
+        for name in list(self._entries):
+            await self._drop(name)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "checksum_failures": self.checksum_failures,
+            "bypassed": self.bypassed,
+        }
+
 class LocalFileSystemStorage(StorageProvider):
     def __init__(self, base_path: str, base_url: str = "/assets"):
         self.base_path = Path(base_path)
         self.base_url = base_url
         self.base_path.mkdir(parents=True, exist_ok=True)
 
-    async def save(self, file: UploadFile, directory: str = "") -> str:
+    def _save_sync(self, source: BinaryIO, directory: str, filename: str, progress: Optional[Progress]) -> Path:
         # Create target directory if it doesn't exist
         target_dir = self.base_path / directory
         target_dir.mkdir(parents=True, exist_ok=True)
@@ -35,71 +350,267 @@ class LocalFileSystemStorage(StorageProvider):
         # For now, we'll stick to the original filename but ensure it's unique-ish or just overwrite
         # Ideally, the caller handles naming. Let's assume the caller might want to organize by ID.
         
-        file_path = target_dir / file.filename
-        
-        # Save the file
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
+        file_path = target_dir / filename
+        copy_chunked(source, file_path, progress=progress)
+        return file_path
+
+    async def save(self, file: UploadFile, directory: str = "", progress: Optional[Progress] = None) -> str:
+        # The whole copy runs in one worker thread; the upload is already
+        # spooled by Starlette so reading file.file there is safe
+        file_path = await run_blocking(self._save_sync, file.file, directory, file.filename, progress)
         # Return path relative to base_path
         return str(file_path.relative_to(self.base_path))
 
-    def get_url(self, path: str) -> str:
+    def _put_sync(self, source: BinaryIO, key: str, progress: Optional[Progress]) -> None:
+        target = self.base_path / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write beside the target and rename into place, so a reader (or a
+        # concurrent upload of the same content) never sees a partial file
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+        try:
+            copy_chunked(source, partial, progress=progress)
+            os.replace(partial, target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    async def put(self, source: BinaryIO, key: str, content_type: Optional[str] = None,
+                  progress: Optional[Progress] = None) -> str:
+        await run_blocking(self._put_sync, source, key, progress)
+        return key
+
+    async def exists(self, key: str) -> bool:
+        return await run_blocking((self.base_path / key).is_file)
+
+    def _touch_sync(self, key: str) -> bool:
+        try:
+            os.utime(self.base_path / key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def touch(self, key: str) -> bool:
+        return await run_blocking(self._touch_sync, key)
+
+    def _modified_sync(self, key: str) -> Optional[float]:
+        try:
+            return os.stat(self.base_path / key).st_mtime
+        except FileNotFoundError:
+            return None
+
+    async def modified(self, key: str) -> Optional[float]:
+        return await run_blocking(self._modified_sync, key)
+
+    async def get_url(self, path: str, filename: Optional[str] = None) -> str:
         # Ensure path doesn't start with / to avoid double slashes if base_url ends with /
         clean_path = path.lstrip("/")
         return f"{self.base_url}/{clean_path}"
 
-    def delete(self, path: str) -> bool:
+    def _delete_sync(self, path: str) -> bool:
         full_path = self.base_path / path
         if full_path.exists():
             os.remove(full_path)
             return True
         return False
 
+    async def delete(self, path: str) -> bool:
+        return await run_blocking(self._delete_sync, path)
+
+    async def delete_many(self, paths: List[str]) -> List[str]:
+        # One worker-thread hop for the whole batch
+        return await run_blocking(lambda: [path for path in paths if self._delete_sync(path)])
+
+
+from .s3_storage import S3StorageProvider, URL_EXPIRES_IN
 
-from .s3_storage import S3StorageProvider
+PRESIGNED_URL_CACHE_SIZE = 20000
+# Hand out cached presigned URLs only while they have at least this long left
+PRESIGNED_URL_SAFETY_MARGIN = 600
 
 class DelegatingStorageProvider(StorageProvider):
     def __init__(self, local_storage: LocalFileSystemStorage):
         self._local_storage = local_storage
-        self._s3_provider: dict[str, S3StorageProvider] = {} # Cache S3 provider
+        self._s3_provider: Optional[S3StorageProvider] = None # Cache S3 provider
         self._active_provider_type = "local" # Default
         self._s3_config = {}
+        # Presigned URLs are shared across requests; signing each one again
+        # for every asset on every list page is pure CPU
+        self.url_cache = UrlCache(PRESIGNED_URL_CACHE_SIZE, URL_EXPIRES_IN - PRESIGNED_URL_SAFETY_MARGIN)
+        # Optional local copies of hot S3 objects, see configure_cache()
+        self._cache_settings: Optional[Tuple[str, int, int]] = None
+        self.disk_cache: Optional[DiskCache] = None
 
     def configure(self, provider_type: str, s3_config: dict = None):
+        if provider_type != self._active_provider_type:
+            self.url_cache.clear()
         self._active_provider_type = provider_type
-        if s3_config:
+        # Settings are applied on every load and save; only a changed S3
+        # config drops the client and the URLs it signed
+        if s3_config and s3_config != self._s3_config:
             self._s3_config = s3_config
             # Re-init S3 provider with new config
-            self._s3_provider = {}
+            self._s3_provider = None
+            self.url_cache.clear()
+
+    def configure_cache(self, directory: str, max_bytes: int, max_object_bytes: int):
+        """Enable (max_bytes > 0) or disable the disk cache in front of S3."""
+        self._cache_settings = (directory, max_bytes, max_object_bytes) if max_bytes > 0 else None
+        if self.disk_cache and self._cache_settings:
+            self.disk_cache.max_bytes = max_bytes
+            self.disk_cache.max_object_bytes = max_object_bytes
+
+    def _disk_cache(self) -> Optional[DiskCache]:
+        if self._cache_settings is None or not self._s3_config.get("bucket"):
+            return None
+        directory, max_bytes, max_object_bytes = self._cache_settings
+        # One directory per bucket, so switching buckets never serves the wrong object
+        directory = Path(directory) / self._s3_config["bucket"]
+        if self.disk_cache is None or self.disk_cache.directory != directory:
+            self.disk_cache = DiskCache(directory, max_bytes, max_object_bytes)
+        return self.disk_cache
+
+    def _s3(self) -> S3StorageProvider:
+        # Lazy init S3
+        if not self._s3_provider:
+            self._s3_provider = S3StorageProvider(
+                bucket_name=self._s3_config.get("bucket"),
+                region_name=self._s3_config.get("region"),
+                aws_access_key_id=self._s3_config.get("access_key"),
+                aws_secret_access_key=self._s3_config.get("secret_key"),
+                endpoint_url=self._s3_config.get("endpoint_url"),
+                **self._s3_config.get("transfer", {})
+            )
+        return self._s3_provider
 
     def _get_provider(self) -> StorageProvider:
         if self._active_provider_type == "s3":
-            # Lazy init S3
-            if not self._s3_provider:
-                self._s3_provider = S3StorageProvider(
-                    bucket_name=self._s3_config.get("bucket"),
-                    region_name=self._s3_config.get("region"),
-                    aws_access_key_id=self._s3_config.get("access_key"),
-                    aws_secret_access_key=self._s3_config.get("secret_key")
-                )
-            return self._s3_provider
+            return self._s3()
         return self._local_storage
 
-    async def save(self, file: UploadFile, directory: str) -> str:
-        return await self._get_provider().save(file, directory)
+    def _provider_for(self, provider: Optional[str]) -> StorageProvider:
+        # Assets record where their file lives (storage_provider); files that
+        # predate that follow the active provider
+        if provider is None:
+            return self._get_provider()
+        return self._s3() if provider == "s3" else self._local_storage
+
+    @property
+    def active_provider(self) -> str:
+        """What new files are written to: "local" or "s3"."""
+        return self._active_provider_type
+
+    async def save(self, file: UploadFile, directory: str, progress: Optional[Progress] = None) -> str:
+        return await self._get_provider().save(file, directory, progress)
+
+    async def put(self, source: BinaryIO, key: str, content_type: Optional[str] = None,
+                  progress: Optional[Progress] = None) -> str:
+        return await self._get_provider().put(source, key, content_type, progress)
+
+    async def exists(self, key: str) -> bool:
+        return await self._get_provider().exists(key)
+
+    async def touch(self, key: str) -> bool:
+        return await self._get_provider().touch(key)
+
+    async def modified(self, key: str, provider: Optional[str] = None) -> Optional[float]:
+        return await self._provider_for(provider).modified(key)
+
+    def s3_provider(self) -> Optional[S3StorageProvider]:
+        """The S3 provider when it is the active one, for S3-only features."""
+        if self._active_provider_type != "s3":
+            return None
+        return self._get_provider()
+
+    def local_path(self, path: str) -> Optional[Path]:
+        """Filesystem path for a stored file, or None when the active provider is remote."""
+        if self._active_provider_type == "s3":
+            return None
+        return self._local_storage.base_path / path
+
+    async def local_file(self, path: str, digest: Optional[str] = None, provider: Optional[str] = None,
+                         fill: bool = True) -> Optional[Path]:
+        """
+        Filesystem path for a stored file. Files on S3 come from the disk
+        cache when that's on, downloaded on a miss unless fill is False
+        (then see warm()). None means use get_url.
+        """
+        target = self._provider_for(provider)
+        if target is self._local_storage:
+            return self._local_storage.base_path / path
+        cache = self._disk_cache()
+        if cache is None:
+            return None
+        if not fill:
+            return await cache.peek(path)
+        return await cache.fetch(target, path, digest)
+
+    async def warm(self, path: str, digest: Optional[str] = None, provider: Optional[str] = None):
+        """Pull an S3 file into the disk cache, e.g. as a background task after a miss."""
+        target = self._provider_for(provider)
+        cache = self._disk_cache()
+        if cache is not None and target is not self._local_storage:
+            await cache.fetch(target, path, digest)
+
+    async def download_to(self, path: str, target: Path, provider: Optional[str] = None) -> int:
+        """Copy a stored file to target on local disk, wherever it lives. Returns bytes written."""
+        source = self._provider_for(provider)
+
+        def copy() -> int:
+            if source is self._local_storage:
+                with (self._local_storage.base_path / path).open("rb") as f:
+                    return copy_chunked(f, target)
+            return copy_chunked(source.open_object(path)["Body"], target)
+
+        return await run_blocking(copy)
+
+    def cache_stats(self) -> Optional[dict]:
+        cache = self._disk_cache()
+        return cache.stats() if cache else None
+
+    async def get_url(self, path: str, filename: Optional[str] = None, provider: Optional[str] = None) -> str:
+        target = self._provider_for(provider)
+        if target is self._local_storage:
+            return await target.get_url(path, filename)
+        url = self.url_cache.get(path, filename)
+        if url is None:
+            url = await target.get_url(path, filename)
+            self.url_cache.put(path, url, filename)
+        return url
+
+    async def get_urls(self, paths: List[str], providers: Optional[List[Optional[str]]] = None) -> List[str]:
+        """URLs for many files, in order; providers gives each file's recorded provider."""
+        providers = providers or [None] * len(paths)
+        urls: List[Optional[str]] = [None] * len(paths)
+        remote = []
+        for i, (path, provider) in enumerate(zip(paths, providers)):
+            if self._provider_for(provider) is self._local_storage:
+                urls[i] = await self._local_storage.get_url(path)
+            else:
+                urls[i] = self.url_cache.get(path)
+                if urls[i] is None:
+                    remote.append(i)
+        missing = list(dict.fromkeys(paths[i] for i in remote))
+        if missing:
+            # One worker-thread hop signs every miss on the page
+            signed = dict(zip(missing, await self._s3().get_urls(missing)))
+            for path, url in signed.items():
+                self.url_cache.put(path, url)
+            for i in remote:
+                urls[i] = signed[paths[i]]
+        return urls
 
-    def get_url(self, path: str) -> str:
-        # Check if path looks like S3 url? Or just delegate?
-        # If we switched providers, old assets might still be local.
-        # Ideally we store the provider type in the asset metadata too, but for now let's try to infer or just delegate.
-        # If the path doesn't start with assets/ it might be S3? 
-        # Actually LocalFileSystemStorage returns "assets/..."
-        # S3 returned just the key.
-        return self._get_provider().get_url(path)
+    async def delete(self, path: str, provider: Optional[str] = None) -> bool:
+        return bool(await self.delete_many([path], provider))
 
-    def delete(self, path: str) -> bool:
-        return self._get_provider().delete(path)
+    async def delete_many(self, paths: List[str], provider: Optional[str] = None) -> List[str]:
+        target = self._provider_for(provider)
+        if target is not self._local_storage:
+            self.url_cache.discard_many(paths)
+            cache = self._disk_cache()
+            if cache:
+                for path in paths:
+                    await cache.discard(path)
+        return await target.delete_many(paths)
 
 # Singleton instance
 # Base path is relative to the project root, assuming running from there or configured correctly.
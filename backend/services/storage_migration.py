@@ -0,0 +1,274 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import BinaryIO, List, Optional
+
+import anyio
+from sqlalchemy import func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import AssetModel
+from .s3_storage import MB, S3StorageProvider
+from .storage import local_storage_instance, run_blocking, storage
+
+MIGRATION_PAGE_SIZE = 200
+MAX_REPORTED_ERRORS = 50
+
+
+class Throttle:
+    """Bandwidth cap shared by every transfer thread (bytes per second; 0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def consume(self, size: int):
+        if not self.rate:
+            return
+        # Each read books the next slot on a shared timeline and waits for it
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + size / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class TransferReader:
+    """
+    File wrapper handed to the S3 upload: throttles reads and hashes what
+    went out, so the object can be checked without reading the file twice.
+    Tracks the sha256, the whole-file md5 and per-part md5s at the
+    provider's part size, which between them give the ETag S3 will report.
+    """
+
+    def __init__(self, source: BinaryIO, part_size: int, throttle: Optional[Throttle] = None):
+        self._source = source
+        self._part_size = part_size
+        self._throttle = throttle
+        self.sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5()
+        self._part_md5 = hashlib.md5()
+        self._part_fill = 0
+        self._part_digests: List[bytes] = []
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        if not data:
+            return data
+        if self._throttle:
+            self._throttle.consume(len(data))
+        self.size += len(data)
+        self.sha256.update(data)
+        self._md5.update(data)
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self._part_size - self._part_fill)
+            self._part_md5.update(view[:take])
+            self._part_fill += take
+            view = view[take:]
+            if self._part_fill == self._part_size:
+                self._part_digests.append(self._part_md5.digest())
+                self._part_md5, self._part_fill = hashlib.md5(), 0
+        return data
+
+    def drain(self):
+        while self.read(MB):
+            pass
+
+    def etag(self, multipart_threshold: int) -> str:
+        """The ETag S3 gives this content when uploaded through S3StorageProvider.put."""
+        if self.size < multipart_threshold:
+            return self._md5.hexdigest()
+        digests = self._part_digests + ([self._part_md5.digest()] if self._part_fill else [])
+        return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+class StorageMigration:
+    """
+    Background copy of locally stored files to the S3 bucket.
+
+    Walks assets not yet recorded as on S3, one page of distinct file paths
+    at a time. Each file is uploaded (a few at once, under a shared
+    bandwidth cap) and checked against its content hash and the ETag S3
+    reports. Then every asset pointing at it is switched to
+    storage_provider="s3" in one update. Serving keeps working throughout:
+    an asset reads from local disk until the moment its row flips, and the
+    local copy stays unless delete_local is set.
+
+    Progress lives in the rows, so a stopped or failed run picks up where
+    it left off when started again; files already in the bucket with the
+    right content are marked without uploading them again.
+    """
+
+    def __init__(self):
+        self.status = "idle"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self._cancelled = False
+        self._reset()
+
+    def _reset(self):
+        self.total_files = 0
+        self.migrated_files = 0
+        self.already_present = 0
+        self.failed_files = 0
+        self.bytes_transferred = 0
+        self.errors: List[dict] = []
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def queue(self):
+        self.status = "queued"
+        self.error = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def report(self) -> dict:
+        elapsed = ((self.finished_at or datetime.now(timezone.utc)) - self.started_at).total_seconds() \
+            if self.started_at else 0
+        done = self.migrated_files + self.already_present + self.failed_files
+        return {
+            "status": self.status,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "total_files": self.total_files,
+            "migrated_files": self.migrated_files,
+            "already_present": self.already_present,
+            "failed_files": self.failed_files,
+            "remaining_files": max(self.total_files - done, 0),
+            "bytes_transferred": self.bytes_transferred,
+            "bytes_per_second": self.bytes_transferred / elapsed if elapsed else 0.0,
+            "error": self.error,
+            "errors": self.errors,
+        }
+
+    # --- One file (worker thread) ---
+
+    def _transfer(self, provider: S3StorageProvider, key: str, content_type: Optional[str],
+                  digest: Optional[str], throttle: Throttle) -> int:
+        """Copy one file and verify it. Returns bytes uploaded (0 if the bucket already had it)."""
+        path = local_storage_instance.base_path / key
+        remote = provider.head(key)
+        if not path.is_file():
+            if remote is None:
+                raise FileNotFoundError("missing locally and in the bucket")
+            return 0  # Only the bucket has it; just record that
+
+        if remote is not None and remote["ContentLength"] == path.stat().st_size:
+            with path.open("rb") as f:
+                reader = TransferReader(f, provider.part_size)
+                reader.drain()
+            if remote["ETag"].strip('"') == reader.etag(provider.multipart_threshold):
+                return 0
+
+        with path.open("rb") as f:
+            reader = TransferReader(f, provider.part_size, throttle)
+            provider._upload(reader, key, content_type, None)
+        problem = None
+        if digest and reader.sha256.hexdigest() != digest:
+            problem = "local file does not match its content hash"
+        else:
+            remote = provider.head(key)
+            if remote is None or remote["ContentLength"] != reader.size:
+                problem = "size mismatch after upload"
+            elif remote["ETag"].strip('"') != reader.etag(provider.multipart_threshold):
+                problem = "ETag mismatch after upload"
+        if problem:
+            provider.s3_client.delete_object(Bucket=provider.bucket_name, Key=key)
+            raise ValueError(problem)
+        return reader.size
+
+    # --- Job ---
+
+    def _pending(self):
+        return or_(AssetModel.storage_provider.is_(None), AssetModel.storage_provider == "local"), \
+            AssetModel.file_path.notlike("placeholder_%")
+
+    async def run(self, bind, concurrency: int = 4, max_bytes_per_second: float = 0, delete_local: bool = False):
+        """Background job; uses its own session."""
+        self.status = "running"
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self.error = None
+        self._reset()
+        try:
+            provider = storage.s3_provider()
+            if provider is None:
+                raise RuntimeError("S3 is not the active storage provider")
+            throttle = Throttle(max_bytes_per_second)
+            limiter = anyio.CapacityLimiter(concurrency)
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                result = await db.execute(
+                    select(func.count(func.distinct(AssetModel.file_path))).where(*self._pending())
+                )
+                self.total_files = result.scalar_one()
+
+                last = ""
+                while not self._cancelled:
+                    # Keyset paging: rows flip to s3 as we go, so offsets would skip files
+                    result = await db.execute(
+                        select(AssetModel.file_path, func.max(AssetModel.content_hash), func.max(AssetModel.mime_type))
+                        .where(*self._pending(), AssetModel.file_path > last)
+                        .group_by(AssetModel.file_path)
+                        .order_by(AssetModel.file_path)
+                        .limit(MIGRATION_PAGE_SIZE)
+                    )
+                    page = result.all()
+                    if not page:
+                        break
+                    last = page[-1][0]
+                    done = await self._migrate_page(provider, page, limiter, throttle)
+                    if done:
+                        await db.execute(
+                            update(AssetModel).where(AssetModel.file_path.in_(done))
+                            .values(storage_provider="s3").execution_options(synchronize_session=False)
+                        )
+                        await db.commit()
+                        if delete_local:
+                            for key in done:
+                                await local_storage_instance.delete(key)
+            self.status = "cancelled" if self._cancelled else "completed"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now(timezone.utc)
+
+    async def _migrate_page(self, provider: S3StorageProvider, page, limiter, throttle) -> List[str]:
+        done = []
+
+        async def migrate(key: str, digest: Optional[str], content_type: Optional[str]):
+            async with limiter:
+                if self._cancelled:
+                    return
+                try:
+                    sent = await run_blocking(self._transfer, provider, key, content_type, digest, throttle)
+                except Exception as e:
+                    self.failed_files += 1
+                    if len(self.errors) < MAX_REPORTED_ERRORS:
+                        self.errors.append({"key": key, "error": str(e)})
+                    return
+                if sent:
+                    self.migrated_files += 1
+                    self.bytes_transferred += sent
+                else:
+                    self.already_present += 1
+                done.append(key)
+
+        async with anyio.create_task_group() as tg:
+            for key, digest, content_type in page:
+                tg.start_soon(migrate, key, digest, content_type)
+        return done
+
+
+storage_migration = StorageMigration()
@@ -0,0 +1,196 @@
+"""
+Text and metadata extraction for uploaded files.
+
+Plain functions over a file path so they can run in a worker process (see
+services/asset_processing.py); keep heavy imports out of module scope, the
+workers import this module on start. DOCX and PPTX are zipped XML and are
+read with the standard library; PDF needs the optional pypdf package.
+"""
+import os
+import re
+import zipfile
+from typing import List, Optional, Tuple
+from xml.etree import ElementTree
+
+# Stored per file; the rest of a very long document is dropped
+MAX_TEXT_CHARS = 1_000_000
+# Extracted text fed to the similarity index and duplicate signatures
+INDEXED_TEXT_CHARS = 20_000
+SUMMARY_CHARS = 300
+
+EXTENSIONS = {
+    ".md": "markdown", ".markdown": "markdown",
+    ".txt": "text", ".text": "text",
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".pptx": "pptx",
+}
+MIME_TYPES = {
+    "text/markdown": "markdown",
+    "text/plain": "text",
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": "pptx",
+}
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_DC = "{http://purl.org/dc/elements/1.1/}"
+_EP = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+
+_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+_MD_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MD_MARKUP = re.compile(r"^\s{0,3}(#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)|[*`~]+|(?<![A-Za-z0-9])_+|_+(?![A-Za-z0-9])", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def detect_format(filename: Optional[str], mime_type: Optional[str] = None) -> Optional[str]:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return EXTENSIONS.get(ext) or MIME_TYPES.get((mime_type or "").split(";")[0].strip())
+
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        # Enough bytes for MAX_TEXT_CHARS of UTF-8 in the worst case
+        return _decode(f.read(MAX_TEXT_CHARS * 4))
+
+
+def _markdown(path: str) -> Tuple[Optional[str], str, None]:
+    source = _read_text(path)
+    title = None
+    lines = source.splitlines()
+    for i, line in enumerate(lines):
+        match = _HEADING.match(line)
+        if match:
+            title = match.group(1)
+            break
+        # Setext heading: a line underlined with ===
+        if line.strip() and i + 1 < len(lines) and re.fullmatch(r"=+\s*", lines[i + 1]):
+            title = line.strip()
+            break
+    text = _MD_MARKUP.sub("", _MD_LINK.sub(r"\1", source))
+    text = "\n".join(line for line in text.splitlines() if not line.strip().startswith("```") and not re.fullmatch(r"[=-]{3,}\s*", line))
+    return title, text, None
+
+
+def _plain(path: str) -> Tuple[None, str, None]:
+    return None, _read_text(path), None
+
+
+def _xml(archive: zipfile.ZipFile, name: str) -> Optional[ElementTree.Element]:
+    try:
+        return ElementTree.fromstring(archive.read(name))
+    except KeyError:
+        return None
+
+
+def _core_title(archive: zipfile.ZipFile) -> Optional[str]:
+    core = _xml(archive, "docProps/core.xml")
+    title = core.findtext(f"{_DC}title") if core is not None else None
+    return title.strip() if title and title.strip() else None
+
+
+def _docx(path: str) -> Tuple[Optional[str], str, Optional[int]]:
+    with zipfile.ZipFile(path) as archive:
+        document = _xml(archive, "word/document.xml")
+        if document is None:
+            raise ValueError("not a Word document")
+        paragraphs = []
+        for p in document.iter(f"{_W}p"):
+            parts = []
+            for node in p.iter():
+                if node.tag == f"{_W}t" and node.text:
+                    parts.append(node.text)
+                elif node.tag == f"{_W}tab":
+                    parts.append("\t")
+                elif node.tag in (f"{_W}br", f"{_W}cr"):
+                    parts.append("\n")
+            paragraphs.append("".join(parts))
+        app = _xml(archive, "docProps/app.xml")
+        pages = app.findtext(f"{_EP}Pages") if app is not None else None
+        return _core_title(archive), "\n".join(paragraphs), int(pages) if pages and pages.isdigit() else None
+
+
+def _pptx(path: str) -> Tuple[Optional[str], str, int]:
+    with zipfile.ZipFile(path) as archive:
+        slides = sorted(
+            (n for n in archive.namelist() if re.fullmatch(r"ppt/slides/slide\d+\.xml", n)),
+            key=lambda n: int(re.search(r"(\d+)\.xml$", n).group(1)),
+        )
+        blocks: List[str] = []
+        for name in slides:
+            slide = _xml(archive, name)
+            paragraphs = ["".join(t.text or "" for t in p.iter(f"{_A}t")) for p in slide.iter(f"{_A}p")]
+            blocks.append("\n".join(p for p in paragraphs if p.strip()))
+        return _core_title(archive), "\n\n".join(blocks), len(slides)
+
+
+def _pdf(path: str) -> Tuple[Optional[str], str, int]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedFormat("PDF extraction needs the pypdf package")
+    reader = PdfReader(path)
+    pages, size = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        size += len(text)
+        if size >= MAX_TEXT_CHARS:
+            break
+    title = reader.metadata.title if reader.metadata else None
+    return (title.strip() or None) if title else None, "\n\n".join(pages), len(reader.pages)
+
+
+_EXTRACTORS = {"markdown": _markdown, "text": _plain, "docx": _docx, "pptx": _pptx, "pdf": _pdf}
+
+
+def _normalize(text: str) -> str:
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in text.splitlines())
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def summarize(text: str, title: Optional[str] = None, limit: int = SUMMARY_CHARS) -> str:
+    """First paragraph that isn't the title, cut at a word boundary."""
+    for paragraph in text.split("\n\n"):
+        paragraph = " ".join(paragraph.split())
+        if title and paragraph.startswith(title):
+            # Heading with the first paragraph right under it
+            paragraph = paragraph[len(title):].strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= limit:
+            return paragraph
+        return paragraph[:limit].rsplit(" ", 1)[0] + "…"
+    return ""
+
+
+def extract(path: str, filename: Optional[str], mime_type: Optional[str] = None) -> dict:
+    """
+    Pull text and basic metadata out of one file. Raises UnsupportedFormat for
+    files we don't read; other exceptions mean the file is damaged.
+    """
+    fmt = detect_format(filename, mime_type)
+    if fmt is None:
+        raise UnsupportedFormat(f"No extractor for {filename}")
+    title, text, pages = _EXTRACTORS[fmt](path)
+    text = _normalize(text)[:MAX_TEXT_CHARS]
+    return {
+        "format": fmt,
+        "title": title,
+        "summary": summarize(text, title),
+        "text": text,
+        "page_count": pages,
+        "word_count": len(text.split()),
+    }
@@ -0,0 +1,89 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Finished entries stay around long enough for a client's last poll
+RETAIN_SECONDS = 600
+
+
+class UploadProgress:
+    """
+    Byte counts for uploads being written to storage, keyed by a client-chosen
+    upload id. The client sends the id with the upload and polls
+    /api/v2/uploads/{id} while the request is in flight.
+
+    Storage providers report from worker threads (S3 parts complete in
+    parallel), so every update takes the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+
+    def start(self, upload_id: str, filename: Optional[str], total_bytes: Optional[int]):
+        with self._lock:
+            self._purge()
+            self._entries[upload_id] = {
+                "upload_id": upload_id,
+                "filename": filename,
+                "status": "uploading",
+                "total_bytes": total_bytes,
+                "transferred_bytes": 0,
+                "retries": 0,
+                "error": None,
+                "updated_at": datetime.now(timezone.utc),
+                "_finished": None,
+            }
+
+    def advance(self, upload_id: str, nbytes: int):
+        with self._lock:
+            entry = self._entries.get(upload_id)
+            if entry:
+                entry["transferred_bytes"] += nbytes
+                entry["updated_at"] = datetime.now(timezone.utc)
+
+    def retried(self, upload_id: str):
+        with self._lock:
+            entry = self._entries.get(upload_id)
+            if entry:
+                entry["retries"] += 1
+
+    def finish(self, upload_id: str, error: Optional[str] = None):
+        with self._lock:
+            entry = self._entries.get(upload_id)
+            if entry:
+                entry["status"] = "failed" if error else "completed"
+                entry["error"] = error
+                entry["updated_at"] = datetime.now(timezone.utc)
+                entry["_finished"] = time.monotonic()
+
+    def get(self, upload_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(upload_id)
+            return {k: v for k, v in entry.items() if not k.startswith("_")} if entry else None
+
+    def reporter(self, upload_id: Optional[str]) -> Optional["ProgressReporter"]:
+        return ProgressReporter(self, upload_id) if upload_id else None
+
+    def _purge(self):
+        cutoff = time.monotonic() - RETAIN_SECONDS
+        for key in [k for k, e in self._entries.items() if e["_finished"] and e["_finished"] < cutoff]:
+            del self._entries[key]
+
+
+class ProgressReporter:
+    """What storage providers get: byte and retry callbacks for one upload."""
+
+    def __init__(self, tracker: UploadProgress, upload_id: str):
+        self.tracker = tracker
+        self.upload_id = upload_id
+
+    def __call__(self, nbytes: int):
+        self.tracker.advance(self.upload_id, nbytes)
+
+    def retried(self):
+        self.tracker.retried(self.upload_id)
+
+
+upload_progress = UploadProgress()
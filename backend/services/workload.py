@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, distinct, func, case, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..models_db import (
+    OpportunityModel, OpportunityPlayModel, OpportunityStageInstanceModel, PersonModel, opportunity_members
+)
+
+OPEN_STAGE_STATUSES = ("not_started", "in_progress")
+UPCOMING_DAYS = 30
+UPCOMING_LIMIT = 5
+
+
+def member_rows(opportunity_id: str, sales_owner: Optional[str], technical_lead: Optional[str],
+                team: Optional[Iterable[str]]) -> List[dict]:
+    rows = {}
+    for person_id, role in [(sales_owner, "sales_owner"), (technical_lead, "technical_lead")] + [
+        (p, "team_member") for p in team or []
+    ]:
+        if person_id:
+            rows[(person_id, role)] = {"opportunity_id": opportunity_id, "person_id": person_id, "role": role}
+    return list(rows.values())
+
+
+async def sync_opportunity_members(db: AsyncSession, opportunity_ids: List[str]):
+    """
+    Rewrite opportunity_members for the given opportunities from their owner,
+    lead and team columns. Runs inside the caller's transaction.
+    """
+    if not opportunity_ids:
+        return
+    result = await db.execute(
+        select(
+            OpportunityModel.id, OpportunityModel.sales_owner_user_id,
+            OpportunityModel.technical_lead_user_id, OpportunityModel.team_member_user_ids
+        ).where(OpportunityModel.id.in_(opportunity_ids))
+    )
+    rows = [r for opp in result.all() for r in member_rows(*opp)]
+    await db.execute(delete(opportunity_members).where(opportunity_members.c.opportunity_id.in_(opportunity_ids)))
+    if rows:
+        await db.execute(opportunity_members.insert(), rows)
+
+
+async def clear_opportunity_members(db: AsyncSession, opportunity_id: str):
+    await db.execute(delete(opportunity_members).where(opportunity_members.c.opportunity_id == opportunity_id))
+
+
+async def get_workload(
+    db: AsyncSession,
+    person_ids: Optional[List[str]] = None,
+    days: int = UPCOMING_DAYS,
+    upcoming_limit: int = UPCOMING_LIMIT,
+    now: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Per-person workload over active opportunities: opportunity counts by role,
+    open stage instances (overdue ones counted separately) and the next
+    target dates. Three grouped queries driven by the person_id index on
+    opportunity_members, rather than a scan of every opportunity's JSON.
+    """
+    now = now or datetime.now(timezone.utc)
+    horizon = now + timedelta(days=days)
+    members = opportunity_members.c
+
+    active = select(members.opportunity_id, members.person_id, members.role).join(
+        OpportunityModel, and_(OpportunityModel.id == members.opportunity_id, OpportunityModel.status == "active")
+    )
+    if person_ids:
+        active = active.where(members.person_id.in_(person_ids))
+    active = active.subquery()
+
+    workload: Dict[str, dict] = {}
+
+    def entry(person_id: str) -> dict:
+        return workload.setdefault(person_id, {
+            "person_id": person_id, "name": None,
+            "active_opportunities": 0, "as_sales_owner": 0, "as_technical_lead": 0, "as_team_member": 0,
+            "open_stage_instances": 0, "overdue_stage_instances": 0, "upcoming": [],
+        })
+
+    # People asked for explicitly are reported even when idle
+    for person_id in person_ids or []:
+        entry(person_id)
+
+    # 1. Opportunity counts per role
+    result = await db.execute(
+        select(
+            active.c.person_id,
+            func.count(distinct(active.c.opportunity_id)),
+            func.count(case((active.c.role == "sales_owner", 1))),
+            func.count(case((active.c.role == "technical_lead", 1))),
+            func.count(case((active.c.role == "team_member", 1))),
+        ).group_by(active.c.person_id)
+    )
+    for person_id, total, owner, lead, member in result.all():
+        e = entry(person_id)
+        e.update(active_opportunities=total, as_sales_owner=owner, as_technical_lead=lead, as_team_member=member)
+
+    # 2. Open and overdue stage instances across each person's opportunities
+    person_opps = select(active.c.person_id, active.c.opportunity_id).distinct().subquery()
+    stages = OpportunityStageInstanceModel
+    open_stages = (
+        select(person_opps.c.person_id, stages.id, stages.play_stage_key, stages.target_date,
+               OpportunityPlayModel.opportunity_id, OpportunityPlayModel.play_id)
+        .join(OpportunityPlayModel, OpportunityPlayModel.opportunity_id == person_opps.c.opportunity_id)
+        .join(stages, stages.opportunity_play_id == OpportunityPlayModel.id)
+        .where(stages.status.in_(OPEN_STAGE_STATUSES))
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            open_stages.c.person_id,
+            func.count(open_stages.c.id),
+            func.count(case((open_stages.c.target_date < now, 1))),
+        ).group_by(open_stages.c.person_id)
+    )
+    for person_id, open_count, overdue in result.all():
+        entry(person_id).update(open_stage_instances=open_count, overdue_stage_instances=overdue)
+
+    # 3. Next target dates, top N per person via a window function
+    ranked = (
+        select(
+            open_stages,
+            func.row_number().over(
+                partition_by=open_stages.c.person_id,
+                order_by=(open_stages.c.target_date, open_stages.c.id),
+            ).label("rank"),
+        )
+        .where(open_stages.c.target_date >= now, open_stages.c.target_date <= horizon)
+        .subquery()
+    )
+    result = await db.execute(
+        select(ranked.c.person_id, ranked.c.opportunity_id, OpportunityModel.name, ranked.c.play_id,
+               ranked.c.play_stage_key, ranked.c.target_date)
+        .join(OpportunityModel, OpportunityModel.id == ranked.c.opportunity_id)
+        .where(ranked.c.rank <= upcoming_limit)
+        .order_by(ranked.c.person_id, ranked.c.rank)
+    )
+    for person_id, opp_id, opp_name, play_id, stage_key, target_date in result.all():
+        entry(person_id)["upcoming"].append({
+            "opportunity_id": opp_id, "opportunity_name": opp_name, "play_id": str(play_id),
+            "stage_key": stage_key, "target_date": target_date,
+        })
+
+    if workload:
+        result = await db.execute(select(PersonModel.id, PersonModel.name).where(PersonModel.id.in_(list(workload))))
+        for person_id, name in result.all():
+            workload[person_id]["name"] = name
+
+    return sorted(
+        workload.values(),
+        key=lambda w: (-w["active_opportunities"], -w["open_stage_instances"], w["person_id"]),
+    )
@@ -0,0 +1,92 @@
+import json
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.main import app
+from backend.database import Base, get_db
+from backend.services import s3_storage
+from backend.services.storage import local_storage_instance, storage
+
+# Single shared in-memory connection so the app and the test see the same data
+TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture
+async def db_engine():
+    engine = create_async_engine(TEST_DB_URL, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def db_session(db_engine):
+    SessionLocal = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with SessionLocal() as session:
+        yield session
+
+@pytest_asyncio.fixture
+async def async_client(db_engine):
+    SessionLocal = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with SessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.pop(get_db, None)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "s3(active=False, **options): settings for the s3_provider fixture")
+
+@pytest.fixture
+def asset_dir(tmp_path, monkeypatch):
+    """Local storage rooted in a temp directory."""
+    monkeypatch.setattr(local_storage_instance, "base_path", tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def s3_provider(request, monkeypatch):
+    """
+    S3StorageProvider on a moto bucket. @pytest.mark.s3(...) passes provider
+    options (part_size, multipart_threshold, ...); active=True also makes it
+    the app's storage.
+    """
+    moto = pytest.importorskip("moto")
+    marker = request.node.get_closest_marker("s3")
+    options = dict(marker.kwargs) if marker else {}
+    active = options.pop("active", False)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(s3_storage, "RETRY_BACKOFF_SECONDS", 0)
+    with moto.mock_aws():
+        provider = s3_storage.S3StorageProvider("boxbrain-test", "us-east-1", **options)
+        provider.s3_client.create_bucket(Bucket=provider.bucket_name)
+        if active:
+            monkeypatch.setattr(storage, "_active_provider_type", "s3")
+            monkeypatch.setattr(storage, "_s3_config", {"bucket": provider.bucket_name})
+            monkeypatch.setattr(storage, "_s3_provider", provider)
+        yield provider
+
+ASSET_METADATA = {"type": "template", "category": "technical", "confidentiality": "internal-only"}
+
+@pytest.fixture
+def upload_asset(async_client):
+    """Upload a file through POST /api/assets/ (PUT with asset_id); returns the asset id."""
+    async def upload(name: str, content: bytes, mime_type: str = "application/octet-stream",
+                     asset_id: str = None) -> str:
+        files = {"file": (name, content, mime_type)}
+        data = {"metadata_json": json.dumps(dict(ASSET_METADATA, title=name, summary=name))}
+        if asset_id:
+            response = await async_client.put(f"/api/assets/{asset_id}", files=files, data=data)
+        else:
+            response = await async_client.post("/api/assets/", files=files, data=data)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return upload
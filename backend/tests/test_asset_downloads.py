@@ -0,0 +1,128 @@
+import hashlib
+import os
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.api.responses import AssetFileResponse, open_file, parse_range
+from backend.models_db import AssetModel
+from backend.services.storage import storage
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=95-200", 100) == (95, 100)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.mark.asyncio
+async def test_local_download_validators_and_ranges(async_client: AsyncClient, asset_dir, upload_asset):
+    asset_id = await upload_asset("demo.mp4", CONTENT, "video/mp4")
+    url = f"/api/assets/{asset_id}/file"
+
+    full = await async_client.get(url)
+    assert full.status_code == 200
+    assert full.content == CONTENT
+    assert full.headers["etag"] == f'"{DIGEST}"'
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["content-type"] == "video/mp4"
+    assert 'filename="demo.mp4"' in full.headers["content-disposition"]
+
+    cached = await async_client.get(url, headers={"If-None-Match": f'"{DIGEST}"'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    part = await async_client.get(url, headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == CONTENT[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert part.headers["content-length"] == "100"
+
+    tail = await async_client.get(url, headers={"Range": "bytes=-16", "If-Range": f'"{DIGEST}"'})
+    assert tail.status_code == 206
+    assert tail.content == CONTENT[-16:]
+
+    stale = await async_client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"something-else"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+    unsatisfiable = await async_client.get(url, headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    head = await async_client.head(url)
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(CONTENT))
+    assert head.content == b""
+
+    assert (await async_client.get("/api/assets/missing/file")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_send_when_server_supports_it(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(CONTENT)
+    response = AssetFileResponse(*(await open_file(path)), f'"{DIGEST}"', media_type="application/pdf")
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            # What the server would do with sendfile: read from the handed-over descriptor
+            message = dict(message, data=os.pread(message["file"], message["count"], message["offset"]))
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"range", b"bytes=10-19")],
+             "extensions": {"http.response.zerocopysend": {}}}
+    await response(scope, None, send)
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert (messages[1]["offset"], messages[1]["count"]) == (10, 10)
+    assert messages[1]["data"] == CONTENT[10:20]
+
+
+@pytest.mark.asyncio
+async def test_file_removed_after_open_is_still_sent(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(CONTENT)
+    response = AssetFileResponse(*(await open_file(path)), f'"{DIGEST}"')
+    path.unlink()  # e.g. evicted from the disk cache
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await response({"type": "http", "method": "GET", "headers": []}, None, send)
+    assert messages[0]["status"] == 200
+    assert b"".join(m.get("body", b"") for m in messages[1:]) == CONTENT
+    assert response.fd is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.s3(active=True)
+async def test_s3_download_redirects_to_presigned_url(async_client: AsyncClient, db_session: AsyncSession,
+                                                      s3_provider, tmp_path, monkeypatch):
+    db_session.add(AssetModel(id="s3-asset", title="Deck", original_filename="Q3 deck.pptx",
+                              file_path=f"blobs/{DIGEST[:2]}/{DIGEST}.pptx", content_hash=DIGEST))
+    await db_session.commit()
+
+    response = await async_client.get("/api/assets/s3-asset/file")
+    assert response.status_code == 302
+    location = response.headers["location"]
+    assert f"blobs/{DIGEST[:2]}/{DIGEST}.pptx" in location
+    assert "response-content-disposition=" in location
+
+    # Found in the disk cache but evicted before it could be opened
+    async def evicted(*args, **kwargs):
+        return tmp_path / "evicted.bin"
+
+    monkeypatch.setattr(storage, "local_file", evicted)
+    monkeypatch.setattr(storage, "warm", lambda *args: None)
+    response = await async_client.get("/api/assets/s3-asset/file")
+    assert response.status_code == 302
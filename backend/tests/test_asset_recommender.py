@@ -0,0 +1,82 @@
+import pytest
+import uuid
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import (
+    AssetModel, GTMPlayModel, OpportunityModel, OpportunityPlayModel, OpportunityStageInstanceModel
+)
+from backend.services.asset_recommender import AssetRecommender, asset_features, asset_recommender
+
+
+def test_recommend_ranks_by_overlap_and_won_boost():
+    recommender = AssetRecommender()
+    recommender.upsert("a", asset_features("Discovery", ["Kubernetes"], [], [], []))
+    recommender.upsert("b", asset_features("Discovery", [], [], [], []), won_count=3)
+    recommender.upsert("c", asset_features("Delivery", ["Terraform"], [], [], []))
+
+    context = {"stage:discovery": 3.0, "tech:kubernetes": 1.0}
+    ranked = recommender.recommend(context)
+    assert [r[0] for r in ranked] == ["b", "a"]
+    assert ranked[1][2] == ["stage:discovery", "tech:kubernetes"]
+
+    # Incremental changes are picked up on the next query
+    recommender.upsert("c", asset_features("Discovery", ["Kubernetes"], [], ["k8s"], [(1, "Discovery")]))
+    recommender.remove("b")
+    assert [r[0] for r in recommender.recommend(context, limit=1)] == ["a"]
+    assert {r[0] for r in recommender.recommend(context)} == {"a", "c"}
+    assert recommender.recommend({"tag:unknown": 1.0}) == []
+
+
+@pytest.mark.asyncio
+async def test_stage_recommendations_endpoint(async_client: AsyncClient, db_session: AsyncSession):
+    asset_recommender.invalidate()
+    play = GTMPlayModel(title="Cloud Play", offering="Cloud", stages=[{"key": "Discovery"}])
+    db_session.add(play)
+    await db_session.commit()
+    await db_session.refresh(play)
+
+    won_id = str(uuid.uuid4())
+    opp_id = str(uuid.uuid4())
+    pending_id = str(uuid.uuid4())
+    db_session.add_all([
+        OpportunityModel(id=won_id, name="Won", account_name="Acme", status="closed_won", health="green"),
+        OpportunityModel(id=pending_id, name="Pending", account_name="Acme", status="active", health="green",
+                         sales_stage="Negotiation", tags=[]),
+        OpportunityModel(id=opp_id, name="Opp", account_name="Acme", status="active", health="green", tags=["migration"]),
+    ])
+    opp_play_id = str(uuid.uuid4())
+    db_session.add(OpportunityPlayModel(id=opp_play_id, opportunity_id=opp_id, play_id=play.id, is_active=True))
+    db_session.add(OpportunityStageInstanceModel(
+        id=str(uuid.uuid4()), opportunity_play_id=opp_play_id, play_stage_key="Discovery", status="not_started"
+    ))
+    for title, stage, won in (("Discovery Deck", "Discovery", [won_id]), ("Runbook", "Delivery", []), ("Checklist", "Discovery", [pending_id])):
+        db_session.add(AssetModel(
+            title=title, original_filename="x", file_path=f"x_{uuid.uuid4()}", default_stage=stage,
+            offerings=["Cloud"], linked_opportunity_ids=won
+        ))
+    await db_session.commit()
+
+    url = f"/api/v2/opportunities/{opp_id}/play/{play.id}/stage/Discovery/recommendations"
+    response = await async_client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["asset"]["title"] for r in data] == ["Discovery Deck", "Checklist", "Runbook"]
+    assert data[0]["matched_features"] == ["offering:cloud", "stage:discovery"]
+
+    # Winning an opportunity boosts its assets without a reload
+    response = await async_client.put(f"/api/v2/opportunities/{pending_id}", json={"stage": "Closed Won"})
+    assert response.status_code == 200, response.text
+    scores = {r["asset"]["title"]: r["score"] for r in (await async_client.get(url)).json()}
+    assert scores["Checklist"] == pytest.approx(scores["Discovery Deck"])
+    assert scores["Checklist"] > scores["Runbook"]
+
+    # New assets are added to the matrix without a reload
+    response = await async_client.post("/api/v2/assets", json={
+        "title": "Migration Guide", "kind": "guide", "default_stage": "Discovery", "offerings": ["Cloud"]
+    })
+    assert response.status_code == 200
+    data = (await async_client.get(url + "?limit=5")).json()
+    assert "Migration Guide" in [r["asset"]["title"] for r in data]
+
+    response = await async_client.get(f"/api/v2/opportunities/{opp_id}/play/{play.id}/stage/Missing/recommendations")
+    assert response.status_code == 404
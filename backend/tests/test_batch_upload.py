@@ -0,0 +1,80 @@
+import json
+import anyio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel, TagModel
+from backend.services import asset_manager, blob_store
+
+
+def metadata(title: str, tags=()):
+    return {"title": title, "type": "template", "category": "technical", "summary": title,
+            "confidentiality": "internal-only", "tags": list(tags)}
+
+
+@pytest.mark.asyncio
+async def test_batch_creates_assets_with_per_file_results(async_client: AsyncClient, db_session: AsyncSession,
+                                                          asset_dir):
+    files = [
+        ("files", ("deck.pptx", b"deck", "application/vnd.ms-powerpoint")),
+        ("files", ("notes.md", b"# notes", "text/markdown")),
+        ("files", ("broken.txt", b"?", "text/plain")),
+        ("files", ("copy.pptx", b"deck", "application/vnd.ms-powerpoint")),
+    ]
+    entries = [
+        metadata("Deck", ["aws", "migration"]),
+        metadata("Notes", ["aws"]),
+        {"title": "Missing the required fields"},
+        metadata("Deck copy", ["migration", "aws"]),
+    ]
+    response = await async_client.post("/api/assets/batch", files=files,
+                                       data={"metadata_json": json.dumps(entries)})
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [r["status"] for r in results] == ["created", "created", "failed", "created"]
+    assert results[2]["error"].startswith("Validation error")
+    assert sorted(results[0]["asset"]["tags"]) == ["aws", "migration"]
+
+    tags = (await db_session.execute(select(TagModel.name))).scalars().all()
+    assert sorted(tags) == ["aws", "migration"]
+    assets = (await db_session.execute(select(AssetModel))).scalars().all()
+    assert len(assets) == 3
+    # Same bytes, one blob
+    assert len({a.file_path for a in assets}) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_bounds_concurrent_writes_and_isolates_failures(async_client: AsyncClient, asset_dir,
+                                                                    monkeypatch):
+    store_upload = blob_store.store_upload
+    in_flight = peak = 0
+
+    async def slow_store(file, progress=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await anyio.sleep(0.01)
+        in_flight -= 1
+        if file.filename == "bad.txt":
+            raise OSError("disk full")
+        return await store_upload(file, progress)
+
+    monkeypatch.setattr(blob_store, "store_upload", slow_store)
+    monkeypatch.setattr(asset_manager, "BATCH_UPLOAD_CONCURRENCY", 2)
+
+    names = [f"file{i}.txt" for i in range(6)] + ["bad.txt"]
+    files = [("files", (name, name.encode(), "text/plain")) for name in names]
+    response = await async_client.post("/api/assets/batch", files=files,
+                                       data={"metadata_json": json.dumps([metadata(n) for n in names])})
+    results = response.json()
+    assert [r["status"] for r in results] == ["created"] * 6 + ["failed"]
+    assert "disk full" in results[-1]["error"]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_mismatched_metadata(async_client: AsyncClient, asset_dir):
+    response = await async_client.post("/api/assets/batch", files=[("files", ("a.txt", b"a", "text/plain"))],
+                                       data={"metadata_json": json.dumps([])})
+    assert response.status_code == 400
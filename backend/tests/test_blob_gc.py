@@ -0,0 +1,96 @@
+import os
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel
+from backend.services import s3_storage
+from backend.services.blob_gc import blob_gc
+
+DAY = 24 * 3600
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+@pytest.mark.asyncio
+async def test_local_sweep_respects_references_and_grace(db_session: AsyncSession, asset_dir, upload_asset):
+    await upload_asset("deck.pptx", b"deck")
+    kept = (await db_session.execute(select(AssetModel.file_path))).scalar_one()
+    (asset_dir / "blobs" / "zz").mkdir(parents=True)
+    (asset_dir / "blobs/zz/old.pdf").write_bytes(b"x" * 300)
+    (asset_dir / "legacy.docx").write_bytes(b"y" * 50)
+    (asset_dir / "blobs/zz/new.pdf").write_bytes(b"fresh")  # may belong to an upload in flight
+    for path in (asset_dir / kept, asset_dir / "blobs/zz/old.pdf", asset_dir / "legacy.docx"):
+        age(path, 2 * DAY)
+
+    await blob_gc.run(db_session.bind, dry_run=True)
+    report = blob_gc.report()
+    assert (report["scanned"], report["orphans"], report["deleted"]) == (4, 2, 0)
+    assert (asset_dir / "legacy.docx").exists()
+
+    await blob_gc.run(db_session.bind)
+    report = blob_gc.report()
+    assert report["status"] == "completed"
+    assert (report["deleted"], report["reclaimed_bytes"]) == (2, 350)
+    assert report["providers"]["local"]["deleted"] == 2
+    assert sorted(p.name for p in asset_dir.rglob("*") if p.is_file()) == sorted(["new.pdf", kept.split("/")[-1]])
+
+
+@pytest.mark.asyncio
+async def test_gc_endpoint(async_client: AsyncClient, asset_dir):
+    (asset_dir / "stale.bin").write_bytes(b"z" * 10)
+    age(asset_dir / "stale.bin", 3 * DAY)
+
+    response = await async_client.post("/api/v2/admin/storage/gc", params={"grace_hours": 48})
+    assert response.status_code == 202
+    report = (await async_client.get("/api/v2/admin/storage/gc")).json()
+    assert (report["status"], report["reclaimed_bytes"], report["grace_hours"]) == ("completed", 10, 48)
+    assert not (asset_dir / "stale.bin").exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.s3(active=True)
+async def test_s3_sweep_batches_deletes(db_session: AsyncSession, s3_provider, asset_dir, monkeypatch):
+    monkeypatch.setattr(s3_storage, "DELETE_BATCH_SIZE", 2)
+    client, bucket = s3_provider.s3_client, s3_provider.bucket_name
+    for i in range(5):
+        client.put_object(Bucket=bucket, Key=f"blobs/{i:02d}/file", Body=b"b" * (i + 1))
+    client.put_object(Bucket=bucket, Key="uploads/abc/plan.pdf", Body=b"direct")
+    client.put_object(Bucket=bucket, Key="backups/db.dump", Body=b"not ours")
+    db_session.add(AssetModel(id="live", title="Live", original_filename="live.pdf", file_path="blobs/01/file", storage_provider="s3"))
+    await db_session.commit()
+
+    calls = []
+    delete_objects = client.delete_objects
+    monkeypatch.setattr(client, "delete_objects", lambda **kw: calls.append(kw) or delete_objects(**kw))
+
+    time.sleep(1)  # LastModified has second resolution
+    await blob_gc.run(db_session.bind, grace_seconds=0)
+    report = blob_gc.report()
+    assert report["status"] == "completed", report
+    assert report["providers"]["s3"] == {"scanned": 6, "orphans": 5, "deleted": 5, "reclaimed_bytes": 1 + 3 + 4 + 5 + 6}
+    assert [len(c["Delete"]["Objects"]) for c in calls] == [2, 2, 1]
+    left = [o["Key"] for o in client.list_objects_v2(Bucket=bucket)["Contents"]]
+    assert sorted(left) == ["backups/db.dump", "blobs/01/file"]
+
+
+@pytest.mark.asyncio
+async def test_previews_live_as_long_as_their_content(db_session: AsyncSession, asset_dir):
+    kept, gone = "aa" * 32, "bb" * 32
+    db_session.add(AssetModel(id="a", title="A", original_filename="a.png", file_path=f"blobs/aa/{kept}.png",
+                              content_hash=kept))
+    await db_session.commit()
+    for digest in (kept, gone):
+        path = asset_dir / "previews" / digest[:2] / f"{digest}.webp"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"webp")
+        age(path, 2 * DAY)
+
+    await blob_gc.run(db_session.bind)
+    assert blob_gc.report()["deleted"] == 1
+    assert (asset_dir / f"previews/aa/{kept}.webp").exists()
+    assert not (asset_dir / f"previews/bb/{gone}.webp").exists()
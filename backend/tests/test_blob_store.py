@@ -0,0 +1,88 @@
+import hashlib
+import io
+import os
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel
+from fastapi import UploadFile
+from backend.services import blob_store
+from backend.services.blob_store import RELEASE_GRACE_SECONDS, blob_key, hash_stream
+
+def age_blobs(root):
+    # Past the grace period release() gives freshly written blobs
+    old = time.time() - RELEASE_GRACE_SECONDS - 60
+    for path in (root / "blobs").rglob("*"):
+        if path.is_file():
+            os.utime(path, (old, old))
+
+
+def stored_blobs(root):
+    return sorted(p.relative_to(root).as_posix() for p in (root / "blobs").rglob("*") if p.is_file())
+
+
+def test_hash_stream_and_key():
+    data = b"x" * 3000
+    digest, size = hash_stream(io.BytesIO(data), chunk_size=1024)
+    assert (digest, size) == (hashlib.sha256(data).hexdigest(), 3000)
+    assert blob_key(digest, "Deck.PPTX") == f"blobs/{digest[:2]}/{digest}.pptx"
+    assert blob_key(digest, "weird.name with spaces") == f"blobs/{digest[:2]}/{digest}"
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_blob(async_client: AsyncClient, db_session: AsyncSession, asset_dir,
+                                                upload_asset):
+    deck = b"slide " * 50000
+    digest = hashlib.sha256(deck).hexdigest()
+    first = await upload_asset("deck.pptx", deck)
+    second = await upload_asset("copy-of-deck.pptx", deck)
+
+    assert stored_blobs(asset_dir) == [f"blobs/{digest[:2]}/{digest}.pptx"]
+    assets = (await db_session.execute(select(AssetModel))).scalars().all()
+    assert {a.file_path for a in assets} == {blob_key(digest, "deck.pptx")}
+    assert {a.content_hash for a in assets} == {digest}
+    assert {a.size_bytes for a in assets} == {len(deck)}
+
+    # Re-uploading new content to one asset keeps the shared blob for the other
+    age_blobs(asset_dir)
+    await upload_asset("deck.pptx", b"revised deck", asset_id=first)
+    assert len(stored_blobs(asset_dir)) == 2
+
+    # Once nothing references the original it is removed
+    await upload_asset("deck.pptx", b"revised deck", asset_id=second)
+    revised = hashlib.sha256(b"revised deck").hexdigest()
+    assert stored_blobs(asset_dir) == [f"blobs/{revised[:2]}/{revised}.pptx"]
+
+    response = await async_client.get(f"/api/assets/{first}/file")
+    assert response.status_code == 200
+    assert response.content == b"revised deck"
+    assert 'filename="deck.pptx"' in response.headers["content-disposition"]
+
+    # Deleting the last asset that references a blob removes the blob
+    age_blobs(asset_dir)
+    assert (await async_client.delete(f"/api/v2/assets/{first}")).status_code == 200
+    assert len(stored_blobs(asset_dir)) == 1
+    assert (await async_client.delete(f"/api/v2/assets/{second}")).status_code == 200
+    assert stored_blobs(asset_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_release_spares_a_blob_reused_by_an_uncommitted_upload(async_client: AsyncClient, db_session: AsyncSession,
+                                                                    asset_dir, upload_asset):
+    deck = b"shared deck"
+    first = await upload_asset("deck.pptx", deck)
+    age_blobs(asset_dir)
+
+    # A second rep uploads the same deck; its asset row isn't committed yet
+    # when the first asset is deleted and its blob released
+    blob = await blob_store.store_upload(UploadFile(io.BytesIO(deck), filename="deck.pptx"))
+    assert blob.reused
+    assert (await async_client.delete(f"/api/v2/assets/{first}")).status_code == 200
+    assert stored_blobs(asset_dir) == [blob.key]
+
+    # Once it has aged with nothing pointing at it, release removes it
+    age_blobs(asset_dir)
+    assert await blob_store.release(db_session, [blob.key]) == [blob.key]
+    assert stored_blobs(asset_dir) == []
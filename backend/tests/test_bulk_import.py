@@ -0,0 +1,140 @@
+import json
+from types import SimpleNamespace
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from backend.models_db import GTMPlayModel, OpportunityModel, PersonModel, TechnologyModel
+from backend.services import bulk_import
+from backend.services.bulk_import import _copy_or_insert
+
+
+@pytest.mark.asyncio
+async def test_import_people_csv_with_upsert(async_client: AsyncClient, db_session: AsyncSession):
+    db_session.add_all([TechnologyModel(name="Kubernetes"), TechnologyModel(name="Ansible")])
+    await db_session.commit()
+
+    csv_data = (
+        "external_id,name,email,role,technologies\n"
+        "crm-1,Ada,ada@example.com,Architect,Kubernetes;Ansible\n"
+        "crm-2,Grace,grace@example.com,,Kubernetes;Cobol\n"
+        "crm-3,,missing@example.com,,\n"
+        "crm-4,Dup,ada@example.com,,\n"
+    )
+    response = await async_client.post("/api/v2/people/import", files={"file": ("people.csv", csv_data, "text/csv")})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    assert {e["row"] for e in data["errors"]} == {4, 5}
+    assert data["warnings"][0]["row"] == 3
+
+    # Re-import with upsert updates only the columns present in the file
+    ndjson = "\n".join([
+        json.dumps({"external_id": "crm-1", "name": "Ada L.", "email": "ada@example.com", "technologies": ["Ansible"]}),
+        json.dumps({"external_id": "crm-5", "name": "Linus", "email": "linus@example.com"}),
+    ])
+    response = await async_client.post(
+        "/api/v2/people/import?upsert_key=external_id",
+        files={"file": ("people.ndjson", ndjson, "application/x-ndjson")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["updated"] == 1
+
+    result = await db_session.execute(
+        select(PersonModel).options(selectinload(PersonModel.technologies)).where(PersonModel.external_id == "crm-1")
+    )
+    ada = result.scalars().first()
+    await db_session.refresh(ada)
+    await db_session.refresh(ada, attribute_names=["technologies"])
+    assert ada.name == "Ada L."
+    assert ada.role == "Architect"
+    assert [t.name for t in ada.technologies] == ["Ansible"]
+
+
+@pytest.mark.asyncio
+async def test_import_opportunities_attaches_plays(async_client: AsyncClient, db_session: AsyncSession):
+    play = GTMPlayModel(
+        title="Cloud Play",
+        stages=[{"key": "s1", "label": "Stage 1"}, {"key": "s2", "label": "Stage 2"}],
+        default_team_members=["u1"]
+    )
+    db_session.add(play)
+    await db_session.commit()
+
+    rows = [{
+        "external_id": "opp-1", "name": "Deal", "account_name": "Acme", "sector": "Tech", "offering": "Cloud",
+        "stage": "Discovery", "technologies": [], "geo": "US", "tags": ["t"], "notes": "n",
+        "plays": [str(play.id), "999"]
+    }]
+    response = await async_client.post(
+        "/api/v2/opportunities/import",
+        files={"file": ("opps.json", json.dumps(rows), "application/json")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert any("999" in w["message"] for w in data["warnings"])
+
+    result = await db_session.execute(select(OpportunityModel).where(OpportunityModel.external_id == "opp-1"))
+    opp = result.scalars().first()
+    assert opp.team_member_user_ids == ["u1"]
+    assert len(opp.opportunity_plays) == 1
+    assert [si.play_stage_key for si in opp.opportunity_plays[0].stage_instances] == ["s1", "s2"]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_invalid_upsert_key(async_client: AsyncClient):
+    response = await async_client.post(
+        "/api/v2/plays/import?upsert_key=title",
+        files={"file": ("plays.json", "[]", "application/json")}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_database_errors_roll_back_the_chunk(async_client: AsyncClient, monkeypatch):
+    async def failing_copy(db, table, rows):
+        if rows:
+            raise DBAPIError(f"COPY {table.name}", None, Exception("insert or update violates foreign key constraint"))
+
+    monkeypatch.setattr(bulk_import, "_copy_or_insert", failing_copy)
+    csv_data = "name,email,technologies\nGrace,grace@example.com,Cobol\nLinus,linus@example.com,\n"
+    response = await async_client.post("/api/v2/people/import", files={"file": ("people.csv", csv_data, "text/csv")})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (0, 2)
+    assert all("foreign key" in e["message"] for e in data["errors"])
+    # Warnings about rows that were rolled back are dropped with them
+    assert data["warnings"] == []
+
+    # The session was rolled back and is usable again
+    monkeypatch.undo()
+    response = await async_client.post("/api/v2/people/import", files={"file": ("people.csv", csv_data, "text/csv")})
+    assert response.json()["created"] == 2
+
+
+@pytest.mark.asyncio
+async def test_copy_errors_surface_as_dbapi_errors():
+    asyncpg = pytest.importorskip("asyncpg")
+
+    class Driver:
+        async def copy_records_to_table(self, *args, **kwargs):
+            raise asyncpg.UniqueViolationError("duplicate key value violates unique constraint")
+
+    class Connection:
+        async def get_raw_connection(self):
+            return SimpleNamespace(driver_connection=Driver())
+
+    class Session:
+        bind = SimpleNamespace(dialect=SimpleNamespace(driver="asyncpg"))
+
+        async def connection(self):
+            return Connection()
+
+    with pytest.raises(DBAPIError):
+        await _copy_or_insert(Session(), PersonModel.__table__, [{"id": "p-1", "name": "Ada"}])
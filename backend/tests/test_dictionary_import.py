@@ -0,0 +1,68 @@
+import io
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import TechnologyModel
+from backend.services.dictionary_import import iter_dictionary_rows
+
+
+def test_iter_rows_csv_is_incremental():
+    data = b"name,category\nKubernetes,Cloud\nAnsible,DevOps\n"
+    rows = iter_dictionary_rows(io.BytesIO(data), "techs.csv")
+    assert next(rows) == (2, {"value": "Kubernetes", "category": "Cloud"}, None)
+    assert next(rows) == (3, {"value": "Ansible", "category": "DevOps"}, None)
+
+
+def test_iter_rows_ndjson_reports_bad_lines():
+    data = b'{"value": "A"}\nnot json\n\n"B"\n'
+    rows = list(iter_dictionary_rows(io.BytesIO(data), "items.ndjson"))
+    assert rows[0] == (1, {"value": "A"}, None)
+    assert rows[1][0] == 2 and rows[1][2].startswith("Invalid JSON")
+    assert rows[2] == (4, "B", None)
+
+
+@pytest.mark.asyncio
+async def test_import_dedupes_and_skips_existing(async_client: AsyncClient, db_session: AsyncSession):
+    db_session.add(TechnologyModel(name="Kubernetes"))
+    await db_session.commit()
+
+    csv_data = "value,category\nKubernetes,Cloud\nAnsible,DevOps\nAnsible,DevOps\n,Empty\nTerraform,\n"
+
+    # Dry run reports but writes nothing
+    response = await async_client.post(
+        "/api/v2/admin/import/technologies?dry_run=true",
+        files={"file": ("techs.csv", csv_data, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["dry_run"] is True
+    assert data["added"] == 2
+    assert data["skipped"] == 2
+    assert data["total_processed"] == 5
+    assert len(data["errors"]) == 1
+
+    names = (await db_session.execute(select(TechnologyModel.name))).scalars().all()
+    assert names == ["Kubernetes"]
+
+    response = await async_client.post(
+        "/api/v2/admin/import/technologies",
+        files={"file": ("techs.csv", csv_data, "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["added"] == 2
+    assert data["skipped"] == 2
+
+    result = await db_session.execute(select(TechnologyModel).order_by(TechnologyModel.name))
+    techs = {t.name: t.category for t in result.scalars().all()}
+    assert techs == {"Ansible": "DevOps", "Kubernetes": None, "Terraform": None}
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_unsupported_format(async_client: AsyncClient):
+    response = await async_client.post(
+        "/api/v2/admin/import/tags",
+        files={"file": ("tags.txt", "a\nb\n", "text/plain")}
+    )
+    assert response.status_code == 400
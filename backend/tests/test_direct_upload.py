@@ -0,0 +1,103 @@
+import hashlib
+import os
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel
+from backend.services.s3_storage import MB
+
+requests = pytest.importorskip("requests")
+
+pytestmark = pytest.mark.s3(active=True, part_size=5 * MB, multipart_threshold=5 * MB)
+
+
+@pytest.mark.asyncio
+async def test_presigned_post_upload(async_client: AsyncClient, db_session: AsyncSession, s3_provider):
+    content = b"win story notes " * 100
+    plan = (await async_client.post("/api/v2/uploads/direct", json={
+        "filename": "Win Story.md", "content_type": "text/markdown", "size": len(content)
+    })).json()
+    assert plan["method"] == "post"
+    assert plan["key"].startswith("uploads/") and plan["key"].endswith("/Win_Story.md")
+
+    # The browser's part: straight to the bucket
+    response = requests.post(plan["post_url"], data=plan["post_fields"], files={"file": ("Win Story.md", content)})
+    assert response.status_code in (200, 201, 204)
+
+    response = await async_client.post("/api/v2/uploads/direct/complete", json={
+        "token": plan["token"], "asset": {"title": "Win story", "kind": "doc"}
+    })
+    assert response.status_code == 200, response.text
+    asset = (await db_session.execute(select(AssetModel).where(AssetModel.id == response.json()["id"]))).scalar_one()
+    assert (asset.file_path, asset.size_bytes, asset.mime_type, asset.original_filename) == (
+        plan["key"], len(content), "text/markdown", "Win Story.md"
+    )
+
+    # Hashed from the bucket after the response, then extracted like any upload
+    await db_session.refresh(asset)
+    assert asset.content_hash == hashlib.sha256(content).hexdigest()
+    text = (await async_client.get(f"/api/v2/assets/{asset.id}/text")).json()
+    assert text["format"] == "markdown"
+
+    # Replaying the token doesn't make a second asset for the same object
+    response = await async_client.post("/api/v2/uploads/direct/complete", json={
+        "token": plan["token"], "asset": {"title": "Win story again"}
+    })
+    assert response.status_code == 409
+    assert len((await db_session.execute(select(AssetModel).where(AssetModel.file_path == plan["key"]))).all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_multipart_plan_verifies_etag(async_client: AsyncClient, s3_provider):
+    content = os.urandom(11 * MB)
+    plan = (await async_client.post("/api/v2/uploads/direct", json={
+        "filename": "demo.mp4", "content_type": "video/mp4", "size": len(content)
+    })).json()
+    assert plan["method"] == "multipart"
+    assert [p["part_number"] for p in plan["parts"]] == [1, 2, 3]
+
+    completed = []
+    for part in plan["parts"]:
+        start = (part["part_number"] - 1) * plan["part_size"]
+        response = requests.put(part["url"], data=content[start:start + plan["part_size"]])
+        completed.append({"part_number": part["part_number"], "etag": response.headers["ETag"]})
+
+    missing = await async_client.post("/api/v2/uploads/direct/complete", json={
+        "token": plan["token"], "parts": completed[:2], "asset": {"title": "Demo"}
+    })
+    assert missing.status_code == 400
+
+    response = await async_client.post("/api/v2/uploads/direct/complete", json={
+        "token": plan["token"], "parts": completed, "asset": {"title": "Demo"}
+    })
+    assert response.status_code == 200, response.text
+    head = s3_provider.s3_client.head_object(Bucket=s3_provider.bucket_name, Key=plan["key"])
+    assert head["ContentLength"] == len(content)
+
+
+@pytest.mark.asyncio
+async def test_completion_rejects_wrong_size_and_tampered_token(async_client: AsyncClient, s3_provider):
+    plan = (await async_client.post("/api/v2/uploads/direct", json={
+        "filename": "deck.pdf", "content_type": "application/pdf", "size": 10
+    })).json()
+    # The stand-in doesn't enforce the POST policy, so the size check at completion has to
+    requests.post(plan["post_url"], data=plan["post_fields"], files={"file": ("deck.pdf", b"0123456789abc")})
+
+    response = await async_client.post("/api/v2/uploads/direct/complete", json={
+        "token": plan["token"], "asset": {"title": "Deck"}
+    })
+    assert response.status_code == 409
+    assert s3_provider.head(plan["key"]) is None
+
+    tampered = plan["token"][:-1] + ("0" if plan["token"][-1] != "0" else "1")
+    response = await async_client.post("/api/v2/uploads/direct/complete", json={
+        "token": tampered, "asset": {"title": "Deck"}
+    })
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_needs_s3(async_client: AsyncClient):
+    response = await async_client.post("/api/v2/uploads/direct", json={"filename": "a.txt", "size": 1})
+    assert response.status_code == 409
@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel, AssetSignatureModel
+from backend.services.duplicate_detector import lsh_clusters, minhash, shingles, similarity
+
+
+def test_minhash_estimates_jaccard():
+    a = minhash(shingles("Q3 Zero Trust Architecture Overview for Financial Services"))
+    b = minhash(shingles("Q3 Zero Trust Architecture Overview - Financial Services (v2)"))
+    c = minhash(shingles("Retail data platform pricing"))
+    assert similarity(a, b) > 0.7
+    assert similarity(a, c) < 0.2
+    assert minhash(shingles("")) is None
+
+
+def test_lsh_clusters_groups_transitively():
+    texts = [
+        "zero trust architecture overview for financial services customers",
+        "zero trust architecture overview for financial services customer",
+        "zero trust architecture overview for financial service customers",
+        "retail data platform pricing sheet",
+    ]
+    signatures = np.stack([minhash(shingles(t)) for t in texts])
+    clusters = lsh_clusters(["a", "b", "c", "d"], signatures)
+    assert len(clusters) == 1
+    assert clusters[0]["asset_ids"] == ["a", "b", "c"]
+    assert clusters[0]["similarity"] >= 0.7
+
+
+@pytest.mark.asyncio
+async def test_scan_endpoint_reports_clusters(async_client: AsyncClient, db_session: AsyncSession):
+    for title, filename in (
+        ("Zero Trust Architecture Overview", "zero-trust-overview.pptx"),
+        ("Zero Trust Architecture Overview v2", "zero-trust-overview.pptx"),
+        ("Retail Pricing", "pricing.xlsx"),
+    ):
+        db_session.add(AssetModel(title=title, original_filename=filename, file_path=title, size_bytes=1024))
+    await db_session.commit()
+
+    response = await async_client.post("/api/v2/admin/duplicates/scan")
+    assert response.status_code == 202
+
+    report = (await async_client.get("/api/v2/admin/duplicates")).json()
+    assert report["status"] == "completed"
+    assert report["signatures_updated"] == 3
+    assert report["assets_scanned"] == 3
+    assert len(report["clusters"]) == 1
+    assert sorted(a["title"] for a in report["clusters"][0]["assets"]) == [
+        "Zero Trust Architecture Overview", "Zero Trust Architecture Overview v2"
+    ]
+
+    signatures = (await db_session.execute(select(AssetSignatureModel))).scalars().all()
+    assert len(signatures) == 3
+
+    response = await async_client.post("/api/v2/admin/duplicates/scan?threshold=2")
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+import json
+import pytest
+from httpx import AsyncClient
+from backend.services import markdown_render
+from backend.services.markdown_cache import markdown_cache
+
+pytest.importorskip("markdown_it")
+
+
+def test_render_is_sanitized_with_toc():
+    rendered = markdown_render.render(
+        "# Failover\n\n<script>alert(1)</script>\n\n## Steps\n\n## Steps\n\n"
+        "[bad](javascript:alert(1)) and [docs](https://example.com)\n"
+    )
+    assert "<script>" not in rendered["html"]
+    assert "&lt;script&gt;" in rendered["html"]
+    assert "href=\"javascript" not in rendered["html"]
+    assert '<a href="https://example.com" rel="nofollow noopener noreferrer">docs</a>' in rendered["html"]
+    assert '<h2 id="steps-1">Steps</h2>' in rendered["html"]
+    assert rendered["title"] == "Failover"
+    assert [(e["level"], e["id"]) for e in rendered["toc"]] == [(1, "failover"), (2, "steps"), (2, "steps-1")]
+
+
+@pytest.mark.asyncio
+async def test_render_is_cached_and_invalidated_on_update(async_client: AsyncClient, asset_dir, upload_asset,
+                                                          monkeypatch):
+    monkeypatch.setattr(markdown_cache, "directory", asset_dir / "rendered")
+    asset_id = await upload_asset("runbook.md", b"# Old plan\n", "text/markdown")
+
+    misses = markdown_cache.misses
+    first = await async_client.get(f"/api/v2/assets/{asset_id}/rendered")
+    assert first.status_code == 200
+    assert first.json()["title"] == "Old plan"
+    old_hash = first.json()["content_hash"]
+    assert (await async_client.get(f"/api/v2/assets/{asset_id}/rendered")).json() == first.json()
+    assert markdown_cache.misses == misses + 1
+    assert (await async_client.get(f"/api/v2/assets/{asset_id}/rendered",
+                                   headers={"if-none-match": first.headers["etag"]})).status_code == 304
+
+    response = await async_client.put(f"/api/v2/assets/{asset_id}", files={"file": ("runbook.md", b"# New plan\n", "text/markdown")},
+                                      data={"metadata_json": json.dumps({"title": "Runbook"})})
+    assert response.status_code == 200, response.text
+    assert await markdown_cache.get(old_hash) is None
+    second = await async_client.get(f"/api/v2/assets/{asset_id}/rendered",
+                                    headers={"if-none-match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.json()["title"] == "New plan"
+
+    clip_id = await upload_asset("clip.mp4", b"\x00", "video/mp4")
+    assert (await async_client.get(f"/api/v2/assets/{clip_id}/rendered")).status_code == 400
@@ -0,0 +1,59 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import GTMPlayModel
+from backend.services.play_index import PlayMatchIndex, play_index
+
+
+def test_match_scores_and_ranks():
+    index = PlayMatchIndex()
+    index.upsert(1, "Hybrid Cloud, Security", "Financial Services", "EMEA", stage_scope=["Discovery"])
+    index.upsert(2, "Data Platform", "Cross-Sector", "Global", sales_stage="All")
+    index.upsert(3, "Security", "Public Sector", "NA")
+
+    ranked = index.match(offering=["cloud"], industry="Financial", region="EMEA", stage="Discovery")
+    assert ranked == [(1, 100), (2, 62)]
+
+    # Updates move the play between posting lists
+    index.upsert(1, "Data Platform", "Retail", "APAC")
+    assert index.match(offering=["cloud"]) == []
+    assert index.match(offering=["data"], limit=1) == [(1, 100)]
+
+    index.remove(2)
+    assert [pid for pid, _ in index.match()] == [1, 3]
+
+
+def test_sector_only_wildcard_query_matches_nothing():
+    index = PlayMatchIndex()
+    index.upsert(1, "Cloud", "Retail", "NA")
+    assert index.match(industry="X-SECTOR") == []
+
+
+@pytest.mark.asyncio
+async def test_match_endpoint_uses_index(async_client: AsyncClient, db_session: AsyncSession):
+    play_index.invalidate()
+    db_session.add_all([
+        GTMPlayModel(title="Cloud Migration", offering="Cloud", sector="Retail", geo="NA", sales_stage="Solutioning"),
+        GTMPlayModel(title="Zero Trust", offering="Security", sector="Retail", geo="NA"),
+    ])
+    await db_session.commit()
+
+    response = await async_client.post("/api/plays/match?industry=Retail&stage=Solutioning", json=["Cloud"])
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["title"] for p in data] == ["Cloud Migration", "Zero Trust"]
+    assert data[0]["match_score"] == 100
+    assert data[0]["industry"] == "Retail"
+
+    # Every match comes back unless the caller sets a limit
+    db_session.add_all([GTMPlayModel(title=f"Retail {i}", offering="Other", sector="Retail") for i in range(60)])
+    await db_session.commit()
+    play_index.invalidate()
+    response = await async_client.post("/api/plays/match?industry=Retail", json=[])
+    assert len(response.json()) == 62
+
+    # Plays created through the API are indexed immediately
+    response = await async_client.post("/api/v2/plays", json={"title": "Cloud Native", "offering": "Cloud Native", "sector": "Retail"})
+    assert response.status_code == 200
+    response = await async_client.post("/api/plays/match?limit=1", json=["native"])
+    assert [p["title"] for p in response.json()] == ["Cloud Native"]
@@ -0,0 +1,75 @@
+import io
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import AssetModel, AssetPreviewModel
+from backend.services import previews
+from backend.services.preview_worker import PREVIEW_MAX_ATTEMPTS, preview_worker
+
+def test_preview_kinds():
+    assert previews.preview_kind("notes.md") == "text"
+    assert previews.preview_kind("deck.pptx") == "office"
+    assert previews.preview_kind("scan", "image/jpeg") == "image"
+    assert previews.preview_kind("clip.mp4", "video/mp4") is None
+    assert previews.snippet("word " * 200, 20) == "word word word word…"
+
+
+@pytest.mark.asyncio
+async def test_markdown_gets_a_snippet(async_client: AsyncClient, asset_dir, upload_asset):
+    asset_id = await upload_asset("runbook.md", b"# Failover\n\nPromote the replica, then repoint DNS.", "text/markdown")
+    preview = (await async_client.get(f"/api/v2/assets/{asset_id}/preview")).json()
+    assert (preview["status"], preview["kind"], preview["thumbnail_url"]) == ("ready", "text", None)
+    assert preview["snippet"] == "Failover\n\nPromote the replica, then repoint DNS."
+
+    asset_id = await upload_asset("clip.mp4", b"\x00\x00", "video/mp4")
+    assert (await async_client.get(f"/api/v2/assets/{asset_id}/preview")).json()["status"] == "unsupported"
+
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_backoff(db_session: AsyncSession, asset_dir):
+    digest = "ab" * 32
+    db_session.add(AssetModel(id="late", title="Late", original_filename="notes.txt", file_path="blobs/ab/late.txt",
+                              content_hash=digest, mime_type="text/plain"))
+    await db_session.commit()
+
+    # The file isn't there yet: the attempt fails and is pushed back
+    await preview_worker.process(db_session.bind, ["late"])
+    job = await db_session.get(AssetPreviewModel, digest)
+    await db_session.refresh(job)
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert job.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+    assert await preview_worker.run_due(db_session.bind) == 0
+
+    (asset_dir / "blobs/ab").mkdir(parents=True)
+    (asset_dir / "blobs/ab/late.txt").write_text("Quarterly numbers are in.")
+    job.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await db_session.commit()
+    assert await preview_worker.run_due(db_session.bind) == 1
+    await db_session.refresh(job)
+    assert (job.status, job.snippet) == ("ready", "Quarterly numbers are in.")
+
+    # Out of attempts: given up on
+    job.status, job.attempts, job.snippet = "pending", PREVIEW_MAX_ATTEMPTS - 1, None
+    job.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await db_session.commit()
+    (asset_dir / "blobs/ab/late.txt").unlink()
+    await preview_worker.run_due(db_session.bind)
+    await db_session.refresh(job)
+    assert (job.status, job.attempts) == ("failed", PREVIEW_MAX_ATTEMPTS)
+
+
+@pytest.mark.asyncio
+async def test_image_thumbnail_is_served_immutable(async_client: AsyncClient, asset_dir, upload_asset):
+    Image = pytest.importorskip("PIL.Image")
+    png = io.BytesIO()
+    Image.new("RGB", (1200, 600), "teal").save(png, "PNG")
+    asset_id = await upload_asset("diagram.png", png.getvalue(), "image/png")
+
+    preview = (await async_client.get(f"/api/v2/assets/{asset_id}/preview")).json()
+    assert (preview["status"], preview["width"], preview["height"]) == ("ready", 320, 160)
+    response = await async_client.get(preview["thumbnail_url"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert (await async_client.get(f"/api/v2/assets/{asset_id}")).json()["thumbnail_url"] == preview["thumbnail_url"]
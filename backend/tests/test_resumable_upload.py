@@ -0,0 +1,128 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel, UploadSessionModel
+from backend.services.blob_store import blob_key
+from backend.services.resumable_upload import resumable_uploads
+from backend.services.s3_storage import MB
+from backend.services.storage import local_storage_instance
+
+CONTENT = os.urandom(300 * 1024)
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_storage_instance, "base_path", tmp_path / "assets")
+    monkeypatch.setattr(resumable_uploads, "directory", tmp_path / "sessions")
+    return tmp_path
+
+
+async def put(client: AsyncClient, session_id: str, offset: int, data: bytes):
+    return await client.put(f"/api/v2/uploads/sessions/{session_id}", content=data,
+                            headers={"Upload-Offset": str(offset)})
+
+
+@pytest.mark.asyncio
+async def test_local_upload_resumes_after_dropped_connection(async_client: AsyncClient, db_session: AsyncSession, dirs):
+    session = (await async_client.post("/api/v2/uploads/sessions", json={
+        "filename": "demo.mp4", "content_type": "video/mp4", "size": len(CONTENT)
+    })).json()
+    assert session["offset"] == 0
+
+    response = await put(async_client, session["id"], 0, CONTENT[:100_000])
+    assert response.json()["offset"] == 100_000
+    assert (await put(async_client, session["id"], 0, CONTENT[:10])).status_code == 409
+
+    # The connection drops partway through the next chunk
+    async def dropped():
+        yield CONTENT[100_000:150_000]
+        raise ConnectionResetError()
+
+    with pytest.raises(ConnectionResetError):
+        await resumable_uploads.write_chunk(db_session, session["id"], 100_000, dropped())
+    offset = (await async_client.get(f"/api/v2/uploads/sessions/{session['id']}")).json()["offset"]
+    assert offset == 150_000
+
+    # Resume on a "different worker" that never saw the earlier chunks
+    resumable_uploads._hashers.pop(session["id"], None)
+    assert (await async_client.post(f"/api/v2/uploads/sessions/{session['id']}/complete",
+                                    json={"asset": {"title": "Demo"}})).status_code == 409
+    assert (await put(async_client, session["id"], offset, CONTENT[offset:])).json()["offset"] == len(CONTENT)
+
+    response = await async_client.post(f"/api/v2/uploads/sessions/{session['id']}/complete",
+                                       json={"asset": {"title": "Demo"}})
+    assert response.status_code == 200, response.text
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    asset = (await db_session.execute(select(AssetModel).where(AssetModel.id == response.json()["id"]))).scalar_one()
+    assert (asset.file_path, asset.content_hash, asset.size_bytes) == (blob_key(digest, "demo.mp4"), digest, len(CONTENT))
+    assert (dirs / "assets" / asset.file_path).read_bytes() == CONTENT
+    assert list((dirs / "sessions").iterdir()) == []
+    assert (await async_client.get(f"/api/v2/uploads/sessions/{session['id']}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_chunks_cannot_run_past_declared_size(async_client: AsyncClient, dirs):
+    session = (await async_client.post("/api/v2/uploads/sessions", json={"filename": "a.txt", "size": 10})).json()
+    assert (await put(async_client, session["id"], 0, b"0123456789abc")).status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_expired_sessions_are_collected(async_client: AsyncClient, db_session: AsyncSession, dirs):
+    session = (await async_client.post("/api/v2/uploads/sessions", json={"filename": "a.txt", "size": 100})).json()
+    await put(async_client, session["id"], 0, b"x" * 40)
+    assert len(list((dirs / "sessions").iterdir())) == 1
+
+    row = await db_session.get(UploadSessionModel, session["id"])
+    row.expires_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    await db_session.commit()
+
+    assert (await async_client.get(f"/api/v2/uploads/sessions/{session['id']}")).status_code == 404
+    assert await resumable_uploads.collect_expired(db_session) == 1
+    assert list((dirs / "sessions").iterdir()) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.s3(active=True, part_size=5 * MB)
+async def test_s3_session_uploads_one_part_per_chunk(async_client: AsyncClient, db_session: AsyncSession, s3_provider):
+    content = os.urandom(11 * MB)
+    session = (await async_client.post("/api/v2/uploads/sessions", json={
+        "filename": "demo.mp4", "content_type": "video/mp4", "size": len(content)
+    })).json()
+    chunk = session["chunk_size"]
+    assert chunk == 5 * MB
+
+    # Only the last chunk may be short
+    assert (await put(async_client, session["id"], 0, content[:MB])).status_code == 400
+    for offset in range(0, len(content), chunk):
+        response = await put(async_client, session["id"], offset, content[offset:offset + chunk])
+        assert response.status_code == 200, response.text
+
+    response = await async_client.post(f"/api/v2/uploads/sessions/{session['id']}/complete",
+                                       json={"asset": {"title": "Demo"}})
+    assert response.status_code == 200, response.text
+    # Hashed on the way through and moved to its content-addressed key
+    digest = hashlib.sha256(content).hexdigest()
+    asset = (await db_session.execute(select(AssetModel).where(AssetModel.id == response.json()["id"]))).scalar_one()
+    assert (asset.file_path, asset.content_hash) == (blob_key(digest, "demo.mp4"), digest)
+    body = s3_provider.s3_client.get_object(Bucket=s3_provider.bucket_name, Key=asset.file_path)["Body"].read()
+    assert body == content
+    assert s3_provider.head(f"uploads/{session['id']}/demo.mp4") is None
+
+    # A session that moved between workers lost its hash: it's filled in afterwards
+    notes = b"call notes " * 1000
+    session = (await async_client.post("/api/v2/uploads/sessions", json={
+        "filename": "notes.txt", "content_type": "text/plain", "size": len(notes)
+    })).json()
+    await put(async_client, session["id"], 0, notes)
+    resumable_uploads._hashers.pop(session["id"], None)
+    response = await async_client.post(f"/api/v2/uploads/sessions/{session['id']}/complete",
+                                       json={"asset": {"title": "Notes"}})
+    asset = (await db_session.execute(select(AssetModel).where(AssetModel.id == response.json()["id"]))).scalar_one()
+    await db_session.refresh(asset)
+    assert (asset.file_path, asset.content_hash) == (f"uploads/{session['id']}/notes.txt",
+                                                     hashlib.sha256(notes).hexdigest())
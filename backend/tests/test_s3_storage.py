@@ -0,0 +1,152 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import anyio
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
+from httpx import AsyncClient
+from backend.services import s3_storage
+from backend.services.s3_storage import MB
+from backend.services.storage import DelegatingStorageProvider, local_storage_instance
+from backend.services.upload_progress import upload_progress
+
+pytestmark = pytest.mark.s3(part_size=5 * MB, multipart_threshold=5 * MB, max_concurrency=3)
+
+
+def flaky(call, failures: dict, code="InternalError", status=500):
+    """Wrap a client method so the given part numbers fail once before succeeding."""
+    def wrapper(**kwargs):
+        number = kwargs.get("PartNumber", 0)
+        if failures.get(number, 0) > 0:
+            failures[number] -= 1
+            raise ClientError({"Error": {"Code": code, "Message": "boom"},
+                               "ResponseMetadata": {"HTTPStatusCode": status}}, "UploadPart")
+        return call(**kwargs)
+    return wrapper
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_retries_failed_parts(s3_provider):
+    data = os.urandom(12 * MB + 123)
+    s3_provider.s3_client.upload_part = flaky(s3_provider.s3_client.upload_part, {2: 1, 3: 2})
+    reported = []
+    key = await s3_provider.save(UploadFile(file=io.BytesIO(data), filename="deck.pptx"), "asset-1",
+                                 progress=lambda n: reported.append(n))
+    assert key == "asset-1/deck.pptx"
+    assert sum(reported) == len(data)
+    assert len(reported) == 3  # 5 MiB + 5 MiB + remainder
+
+    body = s3_provider.s3_client.get_object(Bucket=s3_provider.bucket_name, Key=key)["Body"].read()
+    assert body == data
+    assert "-3" in s3_provider.s3_client.head_object(Bucket=s3_provider.bucket_name, Key=key)["ETag"]
+
+
+@pytest.mark.asyncio
+async def test_small_upload_is_a_single_put(s3_provider):
+    key = await s3_provider.save(UploadFile(file=io.BytesIO(b"hello"), filename="notes.md"), "")
+    assert key == "notes.md"
+    assert s3_provider.s3_client.get_object(Bucket=s3_provider.bucket_name, Key=key)["Body"].read() == b"hello"
+    written = await s3_provider.modified(key)
+    assert await s3_provider.touch(key) is True
+    assert await s3_provider.modified(key) >= written
+    assert s3_provider.s3_client.get_object(Bucket=s3_provider.bucket_name, Key=key)["Body"].read() == b"hello"
+    assert await s3_provider.delete(key) is True
+    assert await s3_provider.touch(key) is False
+    assert (await s3_provider.get_url("notes.md")).startswith("https://")
+
+
+@pytest.mark.asyncio
+async def test_permanent_part_failure_aborts_upload(s3_provider):
+    client = s3_provider.s3_client
+    client.upload_part = flaky(client.upload_part, {2: 99}, code="AccessDenied", status=403)
+    with pytest.raises(Exception) as excinfo:
+        await s3_provider.save(UploadFile(file=io.BytesIO(os.urandom(11 * MB)), filename="big.pdf"), "asset-2")
+    assert getattr(excinfo.value, "status_code", None) == 500
+    assert client.list_multipart_uploads(Bucket=s3_provider.bucket_name).get("Uploads", []) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.s3(part_size=5 * MB, multipart_threshold=5 * MB, max_concurrency=2)
+async def test_concurrent_uploads_share_the_part_pool(s3_provider, monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="s3-part")
+    monkeypatch.setattr(s3_storage, "part_pool", pool)
+    upload_part = s3_provider.s3_client.upload_part
+    lock, running, peak, threads = threading.Lock(), [0], [0], set()
+
+    def counted(**kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            threads.add(threading.current_thread().name)
+        try:
+            time.sleep(0.05)
+            return upload_part(**kwargs)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    s3_provider.s3_client.upload_part = counted
+    try:
+        async with anyio.create_task_group() as tg:
+            for n in range(3):
+                tg.start_soon(s3_provider.save, UploadFile(file=io.BytesIO(os.urandom(11 * MB)), filename="deck.pptx"),
+                              f"asset-{n}")
+    finally:
+        pool.shutdown()
+    assert peak[0] <= 2
+    assert len(threads) <= 2 and all(name.startswith("s3-part") for name in threads)
+    for n in range(3):
+        assert "-3" in s3_provider.s3_client.head_object(Bucket=s3_provider.bucket_name,
+                                                         Key=f"asset-{n}/deck.pptx")["ETag"]
+
+
+@pytest.mark.asyncio
+async def test_upload_progress_is_reported_to_clients(async_client: AsyncClient, s3_provider):
+    reporter = upload_progress.reporter("client-upload-1")
+    upload_progress.start("client-upload-1", "deck.pptx", 11 * MB)
+    s3_provider.s3_client.upload_part = flaky(s3_provider.s3_client.upload_part, {1: 1})
+    await s3_provider.save(UploadFile(file=io.BytesIO(os.urandom(11 * MB)), filename="deck.pptx"), "asset-3", reporter)
+    upload_progress.finish("client-upload-1")
+
+    response = await async_client.get("/api/v2/uploads/client-upload-1")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "completed"
+    assert body["transferred_bytes"] == 11 * MB
+    assert body["retries"] == 1
+
+    assert (await async_client.get("/api/v2/uploads/unknown")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_presigned_urls_are_cached_and_batched(s3_provider, monkeypatch):
+    delegating = DelegatingStorageProvider(local_storage_instance)
+    delegating.configure("s3", {"bucket": s3_provider.bucket_name, "region": "us-east-1"})
+    monkeypatch.setattr(delegating, "_s3_provider", s3_provider)
+
+    signed = []
+    real_sign = s3_provider.s3_client.generate_presigned_url
+
+    def counting_sign(*args, **kwargs):
+        signed.append(kwargs["Params"]["Key"])
+        return real_sign(*args, **kwargs)
+
+    s3_provider.s3_client.generate_presigned_url = counting_sign
+
+    first = await delegating.get_urls(["a.pdf", "b.pdf", "a.pdf"])
+    assert signed == ["a.pdf", "b.pdf"]
+    assert first[0] == first[2] and first[0] != first[1]
+
+    assert await delegating.get_urls(["a.pdf", "b.pdf", "c.pdf"]) == first[:2] + [delegating.url_cache.get("c.pdf")]
+    assert await delegating.get_url("b.pdf") == first[1]
+    assert signed == ["a.pdf", "b.pdf", "c.pdf"]
+
+    await delegating.delete("a.pdf")
+    await delegating.get_url("a.pdf")
+    assert signed[-1] == "a.pdf"
+
+    delegating.configure("local")
+    assert len(delegating.url_cache) == 0
@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import SystemSettingsModel
+from backend.services.settings_service import SettingsStore, settings_store
+from backend.services.storage import storage
+
+
+@pytest.mark.asyncio
+async def test_load_applies_storage_configuration(db_session: AsyncSession):
+    db_session.add_all([
+        SystemSettingsModel(key="storage_provider", value="s3"),
+        SystemSettingsModel(key="storage_s3_bucket", value="decks"),
+    ])
+    await db_session.commit()
+
+    store = SettingsStore()
+    await store.load(db_session)
+    try:
+        assert store.get("storage_s3_bucket") == "decks"
+        assert storage._active_provider_type == "s3"
+        assert storage._s3_config["bucket"] == "decks"
+    finally:
+        storage.configure("local")
+
+
+@pytest.mark.asyncio
+async def test_update_upserts_and_serves_from_cache(async_client: AsyncClient, db_session: AsyncSession):
+    db_session.add(SystemSettingsModel(key="storage_provider", value="local", description="Active provider"))
+    await db_session.commit()
+    settings_store.loaded = False
+
+    response = await async_client.post("/api/settings/", json={"settings": {"storage_provider": "local", "theme": "dark"}})
+    assert response.status_code == 200
+
+    rows = (await db_session.execute(select(SystemSettingsModel).order_by(SystemSettingsModel.key))).scalars().all()
+    assert [(r.key, r.value) for r in rows] == [("storage_provider", "local"), ("theme", "dark")]
+
+    # Reads come from memory even if the table changes underneath
+    await db_session.delete(rows[1])
+    await db_session.commit()
+    response = await async_client.get("/api/settings/")
+    settings = {s["key"]: s for s in response.json()}
+    assert settings["theme"]["value"] == "dark"
+    assert settings["storage_provider"]["description"] == "Active provider"
+
+
+def test_reapplying_unchanged_settings_keeps_the_s3_client(monkeypatch):
+    store = SettingsStore()
+    monkeypatch.setattr(store, "_values", {"storage_provider": "s3", "storage_s3_bucket": "decks",
+                                           "storage_s3_region": "us-east-1"})
+    monkeypatch.setattr(storage, "_s3_config", {})
+    monkeypatch.setattr(storage, "_s3_provider", None)
+    try:
+        store.apply_storage()
+        provider = storage._s3()
+        storage.url_cache.put("blobs/ab/deck.pptx", "https://signed")
+        store.apply_storage()
+        assert storage._s3() is provider
+        assert storage.url_cache.get("blobs/ab/deck.pptx") == "https://signed"
+
+        store._values["storage_s3_bucket"] = "archive"
+        store.apply_storage()
+        assert storage._s3() is not provider
+        assert storage.url_cache.get("blobs/ab/deck.pptx") is None
+    finally:
+        storage.configure("local")
+        storage.url_cache.clear()
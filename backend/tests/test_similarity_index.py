@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import AssetModel
+from backend.services.similarity_index import MIN_CAPACITY, SimilarityIndex, similarity_index
+
+
+def test_workers_share_the_on_disk_index(tmp_path):
+    writer = SimilarityIndex(path=str(tmp_path))
+    writer.rebuild([
+        ("a", "kubernetes migration playbook for retail"),
+        ("b", "kubernetes migration deck"),
+        ("c", "quarterly finance report"),
+    ])
+    reader = SimilarityIndex(path=str(tmp_path))
+    reader.open()
+    assert [r[0] for r in reader.similar("a")] == ["b"]
+
+    # Appends and edits from one process are visible to the other
+    writer.upsert("d", "retail kubernetes migration playbook")
+    writer.upsert("c", "finance kubernetes migration")
+    ranked = reader.similar("a")
+    assert ranked[0][0] == "d"
+    assert {r[0] for r in ranked} == {"b", "c", "d"}
+
+    writer.remove("d")
+    assert "d" not in [r[0] for r in reader.similar("a")]
+    assert reader.similar("missing") is None
+
+
+def test_upsert_grows_capacity(tmp_path):
+    index = SimilarityIndex(path=str(tmp_path))
+    index.open()
+    index.upsert_many([(f"id{i}", f"token{i} shared") for i in range(MIN_CAPACITY + 5)])
+    assert len(index) == MIN_CAPACITY + 5
+    assert len(index.similar("id0", limit=3)) == 3
+
+    # A rebuild starts a new generation and drops the old files
+    index.rebuild([("x", "alpha beta"), ("y", "alpha gamma")])
+    assert len(index) == 2
+    assert len(list(tmp_path.glob("vectors.*.f32"))) == 1
+
+
+def test_threads_share_one_index_safely(tmp_path):
+    index = SimilarityIndex(path=str(tmp_path))
+    index.rebuild([("seed", "shared seed words")])
+
+    def write(batch):
+        index.upsert_many([(f"id{batch}-{i}", f"token{i} shared words") for i in range(200)])
+
+    def query(_):
+        return index.similar("seed", limit=5)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        writes = [pool.submit(write, batch) for batch in range(6)]
+        queries = [pool.submit(query, n) for n in range(30)]
+        for future in writes + queries:
+            future.result()
+    assert len(index) == 1 + 6 * 200
+    assert len(set(index._ids)) == len(index)  # no row claimed twice
+    assert MIN_CAPACITY < 6 * 200 + 1 <= index._manifest["capacity"]
+
+
+def test_sync_rereads_the_manifest_when_a_generation_disappears(tmp_path, monkeypatch):
+    writer = SimilarityIndex(path=str(tmp_path))
+    writer.rebuild([("a", "kubernetes migration"), ("b", "kubernetes deck")])
+    reader = SimilarityIndex(path=str(tmp_path))
+    file = reader._file
+    gone = [True]
+
+    def racing_file(kind, generation):
+        # First lookup lands on a generation another process just removed
+        if gone[0]:
+            gone[0] = False
+            return tmp_path / "ids.0.txt"
+        return file(kind, generation)
+
+    monkeypatch.setattr(reader, "_file", racing_file)
+    reader.open()
+    assert [r[0] for r in reader.similar("a")] == ["b"]
+
+
+@pytest.fixture
+def shared_index(tmp_path):
+    similarity_index.close()
+    similarity_index.path = tmp_path
+    yield similarity_index
+    similarity_index.close()
+
+
+@pytest.mark.asyncio
+async def test_similar_endpoint(async_client: AsyncClient, db_session: AsyncSession, shared_index):
+    for title, description in (
+        ("Zero Trust Deck", "Network security architecture overview"),
+        ("Zero Trust Runbook", "Security architecture rollout steps"),
+        ("Pricing Sheet", "Commercial terms"),
+    ):
+        db_session.add(AssetModel(title=title, description=description, original_filename="x", file_path=title))
+    await db_session.commit()
+    deck = (await db_session.execute(AssetModel.__table__.select().where(AssetModel.title == "Zero Trust Deck"))).first()
+
+    response = await async_client.get(f"/api/v2/assets/{deck.id}/similar")
+    assert response.status_code == 200
+    assert [r["asset"]["title"] for r in response.json()] == ["Zero Trust Runbook"]
+
+    # Created assets are vectorized straight away
+    response = await async_client.post("/api/v2/assets", json={
+        "title": "Zero Trust Security Overview", "kind": "doc", "description": "Network security architecture"
+    })
+    new_id = response.json()["id"]
+    data = (await async_client.get(f"/api/v2/assets/{deck.id}/similar")).json()
+    assert data[0]["asset"]["id"] == new_id
+
+    response = await async_client.get("/api/v2/assets/missing/similar")
+    assert response.status_code == 404
@@ -0,0 +1,62 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import TechnologyModel
+from backend.services.skill_index import MIN_CAPACITY, PersonEntry, SkillIndex, skill_index
+
+
+def test_search_ranks_by_coverage_with_filters():
+    index = SkillIndex()
+    index.upsert(PersonEntry("1", "Ann", "ann@x", "Architect", "EMEA", ("AWS", "Kubernetes", "Terraform")))
+    index.upsert(PersonEntry("2", "Bob", "bob@x", "Engineer", "EMEA", ("AWS",)))
+    index.upsert(PersonEntry("3", "Cal", "cal@x", "Architect", "NA", ("Kubernetes", "AWS")))
+
+    ranked = index.search(["aws", "Kubernetes"])
+    assert [(e.id, c) for e, _, c in ranked] == [("1", 1.0), ("3", 1.0), ("2", 0.5)]
+    assert ranked[2][1] == ["aws"]
+
+    assert [e.id for e, _, _ in index.search(["AWS"], region="emea", role="architect")] == ["1"]
+    assert index.search(["AWS"], region="APAC") == []
+    assert index.search(["COBOL"]) == []
+
+    # Updates and deletes are reflected immediately; freed slots are reused
+    index.upsert(PersonEntry("2", "Bob", "bob@x", "Engineer", "EMEA", ("Kubernetes", "AWS")))
+    index.remove("1")
+    assert [e.id for e, _, _ in index.search(["AWS", "Kubernetes"])] == ["2", "3"]
+    index.upsert(PersonEntry("4", "Dee", "dee@x", None, None, ("AWS",)))
+    assert len(index) == 3
+
+
+def test_search_survives_growth_and_limits():
+    index = SkillIndex()
+    for i in range(MIN_CAPACITY + 10):
+        index.upsert(PersonEntry(str(i), f"P{i:05d}", f"{i}@x", None, None, ("Go",) if i % 2 else ("Go", "Rust")))
+    ranked = index.search(["Go", "Rust"], limit=3)
+    assert [e.name for e, _, _ in ranked] == ["P00000", "P00002", "P00004"]
+    assert index.search(["Rust"], limit=1)[0][0].id == "0"
+
+
+@pytest.mark.asyncio
+async def test_staffing_endpoint_tracks_people_changes(async_client: AsyncClient, db_session: AsyncSession):
+    skill_index.invalidate()
+    db_session.add_all([TechnologyModel(name="AWS"), TechnologyModel(name="Kubernetes")])
+    await db_session.commit()
+
+    response = await async_client.post("/api/v2/people", json={
+        "name": "Ann", "email": "ann@example.com", "role": "Architect", "region": "EMEA", "technologies": ["AWS"]
+    })
+    assert response.status_code == 200
+    ann = response.json()
+    assert ann["region"] == "EMEA"
+
+    response = await async_client.get("/api/v2/people/staffing?technologies=AWS&technologies=Kubernetes")
+    data = response.json()
+    assert [(c["person"]["name"], c["coverage"]) for c in data] == [("Ann", 0.5)]
+    assert data[0]["missing_technologies"] == ["Kubernetes"]
+
+    await async_client.put(f"/api/v2/people/{ann['id']}", json={"technologies": ["AWS", "Kubernetes"]})
+    data = (await async_client.get("/api/v2/people/staffing?technologies=Kubernetes&region=EMEA")).json()
+    assert [c["person"]["name"] for c in data] == ["Ann"]
+
+    await async_client.delete(f"/api/v2/people/{ann['id']}")
+    assert (await async_client.get("/api/v2/people/staffing?technologies=AWS")).json() == []
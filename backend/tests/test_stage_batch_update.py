@@ -0,0 +1,143 @@
+import pytest
+import uuid
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import OpportunityModel, GTMPlayModel, OpportunityPlayModel, OpportunityStageInstanceModel
+
+
+async def _seed(db_session: AsyncSession):
+    play = GTMPlayModel(title="Test Play", stages=[{"key": "s1"}, {"key": "s2"}])
+    db_session.add(play)
+    await db_session.commit()
+    await db_session.refresh(play)
+
+    opp_id = str(uuid.uuid4())
+    db_session.add(OpportunityModel(id=opp_id, name="Opp", account_name="Acme", status="active", health="green"))
+    opp_play_id = str(uuid.uuid4())
+    db_session.add(OpportunityPlayModel(id=opp_play_id, opportunity_id=opp_id, play_id=play.id, is_active=True))
+    for key in ("s1", "s2"):
+        db_session.add(OpportunityStageInstanceModel(
+            id=str(uuid.uuid4()),
+            opportunity_play_id=opp_play_id,
+            play_stage_key=key,
+            status="not_started",
+            checklist_item_statuses={"Item 1": "todo"} if key == "s1" else None
+        ))
+    await db_session.commit()
+    return opp_id, play.id
+
+
+@pytest.mark.asyncio
+async def test_batch_update_returns_only_changed(async_client: AsyncClient, db_session: AsyncSession):
+    opp_id, play_id = await _seed(db_session)
+
+    response = await async_client.patch(f"/api/v2/opportunities/{opp_id}/stages", json={"updates": [
+        {"play_id": str(play_id), "stage_key": "s1", "checklist_item_statuses": {"Item 2": "done"}},
+        {"play_id": str(play_id), "stage_key": "s1", "status": "in_progress"},
+        {"play_id": str(play_id), "stage_key": "s2", "status": "not_started"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["play_stage_key"] == "s1"
+    assert data[0]["status"] == "in_progress"
+    assert data[0]["checklist_item_statuses"] == {"Item 1": "todo", "Item 2": "done"}
+
+
+@pytest.mark.asyncio
+async def test_batch_update_is_all_or_nothing(async_client: AsyncClient, db_session: AsyncSession):
+    opp_id, play_id = await _seed(db_session)
+
+    response = await async_client.patch(f"/api/v2/opportunities/{opp_id}/stages", json={"updates": [
+        {"play_id": str(play_id), "stage_key": "s1", "status": "completed"},
+        {"play_id": str(play_id), "stage_key": "missing", "status": "completed"},
+    ]})
+    assert response.status_code == 404
+
+    response = await async_client.patch(f"/api/v2/opportunities/{opp_id}/stages", json={"updates": [
+        {"play_id": str(play_id), "stage_key": "s1", "summary_note": "noop check"},
+    ]})
+    assert response.json()[0]["status"] == "not_started"
+
+
+@pytest.mark.asyncio
+async def test_single_patch_merges_checklist_and_bumps_version(async_client: AsyncClient, db_session: AsyncSession):
+    opp_id, play_id = await _seed(db_session)
+    url = f"/api/v2/opportunities/{opp_id}/play/{play_id}/stage/s1"
+
+    response = await async_client.patch(url, json={"checklist_item_statuses": {"Item 2": "done"}})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["checklist_item_statuses"] == {"Item 1": "todo", "Item 2": "done"}
+    assert data["version"] == 2
+
+    # A second editor working from version 2 merges in without losing ticks
+    response = await async_client.patch(url, json={"checklist_item_statuses": {"Item 1": "done"}, "expected_version": 2})
+    assert response.status_code == 200
+    assert response.json()["checklist_item_statuses"] == {"Item 1": "done", "Item 2": "done"}
+
+    # Stale version is rejected
+    response = await async_client.patch(url, json={"status": "completed", "expected_version": 2})
+    assert response.status_code == 409
+
+    response = await async_client.patch(f"/api/v2/opportunities/{opp_id}/play/{play_id}/stage/missing", json={"status": "completed"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_update_rejects_stale_version(async_client: AsyncClient, db_session: AsyncSession):
+    opp_id, play_id = await _seed(db_session)
+
+    response = await async_client.patch(f"/api/v2/opportunities/{opp_id}/stages", json={"updates": [
+        {"play_id": str(play_id), "stage_key": "s1", "status": "completed", "expected_version": 5},
+    ]})
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_single_patch_merges_into_empty_checklist(async_client: AsyncClient, db_session: AsyncSession):
+    opp_id, play_id = await _seed(db_session)
+
+    response = await async_client.patch(
+        f"/api/v2/opportunities/{opp_id}/play/{play_id}/stage/s2",
+        json={"checklist_item_statuses": {"Item 1": "done"}}
+    )
+    assert response.status_code == 200
+    assert response.json()["checklist_item_statuses"] == {"Item 1": "done"}
+
+
+@pytest.mark.asyncio
+async def test_batch_update_merges_checklist_server_side(async_client: AsyncClient, db_session: AsyncSession):
+    opp_id, play_id = await _seed(db_session)
+    url = f"/api/v2/opportunities/{opp_id}/stages"
+
+    # Two editors tick different items from the same starting version
+    response = await async_client.patch(url, json={"updates": [
+        {"play_id": str(play_id), "stage_key": "s1", "checklist_item_statuses": {"Item 1": "done"}, "expected_version": 1},
+        {"play_id": str(play_id), "stage_key": "s2", "checklist_item_statuses": {"Item 3": "done"}},
+    ]})
+    assert response.status_code == 200
+    response = await async_client.patch(url, json={"updates": [
+        {"play_id": str(play_id), "stage_key": "s1", "checklist_item_statuses": {"Item 2": "done"}},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data[0]["checklist_item_statuses"] == {"Item 1": "done", "Item 2": "done"}
+    assert data[0]["version"] == 3
+
+
+@pytest.mark.asyncio
+async def test_merged_checklist_ignores_null_values(db_session: AsyncSession):
+    from sqlalchemy import update
+    from backend.api.v2_endpoints import _merged_checklist
+
+    opp_id, _ = await _seed(db_session)
+    stages = OpportunityStageInstanceModel.__table__
+    merged = (await db_session.execute(
+        update(stages)
+        .where(stages.c.play_stage_key == "s1")
+        .values(checklist_item_statuses=_merged_checklist(db_session, stages.c.checklist_item_statuses, {"Item 1": None, "Item 2": "done"}))
+        .returning(stages.c.checklist_item_statuses)
+    )).scalar_one()
+    # json_patch would otherwise delete "Item 1", unlike Postgres' ||
+    assert merged == {"Item 1": "todo", "Item 2": "done"}
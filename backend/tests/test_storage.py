@@ -0,0 +1,101 @@
+import asyncio
+import io
+import os
+import threading
+import pytest
+from fastapi import UploadFile
+from backend.services import storage as storage_module
+from backend.services.storage import DelegatingStorageProvider, LocalFileSystemStorage, UrlCache, copy_chunked
+
+
+def test_copy_chunked_writes_everything(tmp_path):
+    data = os.urandom(3 * 1024 + 17)
+    written = copy_chunked(io.BytesIO(data), tmp_path / "out.bin", chunk_size=1024)
+    assert written == len(data)
+    assert (tmp_path / "out.bin").read_bytes() == data
+
+
+@pytest.mark.asyncio
+async def test_local_save_and_delete_run_off_the_loop(tmp_path, monkeypatch):
+    threads = []
+    real_copy = storage_module.copy_chunked
+
+    def tracking_copy(source, target_path, chunk_size=storage_module.CHUNK_SIZE, progress=None):
+        threads.append(threading.get_ident())
+        return real_copy(source, target_path, chunk_size, progress)
+
+    monkeypatch.setattr(storage_module, "copy_chunked", tracking_copy)
+
+    local = LocalFileSystemStorage(base_path=str(tmp_path))
+    delegating = DelegatingStorageProvider(local)
+    data = os.urandom(2 * storage_module.CHUNK_SIZE + 5)
+    path = await delegating.save(UploadFile(file=io.BytesIO(data), filename="deck.pptx"), "asset-1")
+
+    assert path == os.path.join("asset-1", "deck.pptx")
+    assert (tmp_path / path).read_bytes() == data
+    assert threads and threads[0] != threading.get_ident()
+    assert await delegating.get_url(path) == "/assets/asset-1/deck.pptx"
+
+    assert await delegating.delete(path) is True
+    assert await delegating.delete(path) is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_saves_are_bounded(tmp_path, monkeypatch):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def slow_copy(source, target_path, chunk_size=storage_module.CHUNK_SIZE, progress=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        release.wait(5)
+        with lock:
+            active -= 1
+        return 0
+
+    monkeypatch.setattr(storage_module, "copy_chunked", slow_copy)
+    monkeypatch.setattr(storage_module.io_limiter, "total_tokens", 2)
+
+    local = LocalFileSystemStorage(base_path=str(tmp_path))
+    saves = asyncio.gather(*(
+        local.save(UploadFile(file=io.BytesIO(b"x"), filename=f"f{i}.txt"), "batch") for i in range(6)
+    ))
+    task = asyncio.ensure_future(saves)
+    # The loop keeps serving while the writes are parked in worker threads
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+    assert peak == 2
+    release.set()
+    assert len(await task) == 6
+
+
+def test_url_cache_expires_and_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(storage_module.time, "monotonic", lambda: now[0])
+    cache = UrlCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", "https://a")
+    cache.put("b", "https://b")
+    assert cache.get("a") == "https://a"
+    cache.put("c", "https://c")  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_url_cache_discards_every_filename_for_a_path():
+    cache = UrlCache(max_entries=10, ttl_seconds=60)
+    cache.put("blobs/ab/deck", "https://inline")
+    cache.put("blobs/ab/deck", "https://named", filename="Q3 deck.pptx")
+    cache.put("blobs/cd/notes", "https://notes")
+    cache.discard_many(["blobs/ab/deck", "blobs/ef/gone"])
+    assert cache.get("blobs/ab/deck") is None
+    assert cache.get("blobs/ab/deck", "Q3 deck.pptx") is None
+    assert cache.get("blobs/cd/notes") == "https://notes"
+    assert len(cache) == 1
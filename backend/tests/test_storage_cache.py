@@ -0,0 +1,122 @@
+import hashlib
+import os
+import anyio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import AssetModel
+from backend.services.s3_storage import MB, S3StorageProvider
+from backend.services.storage import DiskCache, storage
+
+def put(provider: S3StorageProvider, key: str, body: bytes) -> str:
+    provider.s3_client.put_object(Bucket=provider.bucket_name, Key=key, Body=body)
+    return hashlib.sha256(body).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_read_through_hits_and_evicts(s3_provider, tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=250, max_object_bytes=200)
+    digests = {key: put(s3_provider, key, bytes([i]) * 100) for i, key in enumerate(["a.pdf", "b.pdf", "c.pdf"])}
+
+    first = await cache.fetch(s3_provider, "a.pdf", digests["a.pdf"])
+    assert first.read_bytes() == b"\x00" * 100
+    assert await cache.fetch(s3_provider, "a.pdf", digests["a.pdf"]) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    await cache.fetch(s3_provider, "b.pdf", digests["b.pdf"])
+    await cache.fetch(s3_provider, "a.pdf")  # a is now the most recently used
+    await cache.fetch(s3_provider, "c.pdf", digests["c.pdf"])
+    assert cache.evictions == 1
+    assert cache.total_bytes == 200
+    assert not (tmp_path / DiskCache._name("b.pdf")).exists()
+
+    # A restarted process picks the files back up
+    again = DiskCache(tmp_path, max_bytes=250, max_object_bytes=200)
+    assert await again.fetch(s3_provider, "c.pdf") is not None
+    assert (again.hits, again.misses) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_checksum_mismatch_and_oversize_are_not_cached(s3_provider, tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10 * MB, max_object_bytes=MB)
+    put(s3_provider, "deck.pptx", b"deck")
+    assert await cache.fetch(s3_provider, "deck.pptx", "0" * 64) is None
+    assert cache.checksum_failures == 1
+
+    put(s3_provider, "video.mp4", os.urandom(MB + 1))
+    assert await cache.fetch(s3_provider, "video.mp4") is None
+    assert cache.bypassed == 1
+    assert list(tmp_path.iterdir()) == []
+
+    # A file changed on disk behind our back is a miss, not a bad hit
+    put(s3_provider, "notes.md", b"# notes")
+    path = await cache.fetch(s3_provider, "notes.md")
+    path.write_bytes(b"# tampered!")
+    assert (await cache.fetch(s3_provider, "notes.md")).read_bytes() == b"# notes"
+    assert cache.misses == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.s3(active=True)
+async def test_download_endpoint_serves_from_cache(async_client: AsyncClient, db_session: AsyncSession, s3_provider,
+                                                   tmp_path, monkeypatch):
+    content = b"quarter end deck " * 64
+    digest = put(s3_provider, "blobs/aa/deck.pptx", content)
+    db_session.add(AssetModel(id="hot", title="Deck", original_filename="Q4.pptx", file_path="blobs/aa/deck.pptx",
+                              content_hash=digest, mime_type="application/vnd.ms-powerpoint"))
+    await db_session.commit()
+
+    monkeypatch.setattr(storage, "disk_cache", None)
+    monkeypatch.setattr(storage, "_cache_settings", (str(tmp_path), 10 * MB, MB))
+
+    # A miss redirects straight away and fills the cache afterwards
+    assert (await async_client.get("/api/assets/hot/file")).status_code == 302
+    for _ in range(2):
+        response = await async_client.get("/api/assets/hot/file")
+        assert response.status_code == 200
+        assert response.content == content
+        assert response.headers["etag"] == f'"{digest}"'
+    stats = (await async_client.get("/api/settings/storage-cache")).json()
+    assert stats["enabled"]
+    assert (stats["stats"]["hits"], stats["stats"]["misses"]) == (2, 1)
+
+    # Switched off: back to presigned redirects
+    monkeypatch.setattr(storage, "_cache_settings", None)
+    assert (await async_client.get("/api/assets/hot/file")).status_code == 302
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_fill_once(s3_provider, tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path, max_bytes=10 * MB, max_object_bytes=MB)
+    digest = put(s3_provider, "deck.pptx", b"deck " * 1000)
+    fills = []
+    fill = cache._fill
+
+    def counting_fill(*args):
+        fills.append(args[1])
+        return fill(*args)
+
+    monkeypatch.setattr(cache, "_fill", counting_fill)
+    paths = []
+
+    async def fetch():
+        paths.append(await cache.fetch(s3_provider, "deck.pptx", digest))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(fetch)
+    assert fills == ["deck.pptx"]
+    assert len(set(paths)) == 1 and paths[0] is not None
+    assert cache._filling == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.s3(active=True)
+async def test_download_to_copies_from_either_provider(s3_provider, asset_dir, tmp_path_factory):
+    put(s3_provider, "blobs/ab/deck.pptx", b"remote deck")
+    (asset_dir / "notes.md").write_bytes(b"# local notes")
+    target = tmp_path_factory.mktemp("downloads")
+    assert await storage.download_to("blobs/ab/deck.pptx", target / "deck.pptx", "s3") == len(b"remote deck")
+    assert (target / "deck.pptx").read_bytes() == b"remote deck"
+    await storage.download_to("notes.md", target / "notes.md", "local")
+    assert (target / "notes.md").read_bytes() == b"# local notes"
@@ -0,0 +1,97 @@
+import hashlib
+import io
+import os
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel
+from backend.services.direct_upload import multipart_etag
+from backend.services.s3_storage import MB
+from backend.services.storage import storage
+from backend.services.storage_migration import Throttle, TransferReader, storage_migration
+
+pytestmark = pytest.mark.s3(part_size=5 * MB, multipart_threshold=5 * MB)
+
+
+def test_transfer_reader_predicts_the_etag():
+    content = os.urandom(11 * MB + 7)
+    reader = TransferReader(io.BytesIO(content), 5 * MB)
+    while reader.read(3 * MB):
+        pass
+    parts = [content[i:i + 5 * MB] for i in range(0, len(content), 5 * MB)]
+    expected = multipart_etag([hashlib.md5(p).hexdigest() for p in parts]).strip('"')
+    assert reader.etag(5 * MB) == expected
+    assert reader.sha256.hexdigest() == hashlib.sha256(content).hexdigest()
+
+
+def test_throttle_paces_reads():
+    throttle = Throttle(1 * MB)
+    started = time.monotonic()
+    for _ in range(4):
+        throttle.consume(100 * 1024)
+    assert time.monotonic() - started >= 0.25
+
+
+@pytest.mark.asyncio
+async def test_migration_copies_verifies_and_resumes(async_client: AsyncClient, db_session: AsyncSession, s3_provider,
+                                                     asset_dir, upload_asset, monkeypatch):
+    big = os.urandom(6 * MB)
+    ids = [await upload_asset("deck.pptx", b"deck"),
+           await upload_asset("deck copy.pptx", b"deck"),  # same blob
+           await upload_asset("demo.mp4", big),
+           await upload_asset("lost.pdf", b"lost")]
+    assets = {a.id: a for a in (await db_session.execute(select(AssetModel))).scalars().all()}
+    assert {a.storage_provider for a in assets.values()} == {"local"}
+    (asset_dir / assets[ids[3]].file_path).unlink()
+
+    monkeypatch.setattr(storage, "_active_provider_type", "s3")
+    monkeypatch.setattr(storage, "_s3_config", {"bucket": s3_provider.bucket_name})
+    monkeypatch.setattr(storage, "_s3_provider", s3_provider)
+
+    # Before migrating, old assets still resolve to local disk
+    listed = {a["id"]: a["url"] for a in (await async_client.get("/api/assets/")).json()}
+    assert listed[ids[0]].startswith("/assets/blobs/")
+    assert (await async_client.get(f"/api/assets/{ids[2]}/file")).content == big
+
+    await storage_migration.run(db_session.bind, concurrency=2)
+    report = storage_migration.report()
+    assert report["status"] == "completed", report
+    assert (report["total_files"], report["migrated_files"], report["failed_files"]) == (3, 2, 1)
+    assert report["bytes_transferred"] == len(big) + 4
+    assert report["errors"][0]["key"] == assets[ids[3]].file_path
+
+    db_session.expire_all()
+    rows = {a.id: a for a in (await db_session.execute(select(AssetModel))).scalars().all()}
+    assert [rows[i].storage_provider for i in ids] == ["s3", "s3", "s3", "local"]
+    body = s3_provider.s3_client.get_object(Bucket=s3_provider.bucket_name, Key=rows[ids[2]].file_path)["Body"].read()
+    assert body == big
+    # The local copy stays, and the asset is now served from the bucket
+    assert (asset_dir / rows[ids[2]].file_path).exists()
+    assert (await async_client.get(f"/api/assets/{ids[2]}/file")).status_code == 302
+
+    # Re-running only retries what's left
+    await storage_migration.run(db_session.bind)
+    assert (storage_migration.report()["total_files"], storage_migration.report()["failed_files"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_migration_marks_files_already_in_bucket(async_client: AsyncClient, db_session: AsyncSession, s3_provider,
+                                                       asset_dir, upload_asset, monkeypatch):
+    asset_id = await upload_asset("notes.md", b"# notes")
+    asset = await db_session.get(AssetModel, asset_id)
+    s3_provider.s3_client.put_object(Bucket=s3_provider.bucket_name, Key=asset.file_path, Body=b"# notes")
+
+    monkeypatch.setattr(storage, "_active_provider_type", "s3")
+    monkeypatch.setattr(storage, "_s3_provider", s3_provider)
+    response = await async_client.post("/api/v2/admin/storage/migrate", params={"delete_local": True})
+    assert response.status_code == 202
+    report = (await async_client.get("/api/v2/admin/storage/migration")).json()
+    assert (report["status"], report["already_present"], report["migrated_files"]) == ("completed", 1, 0)
+    assert not (asset_dir / asset.file_path).exists()
+
+
+@pytest.mark.asyncio
+async def test_migration_needs_s3(async_client: AsyncClient):
+    assert (await async_client.post("/api/v2/admin/storage/migrate")).status_code == 409
@@ -0,0 +1,107 @@
+import io
+import json
+import zipfile
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from backend.models_db import AssetModel, ExtractedTextModel
+from backend.services import text_extraction
+from backend.services.asset_processing import asset_processing
+from backend.services.duplicate_detector import duplicate_detector
+from backend.services.storage import local_storage_instance
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+CORE = ('<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>{}</dc:title></cp:coreProperties>')
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def docx(title: str, paragraphs) -> bytes:
+    body = "".join(f"<w:p><w:r><w:t>{p}</w:t></w:r></w:p>" for p in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("word/document.xml", f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+        z.writestr("docProps/core.xml", CORE.format(title))
+    return buffer.getvalue()
+
+
+def pptx(slides) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        for i, lines in enumerate(slides, 1):
+            paragraphs = "".join(f"<a:p><a:r><a:t>{line}</a:t></a:r></a:p>" for line in lines)
+            z.writestr(f"ppt/slides/slide{i}.xml", f'<p:sld xmlns:p="p" xmlns:a="{A}"><p:txBody>{paragraphs}</p:txBody></p:sld>')
+    return buffer.getvalue()
+
+
+def test_extracts_office_and_markdown(tmp_path):
+    (tmp_path / "plan.docx").write_bytes(docx("Migration plan", ["Phase one moves the clusters.", "Phase two retires them."]))
+    result = text_extraction.extract(str(tmp_path / "plan.docx"), "plan.docx")
+    assert (result["format"], result["title"]) == ("docx", "Migration plan")
+    assert result["text"] == "Phase one moves the clusters.\nPhase two retires them."
+
+    # Slides in numeric order, not name order
+    (tmp_path / "deck.pptx").write_bytes(pptx([["Intro"]] + [[f"Slide {i}"] for i in range(2, 11)]))
+    result = text_extraction.extract(str(tmp_path / "deck.pptx"), "deck.pptx")
+    assert result["page_count"] == 10
+    assert result["text"].split("\n\n")[:3] == ["Intro", "Slide 2", "Slide 3"]
+
+    (tmp_path / "notes.md").write_text("# Edge rollout\n\nShip **the** [edge](http://x) nodes to snake_case sites.\n")
+    result = text_extraction.extract(str(tmp_path / "notes.md"), "notes.md")
+    assert result["title"] == "Edge rollout"
+    assert result["summary"] == "Ship the edge nodes to snake_case sites."
+
+    with pytest.raises(text_extraction.UnsupportedFormat):
+        text_extraction.extract(str(tmp_path / "notes.md"), "clip.mp4", "video/mp4")
+
+
+@pytest.mark.asyncio
+async def test_upload_extracts_in_background_once_per_content(async_client: AsyncClient, db_session: AsyncSession,
+                                                             tmp_path, monkeypatch):
+    monkeypatch.setattr(local_storage_instance, "base_path", tmp_path)
+    content = docx("Quarterly review", ["Kubernetes adoption grew across every region this quarter."])
+    response = await async_client.post("/api/extract", files={"file": ("review.docx", content, DOCX)})
+    assert response.status_code == 200
+    assert (response.json()["title"], response.json()["format"]) == ("Quarterly review", "docx")
+    extracted = asset_processing.extracted
+
+    metadata = {"title": "Review", "type": "template", "category": "technical", "summary": "",
+                "confidentiality": "internal-only"}
+    ids = []
+    for name in ("review.docx", "review copy.docx"):
+        response = await async_client.post("/api/assets/", files={"file": (name, content, DOCX)},
+                                           data={"metadata_json": json.dumps(metadata)})
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    # The preview already parsed these bytes
+    assert asset_processing.extracted == extracted
+    assert (await db_session.execute(select(ExtractedTextModel))).scalars().all()[0].word_count == 8
+
+    text = (await async_client.get(f"/api/v2/assets/{ids[1]}/text")).json()
+    assert text["text"].startswith("Kubernetes adoption")
+    docs = await duplicate_detector._documents(db_session, ids)
+    assert all("Kubernetes adoption" in text for _, text, _ in docs)
+
+
+@pytest.mark.asyncio
+async def test_new_file_is_parsed_after_upload(async_client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch):
+    monkeypatch.setattr(local_storage_instance, "base_path", tmp_path)
+    metadata = {"title": "Runbook", "type": "template", "category": "technical", "summary": "",
+                "confidentiality": "internal-only"}
+    response = await async_client.post("/api/assets/", files={"file": ("runbook.md", b"# Runbook\n\nRestart the ingest workers.", "text/markdown")},
+                                       data={"metadata_json": json.dumps(metadata)})
+    asset_id = response.json()["id"]
+    text = (await async_client.get(f"/api/v2/assets/{asset_id}/text")).json()
+    assert (text["title"], text["summary"]) == ("Runbook", "Restart the ingest workers.")
+
+    # Unsupported and unparseable files: no text, and the upload still succeeds
+    response = await async_client.post("/api/assets/", files={"file": ("clip.mp4", b"\x00\x01", "video/mp4")},
+                                       data={"metadata_json": json.dumps(metadata)})
+    assert (await async_client.get(f"/api/v2/assets/{response.json()['id']}/text")).status_code == 404
+    response = await async_client.post("/api/assets/", files={"file": ("broken.pptx", b"not a zip", "application/octet-stream")},
+                                       data={"metadata_json": json.dumps(metadata)})
+    assert response.status_code == 200
+    assert (await async_client.get(f"/api/v2/assets/{response.json()['id']}/text")).json()["error"]
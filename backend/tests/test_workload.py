@@ -0,0 +1,72 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models_db import (
+    GTMPlayModel, OpportunityModel, OpportunityPlayModel, OpportunityStageInstanceModel, PersonModel
+)
+from backend.services.workload import sync_opportunity_members
+
+
+async def _seed(db_session: AsyncSession):
+    now = datetime.now(timezone.utc)
+    play = GTMPlayModel(title="Play")
+    db_session.add(play)
+    db_session.add(PersonModel(id="ann", name="Ann", email="ann@example.com"))
+    await db_session.commit()
+
+    opp_ids = []
+    for name, status, owner, team in (
+        ("Active A", "active", "ann", ["bob"]),
+        ("Active B", "active", "bob", ["ann", "bob"]),
+        ("Lost", "closed_lost", "ann", []),
+    ):
+        opp_id = str(uuid.uuid4())
+        opp_ids.append(opp_id)
+        db_session.add(OpportunityModel(
+            id=opp_id, name=name, account_name="Acme", status=status, health="green",
+            sales_owner_user_id=owner, team_member_user_ids=team, tags=[]
+        ))
+        opp_play_id = str(uuid.uuid4())
+        db_session.add(OpportunityPlayModel(id=opp_play_id, opportunity_id=opp_id, play_id=play.id))
+        for key, stage_status, offset in (
+            ("overdue", "in_progress", -3), ("soon", "not_started", 5), ("later", "not_started", 60), ("done", "completed", 2)
+        ):
+            db_session.add(OpportunityStageInstanceModel(
+                id=str(uuid.uuid4()), opportunity_play_id=opp_play_id, play_stage_key=key,
+                status=stage_status, target_date=now + timedelta(days=offset)
+            ))
+    await db_session.commit()
+    await sync_opportunity_members(db_session, opp_ids)
+    await db_session.commit()
+    return opp_ids
+
+
+@pytest.mark.asyncio
+async def test_workload_aggregates_active_opportunities(async_client: AsyncClient, db_session: AsyncSession):
+    opp_ids = await _seed(db_session)
+
+    response = await async_client.get("/api/v2/people/workload")
+    assert response.status_code == 200
+    data = {w["person_id"]: w for w in response.json()}
+
+    ann = data["ann"]
+    assert ann["name"] == "Ann"
+    assert ann["active_opportunities"] == 2
+    assert (ann["as_sales_owner"], ann["as_team_member"]) == (1, 1)
+    # Three open stages per active opportunity, one of them overdue
+    assert (ann["open_stage_instances"], ann["overdue_stage_instances"]) == (6, 2)
+    assert [u["stage_key"] for u in ann["upcoming"]] == ["soon", "soon"]
+
+    response = await async_client.get("/api/v2/people/workload?person_ids=bob&person_ids=idle&days=90&upcoming_limit=3")
+    data = response.json()
+    assert [w["person_id"] for w in data] == ["bob", "idle"]
+    assert data[0]["active_opportunities"] == 2
+    assert len(data[0]["upcoming"]) == 3
+    assert data[1]["active_opportunities"] == 0
+
+    # Team edits through the API keep the member index current
+    await async_client.put(f"/api/v2/opportunities/{opp_ids[0]}", json={"team_member_user_ids": []})
+    data = (await async_client.get("/api/v2/people/workload?person_ids=bob")).json()
+    assert data[0]["active_opportunities"] == 1
@@ -79,8 +79,14 @@ export const AssetRow: React.FC<{ asset: Asset; onClick: () => void; onEdit?: (a
       asset.kind === 'coderef' ? 'bg-blue-50' :
         asset.kind === 'link' ? 'bg-purple-50' : 'bg-slate-100'
       }`}>
-      <AssetIcon kind={asset.kind} />
-      <span className="text-[9px] font-semibold text-slate-500 mt-1 uppercase tracking-tighter leading-none">{asset.kind}</span>
+      {asset.thumbnail_url ? (
+        <img src={asset.thumbnail_url} alt="" loading="lazy" className="w-full h-full object-cover rounded" />
+      ) : (
+        <>
+          <AssetIcon kind={asset.kind} />
+          <span className="text-[9px] font-semibold text-slate-500 mt-1 uppercase tracking-tighter leading-none">{asset.kind}</span>
+        </>
+      )}
     </div>
     <div className="flex-1 min-w-0">
       <div className="flex items-center gap-2 mb-0.5">
@@ -149,6 +155,10 @@ export const AssetCard: React.FC<{ asset: Asset; onClick: () => void; onEdit?: (
       onClick={onClick}
       className="bg-white border border-slate-200 rounded-xl p-5 hover:shadow-lg transition-all cursor-pointer flex flex-col h-full group relative"
     >
+      {asset.thumbnail_url && (
+        <img src={asset.thumbnail_url} alt="" loading="lazy" className="w-full h-32 object-cover rounded-lg mb-3 bg-slate-50" />
+      )}
+
       {/* Top Row: Kind Icon & Offerings */}
       <div className="flex justify-between items-start mb-3">
         <div title={asset.kind}>
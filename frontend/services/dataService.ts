@@ -1,6 +1,6 @@
 
 
-import { Asset, Dictionary, OpportunityInput, Play, Comment, HistoryItem, AssetCollection, Opportunity, OpportunityPlay, StageNote, Person } from "../types";
+import { Asset, Dictionary, OpportunityInput, Play, Comment, HistoryItem, AssetCollection, Opportunity, OpportunityPlay, OpportunityStageInstance, StageNote, Person, StaffingCandidate, PersonWorkload, UploadProgress, DirectUploadPlan, UploadSession } from "../types";
 
 const API_BASE = '/api/v2';
 
@@ -334,6 +334,29 @@ export const updateOpportunityStage = async (
   });
 };
 
+// Apply many stage updates (across stages and plays of one opportunity) in one request.
+// Resolves to only the stage instances that changed.
+export const updateOpportunityStages = async (
+  oppId: string,
+  updates: Array<{
+    play_id: string;
+    stage_key: string;
+    status?: string;
+    summary_note?: string;
+    checklist_item_statuses?: Record<string, string>;
+    custom_checklist_items?: any[];
+    start_date?: string;
+    target_date?: string;
+    completed_date?: string;
+  }>
+): Promise<OpportunityStageInstance[]> => {
+  return fetchApi<OpportunityStageInstance[]>(`/opportunities/${oppId}/stages`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ updates })
+  });
+};
+
 export const getUsers = async (): Promise<{ id: string, name: string, avatar: string }[]> => {
   // Mock users for now
   return [
@@ -397,4 +420,124 @@ export const updatePerson = async (id: string, personData: Partial<Person>): Pro
 
 export const deletePerson = async (id: string): Promise<void> => {
   return fetchApi(`/people/${id}`, { method: 'DELETE' });
-};
\ No newline at end of file
+};
+
+export const searchStaffing = async (
+  technologies: string[],
+  filters: { region?: string; role?: string; limit?: number } = {}
+): Promise<StaffingCandidate[]> => {
+  const params = new URLSearchParams();
+  technologies.forEach(t => params.append('technologies', t));
+  if (filters.region) params.append('region', filters.region);
+  if (filters.role) params.append('role', filters.role);
+  if (filters.limit) params.append('limit', String(filters.limit));
+  return fetchApi<StaffingCandidate[]>(`/people/staffing?${params.toString()}`);
+};
+
+export const getPeopleWorkload = async (personIds: string[] = [], days = 30): Promise<PersonWorkload[]> => {
+  const params = new URLSearchParams({ days: String(days) });
+  personIds.forEach(id => params.append('person_ids', id));
+  return fetchApi<PersonWorkload[]>(`/people/workload?${params.toString()}`);
+};
+
+// Poll while an asset upload sent with the same upload_id is in flight
+export const getUploadProgress = async (uploadId: string): Promise<UploadProgress> => {
+  return fetchApi<UploadProgress>(`/uploads/${encodeURIComponent(uploadId)}`);
+};
+
+// Upload a file straight to the bucket (S3 provider only), then register it as an asset.
+// Multipart parts go up a few at a time; the bucket's CORS config must expose ETag.
+export const uploadAssetDirect = async (
+  file: File,
+  asset: Partial<Asset>,
+  onProgress?: (uploadedBytes: number, totalBytes: number) => void
+): Promise<Asset> => {
+  const plan = await fetchApi<DirectUploadPlan>('/uploads/direct', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename: file.name, content_type: file.type || undefined, size: file.size }),
+  });
+
+  let etag: string | undefined;
+  const parts: { part_number: number; etag: string }[] = [];
+  if (plan.method === 'post') {
+    const form = new FormData();
+    Object.entries(plan.post_fields).forEach(([k, v]) => form.append(k, v));
+    form.append('file', file);
+    const response = await fetch(plan.post_url!, { method: 'POST', body: form });
+    if (!response.ok) throw new Error(`Upload failed: ${response.status}`);
+    etag = response.headers.get('ETag') || undefined;
+    onProgress?.(file.size, file.size);
+  } else {
+    let uploaded = 0;
+    const queue = [...plan.parts];
+    const worker = async () => {
+      for (let part = queue.shift(); part; part = queue.shift()) {
+        const start = (part.part_number - 1) * plan.part_size!;
+        const blob = file.slice(start, start + plan.part_size!);
+        const response = await fetch(part.url, { method: 'PUT', body: blob });
+        if (!response.ok) throw new Error(`Part ${part.part_number} failed: ${response.status}`);
+        parts.push({ part_number: part.part_number, etag: response.headers.get('ETag') || '' });
+        uploaded += blob.size;
+        onProgress?.(uploaded, file.size);
+      }
+    };
+    await Promise.all(Array.from({ length: Math.min(4, plan.parts.length) }, worker));
+  }
+
+  return fetchApi<Asset>('/uploads/direct/complete', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ token: plan.token, etag, parts, asset }),
+  });
+};
+
+// Upload a large file in chunks through the API, picking up where it left off after a
+// dropped connection (or a page reload: the session id is kept in localStorage).
+export const uploadAssetResumable = async (
+  file: File,
+  asset: Partial<Asset>,
+  onProgress?: (uploadedBytes: number, totalBytes: number) => void
+): Promise<Asset> => {
+  const resumeKey = `upload-session:${file.name}:${file.size}:${file.lastModified}`;
+  let session: UploadSession | undefined;
+  const saved = localStorage.getItem(resumeKey);
+  if (saved) {
+    session = await fetchApi<UploadSession>(`/uploads/sessions/${saved}`).catch(() => undefined);
+  }
+  if (!session) {
+    session = await fetchApi<UploadSession>('/uploads/sessions', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filename: file.name, content_type: file.type || undefined, size: file.size }),
+    });
+    localStorage.setItem(resumeKey, session.id);
+  }
+
+  let failures = 0;
+  while (session.offset < file.size) {
+    onProgress?.(session.offset, file.size);
+    try {
+      session = await fetchApi<UploadSession>(`/uploads/sessions/${session.id}`, {
+        method: 'PUT',
+        headers: { 'Upload-Offset': String(session.offset) },
+        body: file.slice(session.offset, session.offset + session.chunk_size),
+      });
+      failures = 0;
+    } catch (error) {
+      if (++failures > 5) throw error;
+      await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** failures));
+      // Ask the server how much it actually kept before retrying
+      session = await fetchApi<UploadSession>(`/uploads/sessions/${session.id}`);
+    }
+  }
+  onProgress?.(file.size, file.size);
+
+  const created = await fetchApi<Asset>(`/uploads/sessions/${session.id}/complete`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ asset }),
+  });
+  localStorage.removeItem(resumeKey);
+  return created;
+};
@@ -67,6 +67,7 @@ export interface Asset {
 
   linked_opportunity_ids?: string[];
   linked_asset_ids?: string[];
+  thumbnail_url?: string; // Set once the preview worker has rendered one
 }
 
 export interface Dictionary {
@@ -107,9 +108,66 @@ export interface Person {
   name: string;
   email: string;
   role?: string;
+  region?: string;
   technologies: string[];
 }
 
+export interface StaffingCandidate {
+  person: Person;
+  coverage: number;
+  matched_technologies: string[];
+  missing_technologies: string[];
+}
+
+export interface PersonWorkload {
+  person_id: string;
+  name?: string;
+  active_opportunities: number;
+  as_sales_owner: number;
+  as_technical_lead: number;
+  as_team_member: number;
+  open_stage_instances: number;
+  overdue_stage_instances: number;
+  upcoming: {
+    opportunity_id: string;
+    opportunity_name: string;
+    play_id: string;
+    stage_key: string;
+    target_date: string;
+  }[];
+}
+
+export interface UploadProgress {
+  upload_id: string;
+  filename?: string;
+  status: 'uploading' | 'completed' | 'failed';
+  total_bytes?: number;
+  transferred_bytes: number;
+  retries: number;
+  error?: string;
+  updated_at: string;
+}
+
+export interface DirectUploadPlan {
+  token: string;
+  key: string;
+  method: 'post' | 'multipart';
+  expires_at: number;
+  post_url?: string;
+  post_fields: Record<string, string>;
+  part_size?: number;
+  parts: { part_number: number; url: string }[];
+}
+
+export interface UploadSession {
+  id: string;
+  filename: string;
+  size: number;
+  offset: number;
+  chunk_size: number;
+  expires_at: string;
+}
+
 // --- Opportunity Entities ---
 
 export interface IntegrationLink {